@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+🧮 Orpheus Voice Server Pre-Fork Scaling Benchmark
+=================================================
+
+Measures CPU-bound /generate throughput of the pre-fork mode at different
+process counts. The Orpheus call is replaced with an instant simulated
+upstream that still does the real per-request Python work (text cleanup and
+emotional enhancement, WAV assembly), and the response is the default JSON
+body with base64 audio - so the server is limited by CPU, not by Baseten.
+With one process that work is serialised by the GIL; with N processes it
+should scale until the cores run out.
+
+Clients run in separate processes so the load generator is not GIL-bound itself.
+
+Usage:
+    python benchmark_prefork_scaling.py
+    python benchmark_prefork_scaling.py --processes 1 2 4 8 --requests 400 --audio-seconds 10
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import enhanced_voice_server_optimized as server
+
+SAMPLE_TEXT = "Greetings, mortal!! Allow me to demonstrate the unique essence of my character... through this mystical demonstration."
+
+
+def install_simulated_orpheus(audio_seconds):
+    """Replace the Orpheus call with an instant one that keeps the CPU-side request work"""
+    pcm = os.urandom(int(server.ORPHEUS_SAMPLE_RATE * audio_seconds) * 2)
+
+    def simulated_orpheus(text, voice_config, use_streaming=False, emotion_mode='natural', add_emotion_tags=True,
+                          priority='generate', deadline=None):
+        start_time = time.time()
+        request_info = server.prepare_orpheus_request(text, voice_config, emotion_mode, add_emotion_tags)
+        wav_data = server.create_orpheus_wav(pcm)
+        return {
+            'success': True,
+            'audio_data': wav_data,
+            'content_type': 'audio/wav',
+            'duration': audio_seconds,
+            'generation_time': time.time() - start_time,
+            'streaming': False,
+            'emotion_mode': emotion_mode,
+            'temperature_used': request_info['temperature'],
+            'fallback_used': None,
+            'performance': {}
+        }
+
+    server.generate_orpheus_tts_optimized = simulated_orpheus
+    server.audio_library.enabled = False
+
+
+def run_supervisor(listen_socket, processes):
+    """Forked benchmark server: quiet workers behind a PreforkSupervisor"""
+    sys.stdout = sys.stderr = open(os.devnull, 'w')
+    server.PreforkSupervisor(listen_socket, processes, workers=8, queue_size=256).run()
+
+
+def send_generate(url):
+    """POST one /generate request and return the HTTP status"""
+    body = json.dumps({'text': SAMPLE_TEXT, 'voice': 'archetype_wizard_male'}).encode('utf-8')
+    request = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return 0
+
+
+def run_round(processes, total_requests, clients):
+    """Start a supervisor with N workers, drive it with client processes, return (req/s, statuses)"""
+    listen_socket = socket.create_server(('127.0.0.1', 0), backlog=256)
+    url = f"http://127.0.0.1:{listen_socket.getsockname()[1]}/generate"
+    context = multiprocessing.get_context('fork')
+    supervisor = context.Process(target=run_supervisor, args=(listen_socket, processes), daemon=True)
+    supervisor.start()
+
+    try:
+        # Wait until a worker answers before timing anything
+        deadline = time.time() + 30
+        while send_generate(url) != 200 and time.time() < deadline:
+            time.sleep(0.1)
+
+        with context.Pool(clients) as pool:
+            start_time = time.time()
+            statuses = pool.map(send_generate, [url] * total_requests, chunksize=1)
+            elapsed = time.time() - start_time
+    finally:
+        os.kill(supervisor.pid, signal.SIGTERM)
+        supervisor.join(timeout=15)
+        listen_socket.close()
+
+    return total_requests / elapsed, statuses
+
+
+def main():
+    cpu_count = os.cpu_count() or 1
+    default_processes = sorted({1, 2, 4, cpu_count})
+    parser = argparse.ArgumentParser(description="Benchmark CPU-bound throughput of the pre-fork server mode")
+    parser.add_argument('--processes', type=int, nargs='+', default=default_processes, help='Worker process counts to compare')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per round')
+    parser.add_argument('--clients', type=int, default=max(4, cpu_count), help='Client processes')
+    parser.add_argument('--audio-seconds', type=float, default=8.0, help='Simulated audio length per response')
+    args = parser.parse_args()
+
+    print("\n" + "=" * 60)
+    print("🧮 ORPHEUS PRE-FORK SCALING BENCHMARK")
+    print("=" * 60)
+    print(f"   CPU cores: {cpu_count}")
+    print(f"   Requests per round: {args.requests}")
+    print(f"   Client processes: {args.clients}")
+    print(f"   Simulated audio per response: {args.audio_seconds:.1f}s")
+    print("-" * 60)
+
+    install_simulated_orpheus(args.audio_seconds)
+
+    print(f"{'processes':>10} {'req/s':>10} {'speedup':>8} {'ok':>6} {'errors':>7}")
+    baseline = None
+    for processes in args.processes:
+        throughput, statuses = run_round(processes, args.requests, args.clients)
+        baseline = baseline or throughput
+        ok = statuses.count(200)
+        print(f"{processes:>10} {throughput:>10.2f} {throughput / baseline:>7.2f}x {ok:>6} {len(statuses) - ok:>7}")
+
+    print("-" * 60)
+    print("💡 Throughput should grow with processes up to the number of CPU cores")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+⏱️ Orpheus Text Enhancement Micro-Benchmark
+==========================================
+
+Times the per-request text pipeline (cleanup + emotional enhancement) for
+every Orpheus voice config, comparing the stage-by-stage reference functions
+with the compiled per-voice TextEnhancementPlan. Outputs are checked to be
+identical before anything is timed.
+
+Usage:
+    python benchmark_text_enhancement.py
+    python benchmark_text_enhancement.py --iterations 5000
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import enhanced_voice_server_optimized as server
+
+SAMPLE_TEXTS = [
+    "Hello there!! How are you doing today??   I hope everything is going well....",
+    "That joke was so funny, I was laughing for ages. Want to hear another silly one?",
+    "The ancient magic of this place holds great power. Listen closely, and you will learn.",
+    "I really want that tempting dessert. Going shopping later, then cooking something nice!",
+    "Short reply.",
+]
+
+
+def reference_pipeline(text, voice_config):
+    """Per-request work before the plan: four re.sub calls plus the stepwise enhancement"""
+    cleaned = re.sub(r'[.]{3,}', '...', text)
+    cleaned = re.sub(r'[!]{2,}', '!', cleaned)
+    cleaned = re.sub(r'[?]{2,}', '?', cleaned)
+    cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+    return server.enhance_text_with_emotions_stepwise(cleaned, voice_config)
+
+
+def planned_pipeline(text, voice_config):
+    """Per-request work with the compiled cleanup pattern and the voice's TextEnhancementPlan"""
+    return server.enhance_text_with_emotions(server.clean_orpheus_text(text), voice_config)
+
+
+def time_pipeline(pipeline, voice_config, iterations):
+    """Microseconds per text for one voice"""
+    elapsed = timeit.timeit(
+        lambda: [pipeline(text, voice_config) for text in SAMPLE_TEXTS],
+        number=iterations
+    )
+    return elapsed / (iterations * len(SAMPLE_TEXTS)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Orpheus text enhancement pipeline per voice")
+    parser.add_argument('--iterations', type=int, default=2000, help='Passes over the sample texts per voice')
+    args = parser.parse_args()
+
+    voices = {name: config for name, config in server.VOICE_CONFIGS.items() if config.get('type') == 'orpheus'}
+
+    print("\n" + "=" * 60)
+    print("⏱️ ORPHEUS TEXT ENHANCEMENT MICRO-BENCHMARK")
+    print("=" * 60)
+    print(f"   Voices: {len(voices)}")
+    print(f"   Sample texts: {len(SAMPLE_TEXTS)}")
+    print(f"   Iterations: {args.iterations}")
+    print("-" * 60)
+
+    mismatches = [
+        (name, text) for name, config in voices.items() for text in SAMPLE_TEXTS
+        if reference_pipeline(text, config) != planned_pipeline(text, config)
+    ]
+    if mismatches:
+        for name, text in mismatches:
+            print(f"❌ Output differs for {name}: {text!r}")
+        sys.exit(1)
+    print("✅ Compiled plans match the stepwise pipeline for every voice")
+
+    print(f"{'voice':<38} {'stepwise µs':>12} {'plan µs':>9} {'speedup':>8}")
+    total_reference = total_planned = 0.0
+    for name, config in voices.items():
+        reference_us = time_pipeline(reference_pipeline, config, args.iterations)
+        planned_us = time_pipeline(planned_pipeline, config, args.iterations)
+        total_reference += reference_us
+        total_planned += planned_us
+        print(f"{name:<38} {reference_us:>12.2f} {planned_us:>9.2f} {reference_us / planned_us:>7.2f}x")
+
+    print("-" * 60)
+    print(f"{'mean':<38} {total_reference / len(voices):>12.2f} {total_planned / len(voices):>9.2f} "
+          f"{total_reference / total_planned:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,23 +7,39 @@ Now includes OpenAI ChatGPT integration for real conversations
 
 import os
 import time
-import tempfile
 import base64
 import subprocess
+import signal
+import socket
+import shutil
 import json
 import re
+import hashlib
+import gzip
 import asyncio
 import aiohttp
+from aiohttp import web
 import struct
+from array import array
+import sqlite3
+import queue
+import threading
 from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse, parse_qs
+from urllib.parse import urlparse, parse_qs, quote
 from threading import Thread
 import io
 import requests  # Keep requests for fallback
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from openai import OpenAI
 from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from contextlib import contextmanager
+from types import MappingProxyType
 from enum import Enum
+from collections import OrderedDict, deque
+from itertools import takewhile
+from concurrent.futures import ThreadPoolExecutor
 
 # Load environment variables from .env file
 try:
@@ -35,6 +51,11 @@ except ImportError:
 except Exception as e:
     print(f"⚠️ Could not load .env file: {e}")
 
+try:
+    import brotli  # Optional - adds a br variant for the HTML interfaces
+except ImportError:
+    brotli = None
+
 # API Keys Configuration - Load from environment variables
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 EXA_API_KEY = os.getenv('EXA_API_KEY') 
@@ -55,6 +76,8 @@ MODEL_ID = os.getenv('MODEL_ID', 'yqv0epjw')  # Default to your deployment ID
 ORPHEUS_ENDPOINT = f"https://model-{MODEL_ID}.api.baseten.co/environments/production/predict"
 ORPHEUS_STREAM_ENDPOINT = f"https://model-{MODEL_ID}.api.baseten.co/environments/production/predict_stream"
 ORPHEUS_SAMPLE_RATE = 24000
+OPENAI_CHAT_URL = "https://api.openai.com/v1/chat/completions"
+OPENAI_SPEECH_URL = "https://api.openai.com/v1/audio/speech"
 
 # FORCE ORPHEUS ACTIVE - NO FALLBACKS
 ORPHEUS_DEPLOYMENT_STATUS = "ACTIVE"  # FORCE ACTIVE
@@ -70,6 +93,91 @@ MAX_CONCURRENT_STREAMS = 8  # Based on Baseten's 16+ stream support
 TARGET_TOKENS_PER_SEC = 83  # Baseten's real-time target
 REQUEST_TIMEOUT = 45  # Extended timeout for quality
 CONNECTION_POOL_SIZE = 10
+UPSTREAM_RETRIES = int(os.getenv('UPSTREAM_RETRIES', 2))  # Retries for connection failures and 502/503/504
+UPSTREAM_BACKOFF_FACTOR = float(os.getenv('UPSTREAM_BACKOFF_FACTOR', 0.3))  # Exponential backoff between retries
+
+# Audio cache - repeated synthesis requests skip Baseten entirely
+AUDIO_CACHE_ENABLED = os.getenv('AUDIO_CACHE_ENABLED', 'true').lower() == 'true'
+AUDIO_CACHE_DIR = os.getenv('AUDIO_CACHE_DIR', 'generated_audio')
+AUDIO_CACHE_MEMORY_MB = int(os.getenv('AUDIO_CACHE_MEMORY_MB', 64))  # In-memory LRU byte budget
+AUDIO_CACHE_DISK_MB = int(os.getenv('AUDIO_CACHE_DISK_MB', 512))  # On-disk tier byte budget
+
+# Pre-rendered audio library - archetype sample lines rendered ahead of time (see prerender_audio_library.py)
+AUDIO_LIBRARY_ENABLED = os.getenv('AUDIO_LIBRARY_ENABLED', 'true').lower() == 'true'
+AUDIO_LIBRARY_DIR = os.getenv('AUDIO_LIBRARY_DIR', 'audio_library')
+AUDIO_LIBRARY_PIPELINE_VERSION = 1  # Bump when WAV assembly changes without changing the Orpheus request
+
+# Server concurrency - bounded worker pool instead of one request at a time
+SERVER_MODE = os.getenv('SERVER_MODE', 'threadpool')  # 'threadpool', 'prefork', 'asyncio' or 'single'
+SERVER_PROCESSES = int(os.getenv('SERVER_PROCESSES', os.cpu_count() or 1))  # Worker processes for SERVER_MODE=prefork
+SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', 16))  # Worker threads handling requests
+SERVER_QUEUE_SIZE = int(os.getenv('SERVER_QUEUE_SIZE', 64))  # Pending connections before 503
+ORPHEUS_SLOT_TIMEOUT = float(os.getenv('ORPHEUS_SLOT_TIMEOUT', 30))  # Max wait for a free Orpheus stream
+ASYNC_CONNECTION_LIMIT = int(os.getenv('ASYNC_CONNECTION_LIMIT', 200))  # Upstream connections for SERVER_MODE=asyncio
+ASYNC_PIPELINE_WORKERS = int(os.getenv('ASYNC_PIPELINE_WORKERS', 16))  # Pipelined conversations stepped at once for SERVER_MODE=asyncio
+
+# Upstream scheduling - live conversation goes ahead of manual generation, which goes ahead of batch work
+PRIORITY_CLASSES = ('conversation', 'generate', 'batch')  # Highest first
+PRIORITY_DEADLINES = {  # Seconds a request may wait for an Orpheus slot before it is dropped
+    'conversation': float(os.getenv('DEADLINE_CONVERSATION_SECONDS', 15)),
+    'generate': float(os.getenv('DEADLINE_GENERATE_SECONDS', ORPHEUS_SLOT_TIMEOUT)),
+    'batch': float(os.getenv('DEADLINE_BATCH_SECONDS', 600))
+}
+
+# Adaptive concurrency - MAX_CONCURRENT_STREAMS is only the starting limit, Baseten's latency moves it from there
+ADAPTIVE_CONCURRENCY_ENABLED = os.getenv('ADAPTIVE_CONCURRENCY_ENABLED', 'true').lower() == 'true'
+ADAPTIVE_CONCURRENCY_MIN = int(os.getenv('ADAPTIVE_CONCURRENCY_MIN', 1))
+ADAPTIVE_CONCURRENCY_MAX = int(os.getenv('ADAPTIVE_CONCURRENCY_MAX', 32))
+ADAPTIVE_LATENCY_TOLERANCE = float(os.getenv('ADAPTIVE_LATENCY_TOLERANCE', 1.5))  # Back off when generation is this much slower than baseline
+ADAPTIVE_BACKOFF_RATIO = float(os.getenv('ADAPTIVE_BACKOFF_RATIO', 0.75))  # Multiplicative decrease on overload
+
+# Circuit breaker - a sleeping or failing deployment sends requests straight to the OpenAI fallback
+CIRCUIT_BREAKER_ENABLED = os.getenv('CIRCUIT_BREAKER_ENABLED', 'true').lower() == 'true'
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', 3))  # Consecutive timeouts/5xx before opening
+CIRCUIT_OPEN_SECONDS = float(os.getenv('CIRCUIT_OPEN_SECONDS', 30))  # Wait between trial requests while open
+
+# Hedged requests - a second TTS request is fired when the first runs past the voice's p90
+HEDGING_ENABLED = os.getenv('HEDGING_ENABLED', 'false').lower() == 'true'
+HEDGE_TARGET = os.getenv('HEDGE_TARGET', 'orpheus')  # 'orpheus' (same request again) or 'fallback' (OpenAI TTS)
+HEDGE_MAX_PERCENT = float(os.getenv('HEDGE_MAX_PERCENT', 5))  # Hedges allowed per 100 eligible requests
+HEDGE_MIN_DELAY = float(os.getenv('HEDGE_MIN_DELAY', 1.0))  # Never hedge sooner than this, whatever the p90
+HEDGE_MIN_SAMPLES = int(os.getenv('HEDGE_MIN_SAMPLES', 20))  # Generation times a voice needs before its p90 is used
+AUDIO_RESPONSE_FORMATS = ('json', 'binary', 'multipart')  # Per-request via response_format or Accept
+
+# Adaptive max_tokens estimation
+ORPHEUS_TOKENS_PER_AUDIO_SECOND = 7 * ORPHEUS_SAMPLE_RATE / 2048  # 7 SNAC tokens per 2048-sample frame (~82/s)
+MAX_TOKENS_MODEL_PATH = os.getenv('MAX_TOKENS_MODEL_PATH', os.path.join(AUDIO_CACHE_DIR, 'max_tokens_model.json'))  # Fitted per-voice models, loaded at server startup
+MAX_TOKENS_MIN_SAMPLES = int(os.getenv('MAX_TOKENS_MIN_SAMPLES', 5))  # Observations before the model replaces the heuristic
+MAX_TOKENS_SAFETY_MARGIN = float(os.getenv('MAX_TOKENS_SAFETY_MARGIN', 1.2))  # Multiplier on the upper rate estimate
+
+# Long-form synthesis
+LONG_FORM_SEGMENT_CHARS = int(os.getenv('LONG_FORM_SEGMENT_CHARS', 300))  # Target prompt length per Orpheus segment
+LONG_FORM_AUTO_CHARS = int(os.getenv('LONG_FORM_AUTO_CHARS', 0))  # /generate switches to long-form above this (0 = only on request)
+LONG_FORM_CROSSFADE_MS = int(os.getenv('LONG_FORM_CROSSFADE_MS', 25))  # Overlap between neighbouring segments
+
+# Conversation session store
+SESSION_STORE_BACKEND = os.getenv('SESSION_STORE_BACKEND', 'memory')  # 'memory' or 'sqlite'
+SESSION_STORE_PATH = os.getenv('SESSION_STORE_PATH', 'conversation_sessions.db')  # SQLite file, shareable between processes
+SESSION_TTL_SECONDS = int(os.getenv('SESSION_TTL_SECONDS', 3600))  # Idle sessions are dropped after this
+SESSION_MAX_SESSIONS = int(os.getenv('SESSION_MAX_SESSIONS', 10000))  # Least recently used sessions go first
+SESSION_MAX_MESSAGES = int(os.getenv('SESSION_MAX_MESSAGES', 50))  # Per-session history cap
+SESSION_MEMORY_MB = int(os.getenv('SESSION_MEMORY_MB', 32))  # Global budget for the in-memory backend
+EMOTION_PROFILE_MAX_USERS = int(os.getenv('EMOTION_PROFILE_MAX_USERS', 10000))  # LRU bound on emotional profiles
+
+# Sentence-pipelined conversation settings
+PIPELINE_TTS_PARALLELISM = int(os.getenv('PIPELINE_TTS_PARALLELISM', 3))  # Sentences synthesised at once per conversation
+PIPELINE_MIN_SENTENCE_CHARS = int(os.getenv('PIPELINE_MIN_SENTENCE_CHARS', 20))  # Merge shorter sentences into the next one
+
+# HTML interface serving
+TEMPLATES_DIR = os.getenv('TEMPLATES_DIR', 'templates')
+TEMPLATES_RELOAD = os.getenv('TEMPLATES_RELOAD', 'false').lower() == 'true'  # Dev mode: re-read templates when their mtime changes
+
+# Compressed audio output (format field or Accept header: opus, flac, mp3)
+FFMPEG_PATH = os.getenv('FFMPEG_PATH', 'ffmpeg')
+AUDIO_ENCODE_WORKERS = int(os.getenv('AUDIO_ENCODE_WORKERS', 4))  # ffmpeg encodes running at once
+AUDIO_ENCODE_TIMEOUT = float(os.getenv('AUDIO_ENCODE_TIMEOUT', 20))  # Give up and send WAV after this
+AUDIO_OPUS_BITRATE = os.getenv('AUDIO_OPUS_BITRATE', '32k')  # Plenty for 24 kHz mono speech
+AUDIO_MP3_BITRATE = os.getenv('AUDIO_MP3_BITRATE', '64k')
 
 # Voice configurations - ORPHEUS FP8 & FP16 TESTING + ARCHETYPE VOICES
 VOICE_CONFIGS = {
@@ -982,918 +1090,4023 @@ VOICE_CONFIGS = {
 }
 
 # Global state for performance tracking
-active_streams = 0
-performance_metrics = {
-    'total_requests': 0,
-    'avg_generation_time': 0,
-    'tokens_per_second': 0,
-    'stream_success_rate': 0
-}
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+LATENCY_WINDOW_SIZE = 1024  # Recent samples kept per label set for p50/p95/p99
 
-# Conversation history storage
-conversation_sessions = {}
+class MetricsRegistry:
+    """
+    Thread-safe counters, gauges and latency histograms.
+    Every metric is keyed by name plus a label set (voice, precision, route...);
+    histograms keep Prometheus buckets and a window of recent samples for
+    percentiles. Exposed as JSON and Prometheus text at /metrics.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metadata = {}  # name -> (type, help)
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+    
+    def describe(self, name, metric_type, help_text):
+        self._metadata[name] = (metric_type, help_text)
+    
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+    
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+    
+    def set_gauge(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+    
+    def add_gauge(self, name, delta, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + delta
+    
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = {
+                    'buckets': [0] * len(LATENCY_BUCKETS),
+                    'count': 0,
+                    'sum': 0.0,
+                    'window': deque(maxlen=LATENCY_WINDOW_SIZE)
+                }
+                self._histograms[key] = histogram
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    histogram['buckets'][index] += 1
+                    break
+            histogram['count'] += 1
+            histogram['sum'] += value
+            histogram['window'].append(value)
+    
+    def counter_total(self, name):
+        """Sum of a counter over all label sets"""
+        with self._lock:
+            return sum(value for (metric, _), value in self._counters.items() if metric == name)
+    
+    def gauge_total(self, name):
+        with self._lock:
+            return sum(value for (metric, _), value in self._gauges.items() if metric == name)
+    
+    def histogram_totals(self, name):
+        """(count, sum) of a histogram over all label sets"""
+        with self._lock:
+            count = total = 0
+            for (metric, _), histogram in self._histograms.items():
+                if metric == name:
+                    count += histogram['count']
+                    total += histogram['sum']
+            return count, total
+    
+    @staticmethod
+    def _percentile(ordered, fraction):
+        return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+    
+    def percentile(self, name, fraction, min_samples=1, **labels):
+        """Percentile over one label set's recent window, or None with fewer than min_samples"""
+        with self._lock:
+            histogram = self._histograms.get(self._key(name, labels))
+            window = list(histogram['window']) if histogram is not None else []
+        if len(window) < max(1, min_samples):
+            return None
+        return self._percentile(sorted(window), fraction)
+    
+    def snapshot(self):
+        """JSON view: counters and gauges by label set, histograms with p50/p95/p99"""
+        with self._lock:
+            counters = [(key, value) for key, value in self._counters.items()]
+            gauges = [(key, value) for key, value in self._gauges.items()]
+            histograms = [(key, histogram['count'], histogram['sum'], sorted(histogram['window'])) for key, histogram in self._histograms.items()]
+        
+        view = {'counters': {}, 'gauges': {}, 'histograms': {}}
+        for section, entries in (('counters', counters), ('gauges', gauges)):
+            for (name, labels), value in entries:
+                view[section].setdefault(name, []).append({'labels': dict(labels), 'value': value})
+        for (name, labels), count, total, ordered in histograms:
+            entry = {'labels': dict(labels), 'count': count, 'avg': round(total / count, 4) if count else 0}
+            if ordered:
+                entry.update({
+                    'p50': round(self._percentile(ordered, 0.50), 4),
+                    'p95': round(self._percentile(ordered, 0.95), 4),
+                    'p99': round(self._percentile(ordered, 0.99), 4)
+                })
+            view['histograms'].setdefault(name, []).append(entry)
+        return view
+    
+    @staticmethod
+    def _format_labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ''
+        escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+        return '{' + ','.join(f'{label}="{value}"' for (label, _), value in zip(pairs, escaped)) + '}'
+    
+    def render_prometheus(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            series = {}
+            types = {}
+            for metric_type, values in (('counter', self._counters), ('gauge', self._gauges)):
+                for (name, labels), value in values.items():
+                    types[name] = metric_type
+                    series.setdefault(name, []).append(f'{name}{self._format_labels(labels)} {value}')
+            for (name, labels), histogram in self._histograms.items():
+                types[name] = 'histogram'
+                lines = series.setdefault(name, [])
+                cumulative = 0
+                for bound, bucket_count in zip(LATENCY_BUCKETS, histogram['buckets']):
+                    cumulative += bucket_count
+                    lines.append(f'{name}_bucket{self._format_labels(labels, [("le", bound)])} {cumulative}')
+                lines.append(f'{name}_bucket{self._format_labels(labels, [("le", "+Inf")])} {histogram["count"]}')
+                lines.append(f'{name}_sum{self._format_labels(labels)} {histogram["sum"]}')
+                lines.append(f'{name}_count{self._format_labels(labels)} {histogram["count"]}')
+        
+        output = []
+        for name in sorted(series):
+            metric_type, help_text = self._metadata.get(name, (types[name], name.replace('_', ' ')))
+            output.append(f'# HELP {name} {help_text}')
+            output.append(f'# TYPE {name} {metric_type}')
+            output.extend(series[name])
+        return '\n'.join(output) + '\n'
 
-# Set up OpenAI client with the provided API key
-openai_client = None
-if OPENAI_API_KEY:
-    try:
-        openai_client = OpenAI(api_key=OPENAI_API_KEY)
-        print("🤖 OpenAI client initialized successfully")
-    except Exception as e:
-        print(f"❌ Failed to initialize OpenAI client: {e}")
-        openai_client = None
-else:
-    print("❌ OpenAI client not initialized - no API key found")
+metrics = MetricsRegistry()
+metrics.describe('orpheus_requests_total', 'counter', 'Orpheus syntheses that reached Baseten')
+metrics.describe('orpheus_estimated_tokens_total', 'counter', 'Estimated audio tokens generated by Orpheus')
+metrics.describe('orpheus_generation_seconds', 'histogram', 'Orpheus synthesis latency by voice and precision')
+metrics.describe('orpheus_time_to_first_audio_seconds', 'histogram', 'Time to the first streamed audio chunk by voice')
+metrics.describe('orpheus_active_streams', 'gauge', 'Orpheus syntheses in flight')
+metrics.describe('chat_time_to_first_token_seconds', 'histogram', 'Time to the first streamed ChatGPT token')
+metrics.describe('tts_fallback_total', 'counter', 'Requests served by the OpenAI TTS fallback')
+metrics.describe('max_tokens_estimate_error_ratio', 'histogram', 'Relative error of the predicted audio duration by voice')
+metrics.describe('max_tokens_truncations_total', 'counter', 'Syntheses that used at least 95% of their max_tokens')
+metrics.describe('audio_encode_seconds', 'histogram', 'Time to encode WAV audio into a compressed format by codec')
+metrics.describe('audio_encode_total', 'counter', 'Compressed audio encodes by codec and outcome')
+metrics.describe('audio_encode_bytes_saved_total', 'counter', 'Response bytes saved by compressing WAV audio by codec')
+metrics.describe('audio_library_lookups_total', 'counter', 'Pre-rendered audio library lookups by outcome (hit, miss, stale)')
+metrics.describe('orpheus_queue_wait_seconds', 'histogram', 'Time spent waiting for an Orpheus slot by priority class')
+metrics.describe('orpheus_queue_depth', 'gauge', 'Requests queued for an Orpheus slot by priority class')
+metrics.describe('orpheus_requests_dropped_total', 'counter', 'Queued Orpheus requests dropped by priority class and reason')
+metrics.describe('orpheus_concurrency_limit', 'gauge', 'Current adaptive limit on concurrent Orpheus calls')
+metrics.describe('orpheus_concurrency_limit_changes_total', 'counter', 'Adaptive concurrency limit changes by direction')
+metrics.describe('circuit_state', 'gauge', 'Circuit breaker state (1 for the current state) by circuit')
+metrics.describe('circuit_transitions_total', 'counter', 'Circuit breaker state transitions by circuit')
+metrics.describe('circuit_open_seconds_total', 'counter', 'Seconds a circuit spent open or half-open before closing again')
+metrics.describe('circuit_short_circuits_total', 'counter', 'Requests sent straight to the fallback because the circuit was open')
+metrics.describe('tts_hedges_total', 'counter', 'Hedged TTS requests by target and outcome (won, lost, throttled)')
+metrics.describe('http_request_duration_seconds', 'histogram', 'HTTP request latency by route, method and status')
 
-# Emotional Analysis Components
-class EmotionalState(Enum):
-    JOYFUL = "joyful"
-    SAD = "sad"
-    ANGRY = "angry"
-    EXCITED = "excited"
-    FRUSTRATED = "frustrated"
-    CALM = "calm"
-    WORRIED = "worried"
-    SURPRISED = "surprised"
-    CONFIDENT = "confident"
-    EMPATHETIC = "empathetic"
+# Known paths become the route label; anything else is 'other' to keep label cardinality bounded
+METRICS_ROUTES = frozenset([
+    '/', '/health', '/voices', '/metrics', '/archetypes', '/archetype-tester', '/debug',
+    '/generate', '/generate/stream', '/conversation/respond', '/conversation/respond/stream',
+    '/conversation/respond_emotional', '/conversation/clear', '/conversation/history'
+])
 
-class EmotionalIntensity(Enum):
-    LOW = 0.3
-    MEDIUM = 0.6
-    HIGH = 0.9
+def metrics_route_label(path):
+    return path if path in METRICS_ROUTES else 'other'
 
-@dataclass
-class EmotionalContext:
-    primary_emotion: EmotionalState
-    intensity: float
-    confidence: float
-    triggers: List[str]
-    context_words: List[str]
+def wants_prometheus_metrics(query, accept_header):
+    """Prometheus text for ?format=prometheus or a scraper's Accept header, JSON otherwise"""
+    if query.get('format', [''])[0] == 'prometheus':
+        return True
+    accept = (accept_header or '').lower()
+    return 'openmetrics' in accept or accept.startswith('text/plain')
 
-@dataclass
-class UserEmotionalProfile:
-    current_emotion: EmotionalState
-    emotion_history: List[EmotionalContext]
-    conversation_sentiment_trend: float
-    emotional_volatility: float
-    preferred_response_style: str
+def render_prometheus_metrics(server_stats):
+    """Refresh point-in-time gauges (server, caches, sessions) and render the registry"""
+    for prefix, stats in (
+        ('server', server_stats),
+        ('audio_cache', audio_cache.get_stats()),
+        ('tts_coalescing', orpheus_single_flight.get_stats()),
+        ('conversation', conversation_sessions.get_stats())
+    ):
+        for name, value in stats.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                metrics.set_gauge(f'{prefix}_{name}', value)
+    return metrics.render_prometheus()
 
-class EmotionalIntelligenceEngine:
+def performance_metrics_snapshot():
+    """Backward-compatible performance summary derived from the metrics registry"""
+    total_requests, generation_seconds = metrics.histogram_totals('orpheus_generation_seconds')
+    streaming_requests, first_audio_seconds = metrics.histogram_totals('orpheus_time_to_first_audio_seconds')
+    streamed_chat_requests, first_token_seconds = metrics.histogram_totals('chat_time_to_first_token_seconds')
+    return {
+        'total_requests': total_requests,
+        'avg_generation_time': generation_seconds / total_requests if total_requests else 0,
+        'tokens_per_second': metrics.counter_total('orpheus_estimated_tokens_total') / generation_seconds if generation_seconds else 0,
+        'stream_success_rate': 0,
+        'streaming_requests': streaming_requests,
+        'avg_time_to_first_audio': first_audio_seconds / streaming_requests if streaming_requests else 0,
+        'streamed_chat_requests': streamed_chat_requests,
+        'avg_time_to_first_token': first_token_seconds / streamed_chat_requests if streamed_chat_requests else 0
+    }
+
+def request_deadline(data, priority, start_time=None):
+    """Absolute dispatch deadline from request arrival: the class budget, tightened by an optional deadline_ms body field"""
+    budget = PRIORITY_DEADLINES[priority]
+    try:
+        requested = float(data.get('deadline_ms')) / 1000
+    except (TypeError, ValueError):
+        requested = None
+    if requested is not None and requested > 0:
+        budget = min(budget, requested)
+    return (start_time if start_time is not None else time.time()) + budget
+
+def request_priority(data, default='generate'):
+    """Priority class for a /generate body - clients may only lower it (e.g. 'batch' for prefetching)"""
+    requested = data.get('priority')
+    if requested in PRIORITY_CLASSES and PRIORITY_CLASSES.index(requested) > PRIORITY_CLASSES.index(default):
+        return requested
+    return default
+
+class CallCancellation:
     """
-    Advanced emotional intelligence engine that analyzes user input
-    and generates appropriate emotional responses
+    Handle for abandoning a blocking upstream call from another thread. The
+    call registers how to interrupt whatever it is blocked on (its queue wait,
+    its streamed response); cancel() runs those callbacks once.
     """
     
     def __init__(self):
-        self.emotion_keywords = {
-            EmotionalState.JOYFUL: ['happy', 'excited', 'great', 'awesome', 'wonderful', 'love', 'amazing', 'fantastic', 'thrilled', 'delighted'],
-            EmotionalState.SAD: ['sad', 'upset', 'down', 'depressed', 'disappointed', 'hurt', 'lonely', 'miserable', 'unhappy'],
-            EmotionalState.ANGRY: ['angry', 'mad', 'furious', 'annoyed', 'irritated', 'frustrated', 'pissed', 'rage', 'outraged'],
-            EmotionalState.EXCITED: ['excited', 'pumped', 'energetic', 'enthusiastic', 'eager', 'thrilled', 'hyped', 'stoked'],
-            EmotionalState.FRUSTRATED: ['frustrated', 'annoyed', 'stuck', 'blocked', 'irritated', 'fed up', 'exasperated'],
-            EmotionalState.CALM: ['calm', 'peaceful', 'relaxed', 'serene', 'tranquil', 'composed', 'zen', 'centered'],
-            EmotionalState.WORRIED: ['worried', 'anxious', 'concerned', 'nervous', 'stressed', 'troubled', 'uneasy'],
-            EmotionalState.SURPRISED: ['surprised', 'shocked', 'amazed', 'astonished', 'stunned', 'wow', 'incredible'],
-            EmotionalState.CONFIDENT: ['confident', 'sure', 'certain', 'determined', 'strong', 'capable', 'ready'],
-            EmotionalState.EMPATHETIC: ['understand', 'feel', 'sorry', 'empathize', 'relate', 'compassion', 'care']
-        }
-        
-        self.emotional_response_templates = {
-            EmotionalState.JOYFUL: {
-                'voice_tone': 'warm',
-                'response_style': 'enthusiastic and supportive',
-                'conversation_approach': 'share in the excitement, be encouraging'
-            },
-            EmotionalState.SAD: {
-                'voice_tone': 'gentle',
-                'response_style': 'compassionate and understanding',
-                'conversation_approach': 'offer comfort and support, validate feelings'
-            },
-            EmotionalState.ANGRY: {
-                'voice_tone': 'calm',
-                'response_style': 'patient and de-escalating',
-                'conversation_approach': 'acknowledge frustration, help find solutions'
-            },
-            EmotionalState.EXCITED: {
-                'voice_tone': 'energetic',
-                'response_style': 'match energy level, build on excitement',
-                'conversation_approach': 'match energy level, build on excitement'
-            },
-            EmotionalState.FRUSTRATED: {
-                'voice_tone': 'patient',
-                'response_style': 'helpful problem-solving approach',
-                'conversation_approach': 'focus on solutions, break down problems'
-            },
-            EmotionalState.CALM: {
-                'voice_tone': 'neutral',
-                'response_style': 'balanced and informative',
-                'conversation_approach': 'respond naturally and supportively'
-            },
-            EmotionalState.WORRIED: {
-                'voice_tone': 'reassuring',
-                'response_style': 'calming and supportive',
-                'conversation_approach': 'provide reassurance, offer practical help'
-            },
-            EmotionalState.SURPRISED: {
-                'voice_tone': 'engaged',
-                'response_style': 'curious and responsive',
-                'conversation_approach': 'explore the surprise, ask follow-up questions'
-            },
-            EmotionalState.CONFIDENT: {
-                'voice_tone': 'assured',
-                'response_style': 'supportive, reinforce positive feelings',
-                'conversation_approach': 'be supportive, reinforce positive feelings'
-            },
-            EmotionalState.EMPATHETIC: {
-                'voice_tone': 'warm',
-                'response_style': 'understanding and connecting',
-                'conversation_approach': 'validate emotions, create connection'
-            }
-        }
-        
-        self.user_profiles = {}
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self.cancelled = False
     
-    def analyze_user_emotion(self, text: str, user_id: str = "default") -> EmotionalContext:
-        """Analyze emotional content of user input"""
-        text_lower = text.lower()
-        
-        # Score each emotion based on keyword presence
-        emotion_scores = {}
-        for emotion, keywords in self.emotion_keywords.items():
-            score = sum(1 for keyword in keywords if keyword in text_lower)
-            if score > 0:
-                emotion_scores[emotion] = score
+    def on_cancel(self, callback):
+        """Run callback on cancel() - False (and not registered) if the call is already cancelled"""
+        with self._lock:
+            if self.cancelled:
+                return False
+            self._callbacks.append(callback)
+            return True
+    
+    def cancel(self):
+        with self._lock:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
 
-        # Default to calm if no strong emotions detected
-        if not emotion_scores:
-            primary_emotion = EmotionalState.CALM
-            intensity = 0.2
-            confidence = 0.7
+class SchedulerWaiter:
+    """One queued request: its class, deadline and how to wake it (thread event or asyncio future)"""
+    
+    __slots__ = ('priority', 'deadline', 'enqueued_at', 'outcome', 'event', 'loop', 'future')
+    
+    def __init__(self, priority, deadline, loop=None):
+        self.priority = priority
+        self.deadline = deadline
+        self.enqueued_at = time.time()
+        self.outcome = None  # 'granted' or 'expired' once dispatched, 'abandoned' if the deadline ran out first
+        self.loop = loop
+        self.event = threading.Event() if loop is None else None
+        self.future = loop.create_future() if loop is not None else None
+    
+    def wake(self):
+        if self.loop is None:
+            self.event.set()
         else:
-            # Find dominant emotion
-            primary_emotion = max(emotion_scores, key=emotion_scores.get)
-            max_score = emotion_scores[primary_emotion]
-            
-            # Calculate intensity and confidence
-            intensity = min(max_score * 0.3, 1.0)
-            confidence = min(max_score * 0.2 + 0.5, 1.0)
-
-        # Extract context triggers
-        triggers = []
-        context_words = []
-        
-        for emotion, keywords in self.emotion_keywords.items():
-            found_words = [word for word in keywords if word in text_lower]
-            if found_words:
-                triggers.extend(found_words)
-                if emotion == primary_emotion:
-                    context_words = found_words
-
-        return EmotionalContext(
-            primary_emotion=primary_emotion,
-            intensity=intensity,
-            confidence=confidence,
-            triggers=triggers,
-            context_words=context_words
-        )
+            self.loop.call_soon_threadsafe(self._resolve_future)
+    
+    def _resolve_future(self):
+        if not self.future.done():
+            self.future.set_result(self.outcome)
 
-    def generate_emotionally_aware_response(self, user_input: str, user_id: str = "default") -> Dict:
-        """Generate emotionally aware response configuration"""
-        
-        # Analyze user's emotional state
-        emotional_context = self.analyze_user_emotion(user_input, user_id)
-        
-        # Get or create user profile
-        if user_id not in self.user_profiles:
-            self.user_profiles[user_id] = UserEmotionalProfile(
-                current_emotion=emotional_context.primary_emotion,
-                emotion_history=[],
-                conversation_sentiment_trend=0.0,
-                emotional_volatility=0.0,
-                preferred_response_style="balanced"
-            )
-        
-        profile = self.user_profiles[user_id]
-        profile.emotion_history.append(emotional_context)
-        profile.current_emotion = emotional_context.primary_emotion
-        
-        # Keep history manageable
-        if len(profile.emotion_history) > 10:
-            profile.emotion_history = profile.emotion_history[-10:]
-        
-        # Get response configuration
-        response_config = self.emotional_response_templates[emotional_context.primary_emotion]
-        
+class UpstreamScheduler:
+    """
+    Priority queue in front of the Baseten client. A request either takes a
+    free Orpheus slot straight away or waits in its class queue; freed slots go
+    to the highest class first, oldest request first within a class. Requests
+    whose deadline passes while queued are dropped before dispatch. Thread and
+    asyncio callers share the same slots.
+    """
+    
+    def __init__(self, limit=MAX_CONCURRENT_STREAMS):
+        self.limit = limit
+        self.active = 0
+        self._lock = threading.Lock()
+        self._queues = {priority: deque() for priority in PRIORITY_CLASSES}
+    
+    def _enqueue(self, waiter):
+        # Caller holds the lock
+        self._queues[waiter.priority].append(waiter)
+        metrics.add_gauge('orpheus_queue_depth', 1, priority=waiter.priority)
+        self._dispatch()
+        return waiter.outcome
+    
+    def _grant(self, waiter):
+        # Caller holds the lock
+        self.active += 1
+        waiter.outcome = 'granted'
+        metrics.observe('orpheus_queue_wait_seconds', time.time() - waiter.enqueued_at, priority=waiter.priority)
+    
+    def _dispatch(self):
+        # Caller holds the lock
+        now = time.time()
+        for priority in PRIORITY_CLASSES:
+            queue_for_class = self._queues[priority]
+            while queue_for_class and self.active < self.limit:
+                waiter = queue_for_class.popleft()
+                metrics.add_gauge('orpheus_queue_depth', -1, priority=priority)
+                if waiter.outcome == 'abandoned':
+                    continue
+                if waiter.deadline <= now:
+                    waiter.outcome = 'expired'
+                    metrics.inc('orpheus_requests_dropped_total', priority=priority, reason='expired')
+                else:
+                    self._grant(waiter)
+                waiter.wake()
+    
+    def _give_up(self, waiter, reason='expired'):
+        """Settle a waiter whose deadline ran out or whose caller went away - a grant that raced in still wins"""
+        with self._lock:
+            if waiter.outcome is not None:
+                return waiter.outcome
+            waiter.outcome = 'abandoned'
+        metrics.inc('orpheus_requests_dropped_total', priority=waiter.priority, reason=reason)
+        return 'expired'
+    
+    @staticmethod
+    def _deadline(priority, deadline):
+        return deadline if deadline is not None else time.time() + PRIORITY_DEADLINES[priority]
+    
+    def acquire(self, priority='generate', deadline=None, cancellation=None):
+        """
+        Wait for a slot until the deadline (default: the class budget) -
+        'granted' (call release()) or 'expired'. A CallCancellation stops the
+        wait early; check cancellation.cancelled to tell that apart from expiry.
+        """
+        waiter = SchedulerWaiter(priority, self._deadline(priority, deadline))
+        with self._lock:
+            outcome = self._enqueue(waiter)
+        if outcome is not None:
+            return outcome
+        if cancellation is not None and not cancellation.on_cancel(waiter.event.set):
+            waiter.event.set()
+        waiter.event.wait(max(0.0, waiter.deadline - time.time()))
+        return self._give_up(waiter, 'cancelled' if cancellation is not None and cancellation.cancelled else 'expired')
+    
+    async def acquire_async(self, priority='generate', deadline=None):
+        """acquire() for coroutines - waits on a future instead of blocking the event loop"""
+        waiter = SchedulerWaiter(priority, self._deadline(priority, deadline), loop=asyncio.get_running_loop())
+        with self._lock:
+            outcome = self._enqueue(waiter)
+        if outcome is not None:
+            return outcome
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), max(0.0, waiter.deadline - time.time()))
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            # Cancelled while queued (e.g. a hedge that lost) - hand back a slot granted in the meantime
+            if self._give_up(waiter, 'cancelled') == 'granted':
+                self.release()
+            raise
+        return self._give_up(waiter)
+    
+    def release(self):
+        with self._lock:
+            self.active -= 1
+            self._dispatch()
+    
+    def set_limit(self, limit):
+        """Change the slot count - a raised limit dispatches queued requests straight away, a lowered one lets in-flight calls drain"""
+        with self._lock:
+            self.limit = limit
+            self._dispatch()
+    
+    def demand(self):
+        """Calls in flight plus requests queued for a slot"""
+        with self._lock:
+            return self.active + sum(len(waiters) for waiters in self._queues.values())
+    
+    @contextmanager
+    def slot(self, priority='generate', deadline=None):
+        """with scheduler.slot(...) as outcome: - the slot is released on exit if it was granted"""
+        outcome = self.acquire(priority, deadline)
+        try:
+            yield outcome
+        finally:
+            if outcome == 'granted':
+                self.release()
+    
+    def get_stats(self):
+        with self._lock:
+            queued = {priority: sum(1 for waiter in waiters if waiter.outcome is None) for priority, waiters in self._queues.items()}
+            active = self.active
         return {
-            'detected_emotion': emotional_context.primary_emotion.value,
-            'emotion_intensity': emotional_context.intensity,
-            'confidence': emotional_context.confidence,
-            'voice_tone': response_config['voice_tone'],
-            'response_style': response_config['response_style'],
-            'conversation_approach': response_config['conversation_approach'],
-            'emotional_subtext': f"{emotional_context.primary_emotion.value} state",
-            'response_suggestion': "respond helpfully",
-            'user_profile': {
-                'current_emotion': profile.current_emotion.value,
-                'sentiment_trend': profile.conversation_sentiment_trend,
-                'emotional_volatility': profile.emotional_volatility
-            }
+            'limit': self.limit,
+            'active': active,
+            'queued': queued,
+            'deadlines': PRIORITY_DEADLINES
         }
 
-# Global emotional intelligence engine
-emotional_engine = EmotionalIntelligenceEngine()
+# Caps in-flight Orpheus calls (starting at MAX_CONCURRENT_STREAMS) and orders the queue by priority class
+orpheus_scheduler = UpstreamScheduler(MAX_CONCURRENT_STREAMS)
 
-def generate_fast_chatgpt_response(user_input: str, session_id: str = "default") -> str:
+class AdaptiveConcurrencyLimit:
     """
-    SPEED OPTIMIZED: Fast ChatGPT response without heavy emotional processing
-    Target: <3 seconds total response time
+    AIMD controller for the scheduler's slot count. Every finished Orpheus call
+    reports its latency per second of audio generated (so long and short clips
+    compare). Once per window of calls, the window average is compared with the
+    best average seen: within ADAPTIVE_LATENCY_TOLERANCE and with every slot in
+    use, the limit grows by one; slower than that, or any timeout/5xx/429, and
+    it shrinks by ADAPTIVE_BACKOFF_RATIO. Calls that started before the last
+    decrease are ignored so one overload burst only backs off once.
     """
-    if not OPENAI_API_KEY:
-        return "I'm here to help! What can I do for you?"
     
-    try:
-        # Get conversation history for context
-        if session_id not in conversation_sessions:
-            conversation_sessions[session_id] = []
-        
-        conversation_history = conversation_sessions[session_id]
-        
-        # Build simple, fast prompt - no complex emotional analysis
-        messages = [
-            {"role": "system", "content": "You are a helpful, friendly AI assistant. Keep responses concise and natural. Respond in 1-2 sentences when possible."}
-        ]
-        
-        # Add recent context (last 3 exchanges only for speed)
-        recent_history = conversation_history[-6:] if len(conversation_history) > 6 else conversation_history
-        for msg in recent_history:
-            if msg.get("user"):
-                messages.append({"role": "user", "content": msg["user"]})
-            if msg.get("assistant"):
-                messages.append({"role": "assistant", "content": msg["assistant"]})
-        
-        # Add current user input
-        messages.append({"role": "user", "content": user_input})
-        
-        # Fast ChatGPT call with speed optimizations
-        headers = {
-            "Authorization": f"Bearer {OPENAI_API_KEY}",
-            "Content-Type": "application/json"
-        }
+    def __init__(self, scheduler, min_limit=ADAPTIVE_CONCURRENCY_MIN, max_limit=ADAPTIVE_CONCURRENCY_MAX,
+                 tolerance=ADAPTIVE_LATENCY_TOLERANCE, backoff_ratio=ADAPTIVE_BACKOFF_RATIO, enabled=ADAPTIVE_CONCURRENCY_ENABLED):
+        self.scheduler = scheduler
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.tolerance = tolerance
+        self.backoff_ratio = backoff_ratio
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._window = []
+        self._saturated = False
+        self._baseline = None
+        self._last_decrease = 0.0
+        self.history = deque(maxlen=50)
+        self.history.append({'timestamp': time.time(), 'limit': scheduler.limit, 'reason': 'initial'})
+        metrics.set_gauge('orpheus_concurrency_limit', scheduler.limit)
+    
+    def record(self, started_at, status_code, audio_bytes=0, upstream_seconds=None):
+        """
+        One finished upstream call: status_code is None when the connection or
+        read failed. upstream_seconds, if given, replaces the time since
+        started_at (a stream excludes the time its consumer held each chunk).
+        """
+        if not self.enabled or started_at < self._last_decrease:
+            return
         
-        payload = {
-            "model": "gpt-3.5-turbo",  # Faster than GPT-4
-            "messages": messages,
-            "max_tokens": 150,  # Limit response length for speed
-            "temperature": 0.7
-        }
+        overloaded = status_code is None or status_code >= 500 or status_code == 429
+        if not overloaded and (status_code != 200 or not audio_bytes):
+            return  # Client errors and empty clips say nothing about upstream load
         
-        response = requests.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers=headers,
-            json=payload,
-            timeout=6  # 6 second total timeout
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            ai_response = data['choices'][0]['message']['content'].strip()
-            
-            # Update conversation history (keep last 10 exchanges only)
-            conversation_sessions[session_id].append({
-                "user": user_input,
-                "assistant": ai_response,
-                "timestamp": time.time()
-            })
+        with self._lock:
+            if started_at < self._last_decrease:
+                return
+            if overloaded:
+                self._change(self.scheduler.limit * self.backoff_ratio, 'upstream error' if status_code else 'upstream timeout')
+                return
             
-            # Keep history manageable for speed
-            if len(conversation_sessions[session_id]) > 10:
-                conversation_sessions[session_id] = conversation_sessions[session_id][-10:]
+            audio_seconds = audio_bytes / (ORPHEUS_SAMPLE_RATE * 2)
+            if upstream_seconds is None:
+                upstream_seconds = time.time() - started_at
+            self._window.append(upstream_seconds / audio_seconds)
+            self._saturated = self._saturated or self.scheduler.demand() + 1 >= self.scheduler.limit
+            if len(self._window) < max(5, self.scheduler.limit):
+                return
             
-            return ai_response
-        else:
-            print(f"❌ ChatGPT API Error: {response.status_code} - {response.text}")
-            return "I'm here to help! What would you like to know?"
-        
-    except requests.exceptions.Timeout:
-        return "I'm thinking as fast as I can! Could you try again?"
-    except Exception as e:
-        print(f"⚡ Fast ChatGPT error: {e}")
-        return "I'm here to help! What can I do for you?"
+            latency = sum(self._window) / len(self._window)
+            # The baseline creeps towards slower windows so a permanently slower deployment is re-learned
+            self._baseline = latency if self._baseline is None else min(latency, self._baseline + (latency - self._baseline) * 0.01)
+            if latency > self._baseline * self.tolerance:
+                self._change(self.scheduler.limit * self.backoff_ratio, f'latency {latency:.2f}s/s over baseline {self._baseline:.2f}s/s')
+            elif self._saturated:
+                self._change(self.scheduler.limit + 1, f'latency {latency:.2f}s/s within baseline')
+            self._window = []
+            self._saturated = False
+    
+    def _change(self, limit, reason):
+        # Caller holds the lock
+        limit = max(self.min_limit, min(self.max_limit, int(limit)))
+        previous = self.scheduler.limit
+        if limit == previous:
+            return
+        if limit < previous:
+            self._last_decrease = time.time()
+            self._window = []
+            self._saturated = False
+        self.scheduler.set_limit(limit)
+        self.history.append({'timestamp': time.time(), 'limit': limit, 'reason': reason})
+        metrics.set_gauge('orpheus_concurrency_limit', limit)
+        metrics.inc('orpheus_concurrency_limit_changes_total', direction='up' if limit > previous else 'down')
+        print(f"🎚️ Orpheus concurrency limit {previous} → {limit} ({reason})")
+    
+    def get_stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'limit': self.scheduler.limit,
+                'min_limit': self.min_limit,
+                'max_limit': self.max_limit,
+                'baseline_seconds_per_audio_second': self._baseline,
+                'window_samples': len(self._window),
+                'history': list(self.history)
+            }
+
+# Moves orpheus_scheduler.limit with observed Baseten latency
+orpheus_concurrency = AdaptiveConcurrencyLimit(orpheus_scheduler)
 
-def generate_emotionally_aware_chatgpt_response(user_input: str, session_id: str) -> str:
+class CircuitBreaker:
     """
-    Generate ChatGPT response that's emotionally aware and appropriate
+    Closed/open/half-open breaker in front of Baseten. A deactivated or
+    waking deployment opens it at once; timeouts and 5xx open it after
+    failure_threshold in a row. While open, callers skip Orpheus and use the
+    OpenAI fallback; every open_seconds one trial request is let through
+    (half-open) and its success closes the circuit again.
+    
+    allow_request() hands out a ticket stamped with the current state epoch
+    and the outcome is reported with it. Reports from calls admitted before
+    the last transition are ignored, so a slow call that started while the
+    circuit was closed can neither close an open circuit nor fail the trial.
     """
-    if not OPENAI_API_KEY:
-        return "I understand your feelings. I'm here to help you with whatever you need."
     
-    try:
-        # Get emotional analysis
-        emotional_analysis = emotional_engine.generate_emotionally_aware_response(user_input, session_id)
-        
-        # Create emotionally-aware system prompt
-        emotional_prompt = f"""
-        You are an emotionally intelligent AI assistant. Based on analysis of the user's message:
-        
-        DETECTED EMOTION: {emotional_analysis['detected_emotion']} (intensity: {emotional_analysis['emotion_intensity']:.2f})
-        EMOTIONAL CONTEXT: {emotional_analysis['emotional_subtext']}
-        
-        RESPONSE GUIDELINES:
-        - Style: {emotional_analysis['response_style']}
-        - Approach: {emotional_analysis['conversation_approach']}
-        - Voice should be: {emotional_analysis['voice_tone']}
-        
-        Respond to the user's message with appropriate emotional intelligence. Match their emotional state appropriately - don't ignore their feelings, but help guide them toward a positive resolution if needed.
-        
-        Keep your response conversational, empathetic, and under 150 words.
+    STATES = ('closed', 'open', 'half_open')
+    
+    def __init__(self, name, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, open_seconds=CIRCUIT_OPEN_SECONDS, enabled=CIRCUIT_BREAKER_ENABLED):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.open_seconds = open_seconds
+        self.enabled = enabled
+        self.state = 'closed'
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._epoch = 0
+        self._state_since = time.time()
+        self._opened_at = None
+        self._trial_started_at = None
+        self._last_failure = None
+        self.history = deque(maxlen=50)
+        self._publish_state()
+    
+    def _publish_state(self):
+        for state in self.STATES:
+            metrics.set_gauge('circuit_state', 1 if state == self.state else 0, circuit=self.name, state=state)
+    
+    def _transition(self, state, reason):
+        # Caller holds the lock
+        previous, self.state = self.state, state
+        self._epoch += 1
+        now = self._state_since = time.time()
+        if state == 'open' and previous == 'closed':
+            self._opened_at = now
+        if state == 'closed':
+            metrics.inc('circuit_open_seconds_total', now - self._opened_at, circuit=self.name)
+            self._opened_at = None
+        self._failures = 0
+        self._trial_started_at = None
+        self.history.append({'timestamp': now, 'from': previous, 'to': state, 'reason': reason})
+        metrics.inc('circuit_transitions_total', circuit=self.name, from_state=previous, to_state=state)
+        self._publish_state()
+        print(f"🔌 {self.name} circuit {previous} → {state} ({reason})")
+    
+    def allow_request(self):
         """
-        
-        headers = {
-            "Authorization": f"Bearer {OPENAI_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "model": "gpt-4",
-            "messages": [
-                {"role": "system", "content": emotional_prompt},
-                {"role": "user", "content": user_input}
-            ],
-            "temperature": 0.7,
-            "max_tokens": 300
-        }
-        
-        response = requests.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers=headers,
-            json=payload,
-            timeout=15
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            ai_response = data['choices'][0]['message']['content'].strip()
-            
-            # Store conversation context
-            if session_id not in conversation_sessions:
-                conversation_sessions[session_id] = []
-            
-            conversation_sessions[session_id].append({
-                'user_input': user_input,
-                'ai_response': ai_response,
-                'emotional_analysis': emotional_analysis,
-                'timestamp': time.time()
-            })
-            
-            return ai_response
-        else:
-            print(f"❌ ChatGPT API Error: {response.status_code} - {response.text}")
-            return f"I understand you're feeling {emotional_analysis['detected_emotion']}. I'm here to help you with whatever you need."
-        
-    except Exception as e:
-        print(f"Error generating emotionally aware response: {e}")
-        return "I understand your feelings. I'm here to help you with whatever you need."
+        Ticket (epoch, is_trial) if the call may go upstream, None if it must
+        use the fallback - while half-open only the single trial request goes
+        """
+        if not self.enabled:
+            return (self._epoch, False)
+        with self._lock:
+            now = time.time()
+            if self.state == 'closed':
+                return (self._epoch, False)
+            if self.state == 'open' and now - self._state_since >= self.open_seconds:
+                self._transition('half_open', 'trial request')
+            # A trial that never reported back (dropped in the queue, client gone) is replaced
+            if self.state == 'half_open' and (self._trial_started_at is None or now - self._trial_started_at > self.open_seconds + REQUEST_TIMEOUT):
+                self._trial_started_at = now
+                return (self._epoch, True)
+        metrics.inc('circuit_short_circuits_total', circuit=self.name)
+        return None
+    
+    def _is_current(self, ticket):
+        # Caller holds the lock - closed calls count while the circuit stays closed, otherwise only the trial does
+        epoch, is_trial = ticket
+        return epoch == self._epoch and (self.state == 'closed' or (self.state == 'half_open' and is_trial))
+    
+    def record_success(self, ticket):
+        if not self.enabled:
+            return
+        with self._lock:
+            if not self._is_current(ticket):
+                return
+            if self.state == 'closed':
+                self._failures = 0
+            else:
+                self._transition('closed', 'upstream recovered')
+    
+    def record_failure(self, ticket, reason, trip=False):
+        """One failed upstream call - trip=True opens the circuit without waiting for the threshold"""
+        if not self.enabled:
+            return
+        with self._lock:
+            if not self._is_current(ticket):
+                return
+            self._last_failure = reason
+            if self.state == 'half_open':
+                self._transition('open', f'trial failed: {reason}')
+            else:
+                self._failures += 1
+                if trip or self._failures >= self.failure_threshold:
+                    self._transition('open', reason if trip else f'{self._failures} consecutive failures, last: {reason}')
+    
+    def get_stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'state': self.state,
+                'consecutive_failures': self._failures,
+                'failure_threshold': self.failure_threshold,
+                'open_seconds': self.open_seconds,
+                'open_for': time.time() - self._opened_at if self._opened_at is not None else 0.0,
+                'last_failure': self._last_failure,
+                'history': list(self.history)
+            }
 
-def create_orpheus_wav(raw_audio_data):
-    """Convert raw Orpheus audio to proper WAV format with optimizations"""
-    data_size = len(raw_audio_data)
-    file_size = data_size + 36
-    byte_rate = ORPHEUS_SAMPLE_RATE * 1 * 16 // 8
-    block_align = 1 * 16 // 8
+# Shared by every Baseten call path in this process
+orpheus_circuit = CircuitBreaker('orpheus')
+
+class HedgePolicy:
+    """
+    When and how often to hedge an Orpheus call. The hedge delay is the
+    voice's p90 generation time (never below HEDGE_MIN_DELAY); batch work,
+    voices with too few samples and calls made while the circuit is not
+    closed are never hedged. A token bucket caps hedges at max_percent of
+    eligible requests, so a slow deployment cannot double its own load.
+    """
     
-    header = b'RIFF'
-    header += struct.pack('<I', file_size)
-    header += b'WAVE'
-    header += b'fmt '
-    header += struct.pack('<I', 16)
-    header += struct.pack('<H', 1)
-    header += struct.pack('<H', 1)
-    header += struct.pack('<I', ORPHEUS_SAMPLE_RATE)
-    header += struct.pack('<I', byte_rate)
-    header += struct.pack('<H', block_align)
-    header += struct.pack('<H', 16)
-    header += b'data'
-    header += struct.pack('<I', data_size)
+    def __init__(self, enabled=HEDGING_ENABLED, target=HEDGE_TARGET, max_percent=HEDGE_MAX_PERCENT,
+                 min_delay=HEDGE_MIN_DELAY, min_samples=HEDGE_MIN_SAMPLES):
+        self.enabled = enabled and max_percent > 0
+        self.target = target if target in ('orpheus', 'fallback') else 'orpheus'
+        self.max_percent = max_percent
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._tokens = 0.0
+        self._burst = max(1.0, max_percent / 10)
+        self._outcomes = {'won': 0, 'lost': 0, 'throttled': 0}
+    
+    def _count(self, outcome):
+        # Caller holds the lock
+        self._outcomes[outcome] += 1
+        metrics.inc('tts_hedges_total', target=self.target, outcome=outcome)
+    
+    def delay_for(self, request_info, priority):
+        """Seconds to wait before hedging this call, or None if it is not eligible"""
+        if not self.enabled or priority == 'batch' or orpheus_circuit.state != 'closed':
+            return None
+        p90 = metrics.percentile('orpheus_generation_seconds', 0.90, self.min_samples,
+                                 voice=request_info['payload']['voice'], precision=request_info['precision'])
+        if p90 is None:
+            return None
+        with self._lock:
+            self._tokens = min(self._burst, self._tokens + self.max_percent / 100)
+        return max(self.min_delay, p90)
+    
+    def try_hedge(self):
+        """Spend one hedge from the budget - False (and counted as throttled) when it is empty"""
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            self._count('throttled')
+        return False
     
-    return header + raw_audio_data
+    def record(self, hedge_won):
+        with self._lock:
+            self._count('won' if hedge_won else 'lost')
+    
+    def get_stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'target': self.target,
+                'max_percent': self.max_percent,
+                'min_delay': self.min_delay,
+                'budget_tokens': round(self._tokens, 3),
+                **self._outcomes
+            }
 
-def generate_orpheus_tts_optimized(text, voice_config, use_streaming=False, emotion_mode='natural', add_emotion_tags=True):
-    """Generate audio using Orpheus TTS with performance optimizations and emotional controls"""
-    global active_streams, performance_metrics, ORPHEUS_MODEL_AVAILABLE, ORPHEUS_DEPLOYMENT_STATUS
+tts_hedging = HedgePolicy()
+
+class UpstreamSessionPool:
+    """
+    Shared keep-alive HTTP sessions for Baseten and OpenAI.
+    One requests.Session per upstream host with its own urllib3 pool size and
+    retry/backoff policy, so utterances reuse warm TCP+TLS connections.
+    Session creation is lock-protected; urllib3 pools are safe to share across threads.
+    """
     
-    try:
-        start_time = time.time()
-        active_streams += 1
-        
-        # Optimize text and parameters
-        word_count = len(text.split())
-        estimated_tokens = word_count * 15  # More generous estimate for complex speech
-        base_max_tokens = voice_config.get('max_tokens', 2200)
-        
-        # For conversation responses, be more generous with tokens
-        if word_count > 30:  # Longer responses (typical ChatGPT)
-            min_tokens = max(1200, estimated_tokens)  # Ensure minimum for full response
-        else:
-            min_tokens = max(800, estimated_tokens)   # Shorter responses
-            
-        optimized_max_tokens = min(min_tokens, base_max_tokens)
+    def __init__(self, host_pool_sizes, default_pool_size=CONNECTION_POOL_SIZE, retries=UPSTREAM_RETRIES, backoff_factor=UPSTREAM_BACKOFF_FACTOR):
+        self.host_pool_sizes = dict(host_pool_sizes)
+        self.default_pool_size = default_pool_size
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._adapters = {}
+        self._counters = {}
+    
+    def _build_retry(self):
+        # Only connection failures and gateway errors are retried - a read timeout
+        # may mean Orpheus is still generating, and retrying would double the GPU work
+        return Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=0,
+            status=self.retries,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(['GET', 'POST']),
+            backoff_factor=self.backoff_factor,
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+    
+    def session_for(self, url):
+        """Return the shared session for the URL's host, creating it on first use"""
+        host = urlparse(url).netloc
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                pool_size = self.host_pool_sizes.get(host, self.default_pool_size)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=self._build_retry())
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._sessions[host] = session
+                self._adapters[host] = adapter
+                self._counters[host] = {
+                    'pool_size': pool_size,
+                    'requests': 0,
+                    'errors': 0,
+                    'in_flight': 0,
+                    'peak_in_flight': 0
+                }
+            return host, session
+    
+    def post(self, url, **kwargs):
+        """POST through the host's pooled session"""
+        host, session = self.session_for(url)
+        with self._lock:
+            counters = self._counters[host]
+            counters['requests'] += 1
+            counters['in_flight'] += 1
+            counters['peak_in_flight'] = max(counters['peak_in_flight'], counters['in_flight'])
+        try:
+            return session.post(url, **kwargs)
+        except requests.exceptions.RequestException:
+            with self._lock:
+                counters['errors'] += 1
+            raise
+        finally:
+            with self._lock:
+                counters['in_flight'] -= 1
+    
+    def get_stats(self):
+        """Per-host pool utilisation for /metrics"""
+        with self._lock:
+            stats = {}
+            for host, counters in self._counters.items():
+                host_stats = dict(counters)
+                connections_opened = 0
+                pools = self._adapters[host].poolmanager.pools
+                for key in pools.keys():
+                    pool = pools.get(key)
+                    if pool is not None:
+                        connections_opened += pool.num_connections
+                host_stats['connections_opened'] = connections_opened
+                host_stats['connection_reuse_rate'] = round(
+                    1 - connections_opened / counters['requests'], 3
+                ) if counters['requests'] else 0
+                host_stats['utilisation'] = round(counters['in_flight'] / counters['pool_size'], 3)
+                stats[host] = host_stats
+            return stats
+
+# Shared upstream connection pools - Orpheus gets one connection per stream slot the adaptive limit can open
+upstream_sessions = UpstreamSessionPool({
+    urlparse(ORPHEUS_ENDPOINT).netloc: max(CONNECTION_POOL_SIZE, MAX_CONCURRENT_STREAMS, orpheus_concurrency.max_limit),
+    urlparse(OPENAI_CHAT_URL).netloc: CONNECTION_POOL_SIZE
+})
+
+def audio_cache_key(request_info):
+    """
+    Content address for a synthesis: final enhanced prompt plus every parameter
+    that changes the audio. max_tokens is the word-count heuristic, not the
+    learned estimate sent upstream - the estimate moves with every sample and
+    would otherwise orphan cache entries and split single-flight keys.
+    """
+    payload = request_info['payload']
+    key_material = json.dumps({
+        'prompt': payload['prompt'],
+        'voice': payload['voice'],
+        'precision': request_info['precision'],
+        'temperature': payload['temperature'],
+        'max_tokens': request_info.get('cache_max_tokens', payload['max_tokens'])
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(key_material.encode('utf-8')).hexdigest()
+
+class AudioCache:
+    """
+    Two-tier cache of raw Orpheus PCM keyed by audio_cache_key.
+    Memory tier: LRU bounded by a byte budget. Disk tier: one file per clip under
+    AUDIO_CACHE_DIR/<voice>/, evicted oldest-first when over its byte budget.
+    Disk hits are promoted back into memory.
+    """
+    
+    def __init__(self, cache_dir, memory_budget_bytes, disk_budget_bytes, enabled=True):
+        self.cache_dir = cache_dir
+        self.memory_budget_bytes = memory_budget_bytes
+        self.disk_budget_bytes = disk_budget_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> raw PCM
+        self._memory_bytes = 0
+        self._disk_index = OrderedDict()  # key -> (path, size), oldest first
+        self._disk_bytes = 0
+        self.stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'memory_evictions': 0,
+            'disk_evictions': 0
+        }
+        if self.enabled and self.disk_budget_bytes > 0:
+            self._load_disk_index()
+    
+    def _load_disk_index(self):
+        """Rebuild the disk index from files left by previous runs"""
+        entries = []
+        if os.path.isdir(self.cache_dir):
+            for root, _, files in os.walk(self.cache_dir):
+                for name in files:
+                    if not name.endswith('.pcm'):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, name[:-4], path, stat.st_size))
+        for _, key, path, size in sorted(entries):
+            self._disk_index[key] = (path, size)
+            self._disk_bytes += size
+    
+    def get(self, key):
+        """Return cached PCM for the key or None"""
+        if not self.enabled:
+            return None
         
-        # Clean up text
-        optimized_text = re.sub(r'[.]{3,}', '...', text)
-        optimized_text = re.sub(r'[!]{2,}', '!', optimized_text)
-        optimized_text = re.sub(r'[?]{2,}', '?', optimized_text)
-        optimized_text = re.sub(r'\s+', ' ', optimized_text).strip()
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return audio
+            disk_entry = self._disk_index.get(key)
         
-        # EMOTIONAL ENHANCEMENT
-        # Get temperature based on emotion mode
-        temperature_presets = voice_config.get('temperature_presets', {
-            'calm': 0.3, 'natural': 0.7, 'expressive': 1.0, 'dramatic': 1.3
-        })
-        base_temperature = temperature_presets.get(emotion_mode, 0.7)
+        if disk_entry is not None:
+            path, _ = disk_entry
+            try:
+                with open(path, 'rb') as f:
+                    audio = f.read()
+                os.utime(path)
+            except OSError:
+                audio = None
+            with self._lock:
+                if audio is not None:
+                    if key in self._disk_index:
+                        self._disk_index.move_to_end(key)
+                    self.stats['disk_hits'] += 1
+                    self._store_in_memory(key, audio)
+                    return audio
+                self._forget_disk_entry(key)
         
-        # Add contextual emotion tags if enabled
-        if add_emotion_tags:
-            optimized_text = enhance_text_with_emotions(optimized_text, voice_config)
+        with self._lock:
+            self.stats['misses'] += 1
+        return None
+    
+    def put(self, key, voice, audio):
+        """Store PCM in both tiers"""
+        if not self.enabled or not audio:
+            return
         
-        payload = {
-            "voice": voice_config['orpheus_voice'],
-            "prompt": optimized_text,
-            "max_tokens": optimized_max_tokens,
-            "temperature": base_temperature,  # Dynamic temperature based on emotion
-            "repetition_penalty": 1.1  # Stable generation
-        }
+        with self._lock:
+            self.stats['stores'] += 1
+            self._store_in_memory(key, audio)
+            if self.disk_budget_bytes <= 0 or len(audio) > self.disk_budget_bytes or key in self._disk_index:
+                return
         
-        # Add performance optimizations if supported by API
-        precision = voice_config.get('precision', 'fp8')
+        voice_dir = os.path.join(self.cache_dir, re.sub(r'[^A-Za-z0-9_-]', '_', voice))
+        path = os.path.join(voice_dir, f'{key}.pcm')
+        try:
+            os.makedirs(voice_dir, exist_ok=True)
+            temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(temp_path, 'wb') as f:
+                f.write(audio)
+            os.replace(temp_path, path)  # Atomic so readers never see half a clip
+        except OSError as e:
+            print(f"⚠️ Audio cache disk write failed: {e}")
+            return
         
-        headers = {
-            "Authorization": f"Api-Key {BASETEN_API_KEY}",
-            "Content-Type": "application/json"
-        }
+        with self._lock:
+            if key not in self._disk_index:
+                self._disk_index[key] = (path, len(audio))
+                self._disk_bytes += len(audio)
+            while self._disk_bytes > self.disk_budget_bytes and self._disk_index:
+                oldest_key = next(iter(self._disk_index))
+                oldest_path, _ = self._disk_index[oldest_key]
+                self._forget_disk_entry(oldest_key)
+                self.stats['disk_evictions'] += 1
+                try:
+                    os.unlink(oldest_path)
+                except OSError:
+                    pass
+    
+    def _store_in_memory(self, key, audio):
+        # Caller holds the lock
+        if len(audio) > self.memory_budget_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = audio
+        self._memory_bytes += len(audio)
+        while self._memory_bytes > self.memory_budget_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.stats['memory_evictions'] += 1
+    
+    def _forget_disk_entry(self, key):
+        # Caller holds the lock
+        entry = self._disk_index.pop(key, None)
+        if entry is not None:
+            self._disk_bytes -= entry[1]
+    
+    def get_stats(self):
+        """Hit/miss/eviction counters and tier sizes for /metrics"""
+        with self._lock:
+            lookups = self.stats['memory_hits'] + self.stats['disk_hits'] + self.stats['misses']
+            return {
+                'enabled': self.enabled,
+                **self.stats,
+                'hit_rate': round((self.stats['memory_hits'] + self.stats['disk_hits']) / lookups, 3) if lookups else 0,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'memory_budget_bytes': self.memory_budget_bytes,
+                'disk_entries': len(self._disk_index),
+                'disk_bytes': self._disk_bytes,
+                'disk_budget_bytes': self.disk_budget_bytes
+            }
+
+class MaxTokensEstimator:
+    """
+    Learns seconds of audio per spoken character for each voice + archetype
+    from completed syntheses (exponentially weighted mean and variance) and
+    sizes max_tokens as the upper rate estimate times a safety margin, so short
+    lines stop reserving 800+ tokens and long ones stop truncating.
+    """
+    
+    TAG_PATTERN = re.compile(r'<[^>]*>')
+    TOKEN_QUANTUM = 128  # Round up so small model drift does not change the upstream request
+    MIN_TOKENS = 256
+    SAVE_EVERY = 10
+    
+    def __init__(self, path, min_samples=MAX_TOKENS_MIN_SAMPLES, safety_margin=MAX_TOKENS_SAFETY_MARGIN):
+        self.path = path
+        self.min_samples = min_samples
+        self.safety_margin = safety_margin
+        self._lock = threading.Lock()
+        self._models = {}
+        self._unsaved = 0
+    
+    @staticmethod
+    def key_for(voice_config):
+        return f"{voice_config.get('orpheus_voice', 'unknown')}:{voice_config.get('archetype') or 'base'}"
+    
+    @classmethod
+    def spoken_length(cls, prompt):
+        """Characters that are actually spoken - emotion tags like <sigh> excluded"""
+        return max(1, len(cls.TAG_PATTERN.sub('', prompt)))
+    
+    def estimate(self, key, spoken_chars, fallback_tokens, max_tokens_cap):
+        """Return (max_tokens, predicted_duration) - the heuristic and None until the model is ready"""
+        with self._lock:
+            model = self._models.get(key)
+            if model is None or model['samples'] < self.min_samples:
+                return fallback_tokens, None
+            rate_mean = model['rate_mean']
+            rate_upper = rate_mean + 2 * model['rate_var'] ** 0.5
         
-        print(f"🚀 Calling Optimized Orpheus API - Voice: {voice_config['orpheus_voice']}, Precision: {precision}, Tokens: {optimized_max_tokens}, Emotion: {emotion_mode}")
+        predicted_duration = spoken_chars * rate_mean
+        tokens = spoken_chars * rate_upper * ORPHEUS_TOKENS_PER_AUDIO_SECOND * self.safety_margin + 64
+        tokens = -(-int(tokens) // self.TOKEN_QUANTUM) * self.TOKEN_QUANTUM
+        return max(self.MIN_TOKENS, min(tokens, max_tokens_cap)), predicted_duration
+    
+    def record(self, key, spoken_chars, duration, max_tokens, predicted_duration):
+        """Fold one completed synthesis into the voice's model"""
+        used_tokens = duration * ORPHEUS_TOKENS_PER_AUDIO_SECOND
+        truncated = used_tokens >= 0.95 * max_tokens
+        rate = duration / spoken_chars
         
-        # Use standard requests for stability
-        response = requests.post(ORPHEUS_ENDPOINT, headers=headers, json=payload, timeout=REQUEST_TIMEOUT)
+        if predicted_duration is not None:
+            metrics.observe('max_tokens_estimate_error_ratio', abs(predicted_duration - duration) / duration, voice=key)
+        if truncated:
+            metrics.inc('max_tokens_truncations_total', voice=key)
         
-        if response.status_code == 200:
-            raw_audio_data = response.content
-            wav_data = create_orpheus_wav(raw_audio_data)
-            
-            # Save to temporary file
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                temp_file.write(wav_data)
-                temp_path = temp_file.name
-            
-            # Calculate metrics
-            audio_size = len(raw_audio_data)
-            duration = max(0.1, audio_size / (ORPHEUS_SAMPLE_RATE * 2))
-            generation_time = time.time() - start_time
-            
-            # Update global status
-            ORPHEUS_MODEL_AVAILABLE = True
-            ORPHEUS_DEPLOYMENT_STATUS = "ACTIVE"
-            
-            # Update performance metrics
-            performance_metrics['total_requests'] += 1
-            performance_metrics['avg_generation_time'] = (
-                (performance_metrics['avg_generation_time'] * (performance_metrics['total_requests'] - 1) + generation_time) 
-                / performance_metrics['total_requests']
-            )
-            
-            # Estimate tokens per second
-            estimated_tokens = audio_size // 100
-            if generation_time > 0:
-                tokens_per_sec = estimated_tokens / generation_time
-                performance_metrics['tokens_per_second'] = (
-                    (performance_metrics['tokens_per_second'] * (performance_metrics['total_requests'] - 1) + tokens_per_sec)
-                    / performance_metrics['total_requests']
-                )
-            
-            # Performance warnings
-            if generation_time > 5.0:
-                print(f"⚠️ Slow generation: {generation_time:.1f}s (target: <3s)")
+        with self._lock:
+            model = self._models.setdefault(key, {
+                'samples': 0, 'rate_mean': rate, 'rate_var': 0.0, 'truncations': 0,
+                'abs_error_sum': 0.0, 'estimates': 0, 'provisioned_tokens': 0, 'used_tokens': 0
+            })
+            if truncated:
+                # The clip was cut off, so the real rate is higher than observed - widen instead of fitting
+                model['truncations'] += 1
+                model['rate_mean'] = max(model['rate_mean'], rate) * 1.25
+            else:
+                model['samples'] += 1
+                alpha = max(1.0 / model['samples'], 0.05)
+                delta = rate - model['rate_mean']
+                model['rate_mean'] += alpha * delta
+                model['rate_var'] = (1 - alpha) * (model['rate_var'] + alpha * delta * delta)
+            if predicted_duration is not None:
+                model['estimates'] += 1
+                model['abs_error_sum'] += abs(predicted_duration - duration) / duration
+            model['provisioned_tokens'] += max_tokens
+            model['used_tokens'] += int(used_tokens)
             
+            self._unsaved += 1
+            if self._unsaved < self.SAVE_EVERY:
+                return
+            self._unsaved = 0
+            snapshot = json.dumps(self._models)
+        self._save(snapshot)
+    
+    def load(self):
+        """Read the models saved by a previous run - called from server startup, not at import"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                models = json.load(f)
+            with self._lock:
+                self._models = models
+            print(f"📐 Loaded max_tokens models for {len(models)} voices from {self.path}")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not load max_tokens models from {self.path}: {e}")
+    
+    def _save(self, snapshot):
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            temp_path = f'{self.path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(snapshot)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"⚠️ Could not save max_tokens models: {e}")
+    
+    def flush(self):
+        """Persist the current models immediately"""
+        with self._lock:
+            self._unsaved = 0
+            snapshot = json.dumps(self._models)
+        self._save(snapshot)
+    
+    def get_stats(self):
+        """Per-voice fit, estimate error and token utilisation for /metrics"""
+        with self._lock:
             return {
-                'success': True,
-                'file_path': temp_path,
-                'duration': duration,
-                'generation_time': generation_time,
-                'file_size': len(wav_data),
-                'raw_audio_size': audio_size,
-                'streaming': False,  # Using standard for stability
-                'emotion_mode': emotion_mode,
-                'temperature_used': base_temperature,
-                'fallback_used': None,
-                'performance': {
-                    'tokens_per_second': performance_metrics['tokens_per_second'],
-                    'avg_generation_time': performance_metrics['avg_generation_time'],
-                    'precision': precision,
-                    'optimized_tokens': optimized_max_tokens,
-                    'emotion_enhanced': add_emotion_tags
+                key: {
+                    'samples': model['samples'],
+                    'active': model['samples'] >= self.min_samples,
+                    'seconds_per_char': round(model['rate_mean'], 5),
+                    'mean_abs_error_ratio': round(model['abs_error_sum'] / model['estimates'], 3) if model['estimates'] else None,
+                    'truncations': model['truncations'],
+                    'token_utilisation': round(model['used_tokens'] / model['provisioned_tokens'], 3) if model['provisioned_tokens'] else None
                 }
+                for key, model in self._models.items()
             }
-        else:
-            # Handle specific error cases
-            error_text = response.text
-            print(f"❌ Orpheus API Error: {response.status_code} - {error_text}")
-            
-            # Check for deployment waking up or model not found
-            if response.status_code == 404 or "model_id" in error_text.lower():
-                print(f"🔄 Orpheus deployment still waking up - using OpenAI TTS fallback")
-                return generate_openai_tts_fallback(text, voice_config, emotion_mode)
-                
-            # Check for deactivation error
-            if "deactivated" in error_text.lower() or "needs to be activated" in error_text.lower():
-                ORPHEUS_DEPLOYMENT_STATUS = "INACTIVE"
-                ORPHEUS_MODEL_AVAILABLE = False
-                print(f"🚨 Orpheus deployment detected as INACTIVE - using OpenAI TTS fallback")
-                return generate_openai_tts_fallback(text, voice_config, emotion_mode)
-                
-            return {
-                'success': False,
-                'error': f'Orpheus API error: {response.status_code} - {response.text}',
-                'fallback_used': None
-            }
-            
-    except requests.exceptions.Timeout:
-        print(f"⏰ Orpheus API timeout - using OpenAI TTS fallback")
-        return generate_openai_tts_fallback(text, voice_config, emotion_mode)
-    except Exception as e:
-        print(f"💥 Orpheus TTS error: {str(e)} - using OpenAI TTS fallback")
-        return generate_openai_tts_fallback(text, voice_config, emotion_mode)
-    finally:
-        active_streams = max(0, active_streams - 1)
 
-def generate_openai_tts_fallback(text, voice_config, emotion_mode='natural'):
-    """Fallback TTS using OpenAI when Orpheus is unavailable"""
-    try:
-        start_time = time.time()
-        print(f"🔄 Using OpenAI TTS fallback for: {text[:50]}...")
-        
-        # Map Orpheus voices to OpenAI voices
-        orpheus_to_openai_voice = {
-            'leah': 'nova',
-            'jess': 'shimmer', 
-            'dan': 'onyx',
-            'zac': 'fable',
-            'zoe': 'nova',
-            'tara': 'alloy',
-            'leo': 'echo',
-            'mia': 'shimmer'
-        }
+# Shared by prepare_orpheus_request (estimate) and build_orpheus_success_result (record) - models load in run_optimized_server
+max_tokens_estimator = MaxTokensEstimator(MAX_TOKENS_MODEL_PATH)
+
+class SingleFlight:
+    """
+    Deduplicates identical in-flight calls: the first caller for a key runs the
+    call, concurrent callers with the same key wait and share its result.
+    run() serves the threaded handlers, run_async() the asyncio engine.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = {}
+        self.stats = {'leader_calls': 0, 'coalesced_requests': 0}
+    
+    def run(self, key, fn, *args):
+        """Return (result, coalesced) - coalesced is True when another caller's result was shared"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = {'done': threading.Event(), 'result': None, 'error': None}
+                self._calls[key] = call
+                self.stats['leader_calls'] += 1
+            else:
+                self.stats['coalesced_requests'] += 1
         
-        orpheus_voice = voice_config.get('orpheus_voice', 'leah')
-        openai_voice = orpheus_to_openai_voice.get(orpheus_voice, 'nova')
+        if not leader:
+            call['done'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result'], True
         
-        # Initialize OpenAI client
-        if not OPENAI_API_KEY:
+        try:
+            call['result'] = fn(*args)
+            return call['result'], False
+        except BaseException as e:
+            call['error'] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call['done'].set()
+    
+    async def run_async(self, key, fn, *args):
+        """
+        Coroutine counterpart of run() - fn is an async function. The call runs
+        as its own task and every caller, the leader included, awaits it
+        shielded: a caller whose client disconnects is cancelled alone, and the
+        call carries on (and fills the cache) for the others.
+        """
+        task = self._async_calls.get(key)
+        leader = task is None
+        if leader:
+            task = asyncio.ensure_future(fn(*args))
+            self._async_calls[key] = task
+            task.add_done_callback(lambda finished: self._finish_async(key, finished))
+        with self._lock:
+            self.stats['leader_calls' if leader else 'coalesced_requests'] += 1
+        return await asyncio.shield(task), not leader
+    
+    def _finish_async(self, key, task):
+        if self._async_calls.get(key) is task:
+            del self._async_calls[key]
+        # Retrieve the outcome - every caller may have gone away before it finished
+        if not task.cancelled():
+            task.exception()
+    
+    def get_stats(self):
+        with self._lock:
             return {
-                'success': False,
-                'error': 'OpenAI API key not configured',
-                'fallback_used': 'openai_tts'
+                **self.stats,
+                'in_flight': len(self._calls) + len(self._async_calls)
             }
-            
-        client = OpenAI(api_key=OPENAI_API_KEY)
-        
-        # Generate speech
-        response = client.audio.speech.create(
-            model="tts-1",  # or "tts-1-hd" for higher quality
-            voice=openai_voice,
-            input=text
-        )
-        
-        # Save to temporary file
-        with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as temp_file:
-            response.stream_to_file(temp_file.name)
-            temp_path = temp_file.name
-        
-        generation_time = time.time() - start_time
+
+def coalesced_tts_result(result, start_time):
+    """Copy a shared synthesis result for a follower, with its own wait as generation_time"""
+    shared = dict(result)
+    shared['coalesced'] = True
+    shared['generation_time'] = time.time() - start_time
+    return shared
+
+# Identical concurrent syntheses (e.g. several gallery tabs) share one Orpheus call
+orpheus_single_flight = SingleFlight()
+
+# Replayed gallery/tester lines are served from here instead of Baseten
+audio_cache = AudioCache(
+    AUDIO_CACHE_DIR,
+    AUDIO_CACHE_MEMORY_MB * 1024 * 1024,
+    AUDIO_CACHE_DISK_MB * 1024 * 1024,
+    enabled=AUDIO_CACHE_ENABLED
+)
+
+def json_default(value):
+    """json.dumps fallback for the frozen voice configs"""
+    if isinstance(value, MappingProxyType):
+        return dict(value)
+    return str(value)
+
+class AudioLibrary:
+    """
+    Indexed on-disk store of pre-rendered clips for fixed lines (archetype
+    tester and gallery samples), filled by prerender_audio_library.py.
+    
+    Entries are looked up by (voice, precision, emotion mode, emotion tags,
+    text). Each one records a fingerprint of the voice config and the final
+    Orpheus request (enhanced prompt, temperature, ...); a lookup whose
+    fingerprint no longer matches is stale and falls through to synthesis.
+    The index file is re-read when another process rewrites it.
+    """
+    
+    INDEX_FILE = 'index.json'
+    RELOAD_CHECK_INTERVAL = 5.0  # Seconds between index mtime checks
+    
+    def __init__(self, library_dir, enabled=True):
+        self.library_dir = library_dir
+        self.enabled = enabled
+        self.index_path = os.path.join(library_dir, self.INDEX_FILE)
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._index_mtime = None
+        self._next_reload_check = 0.0
+        if self.enabled:
+            self._load_index()
+    
+    @staticmethod
+    def lookup_key(voice, precision, emotion_mode, add_emotion_tags, text):
+        key_material = json.dumps([voice, precision, emotion_mode, bool(add_emotion_tags), ' '.join(text.split())],
+                                  ensure_ascii=False)
+        return hashlib.sha256(key_material.encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def fingerprint(text, voice_config, emotion_mode, add_emotion_tags):
+        """Hash of everything that shapes the clip: voice config, enhancement output and request parameters"""
+        request_info = prepare_orpheus_request(text, voice_config, emotion_mode, add_emotion_tags)
+        payload = request_info['payload']
+        material = json.dumps({
+            'voice_config': voice_config,
+            'prompt': payload['prompt'],
+            'voice': payload['voice'],
+            'temperature': payload['temperature'],
+            'repetition_penalty': payload.get('repetition_penalty'),
+            'precision': request_info['precision'],
+            'sample_rate': ORPHEUS_SAMPLE_RATE,
+            'pipeline_version': AUDIO_LIBRARY_PIPELINE_VERSION
+        }, sort_keys=True, ensure_ascii=False, default=json_default)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+    
+    def _load_index(self):
+        try:
+            mtime = os.stat(self.index_path).st_mtime_ns
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f).get('entries', {})
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Audio library index unreadable ({self.index_path}): {e}")
+            return
+        with self._lock:
+            self._entries = entries
+            self._index_mtime = mtime
+        print(f"📚 Audio library: {len(entries)} pre-rendered clips from {self.library_dir}")
+    
+    def _maybe_reload(self):
+        now = time.time()
+        if now < self._next_reload_check:
+            return
+        self._next_reload_check = now + self.RELOAD_CHECK_INTERVAL
+        try:
+            mtime = os.stat(self.index_path).st_mtime_ns
+        except OSError:
+            return
+        if mtime != self._index_mtime:
+            self._load_index()
+    
+    def lookup(self, text, voice, voice_config, emotion_mode='natural', add_emotion_tags=True):
+        """Return a synthesis result for a pre-rendered line, or None"""
+        if not self.enabled:
+            return None
+        self._maybe_reload()
         
-        # Estimate duration (rough calculation)
-        word_count = len(text.split())
-        estimated_duration = word_count * 0.6  # ~0.6 seconds per word average
+        lookup_start = time.time()
+        precision = voice_config.get('precision', 'fp8')
+        entry = self._entries.get(self.lookup_key(voice, precision, emotion_mode, add_emotion_tags, text))
+        if entry is None:
+            metrics.inc('audio_library_lookups_total', outcome='miss')
+            return None
+        if entry['fingerprint'] != self.fingerprint(text, voice_config, emotion_mode, add_emotion_tags):
+            metrics.inc('audio_library_lookups_total', outcome='stale')
+            return None
         
-        print(f"✅ OpenAI TTS generated in {generation_time:.1f}s using voice '{openai_voice}'")
+        try:
+            with open(os.path.join(self.library_dir, entry['file']), 'rb') as f:
+                wav_data = f.read()
+        except OSError:
+            metrics.inc('audio_library_lookups_total', outcome='missing_file')
+            return None
         
+        metrics.inc('audio_library_lookups_total', outcome='hit')
         return {
             'success': True,
-            'file_path': temp_path,
-            'duration': estimated_duration,
-            'generation_time': generation_time,
-            'file_size': 0,  # Unknown for streaming
-            'raw_audio_size': 0,
+            'audio_data': wav_data,
+            'content_type': 'audio/wav',
+            'duration': entry['duration'],
+            'generation_time': time.time() - lookup_start,
+            'file_size': len(wav_data),
             'streaming': False,
             'emotion_mode': emotion_mode,
-            'temperature_used': 0.7,
-            'fallback_used': 'openai_tts',
-            'openai_voice_used': openai_voice,
-            'performance': {
-                'tokens_per_second': 0,
-                'avg_generation_time': generation_time,
-                'precision': 'openai_standard',
-                'optimized_tokens': 0,
-                'emotion_enhanced': False
-            }
+            'temperature_used': entry.get('temperature', 0.7),
+            'emotion_enhanced': add_emotion_tags,
+            'fallback_used': None,
+            'prerendered': True,
+            'performance': {}
         }
+    
+    def entry_status(self, text, voice, voice_config, emotion_mode='natural', add_emotion_tags=True):
+        """'fresh', 'stale' or 'missing' for one manifest line"""
+        entry = self._entries.get(self.lookup_key(voice, voice_config.get('precision', 'fp8'), emotion_mode, add_emotion_tags, text))
+        if entry is None or not os.path.exists(os.path.join(self.library_dir, entry['file'])):
+            return 'missing'
+        if entry['fingerprint'] != self.fingerprint(text, voice_config, emotion_mode, add_emotion_tags):
+            return 'stale'
+        return 'fresh'
+    
+    def store(self, text, voice, voice_config, emotion_mode, add_emotion_tags, result):
+        """Write one rendered clip and add it to the in-memory index (save_index() persists it)"""
+        precision = voice_config.get('precision', 'fp8')
+        key = self.lookup_key(voice, precision, emotion_mode, add_emotion_tags, text)
+        relative_path = os.path.join(re.sub(r'[^A-Za-z0-9_-]', '_', voice), precision, f'{key}.wav')
+        path = os.path.join(self.library_dir, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(result['audio_data'])
+        os.replace(temp_path, path)
         
-    except Exception as e:
-        print(f"❌ OpenAI TTS fallback failed: {str(e)}")
+        with self._lock:
+            self._entries[key] = {
+                'file': relative_path,
+                'voice': voice,
+                'precision': precision,
+                'emotion_mode': emotion_mode,
+                'add_emotion_tags': bool(add_emotion_tags),
+                'text': text,
+                'fingerprint': self.fingerprint(text, voice_config, emotion_mode, add_emotion_tags),
+                'duration': round(result['duration'], 3),
+                'temperature': result.get('temperature_used'),
+                'rendered_at': time.time()
+            }
+    
+    def save_index(self):
+        """Atomically rewrite the index so running servers pick it up"""
+        os.makedirs(self.library_dir, exist_ok=True)
+        with self._lock:
+            document = {'version': AUDIO_LIBRARY_PIPELINE_VERSION, 'entries': dict(self._entries)}
+        temp_path = f'{self.index_path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(document, f, ensure_ascii=False, indent=1)
+        os.replace(temp_path, self.index_path)
+        self._index_mtime = os.stat(self.index_path).st_mtime_ns
+    
+    def get_stats(self):
         return {
-            'success': False,
-            'error': f'OpenAI TTS fallback error: {str(e)}',
-            'fallback_used': 'openai_tts'
+            'enabled': self.enabled,
+            'entries': len(self._entries),
+            'library_dir': self.library_dir
         }
 
-def get_fastest_voice_for_conversation(requested_voice=None):
+audio_library = AudioLibrary(AUDIO_LIBRARY_DIR, enabled=AUDIO_LIBRARY_ENABLED)
+
+class SessionStore:
     """
-    Get the fastest available voice for conversation responses.
-    Prioritizes FP8 voices for speed, but respects user's FP16 choice if specified.
+    In-memory conversation history with TTL and LRU eviction.
+    Sessions are evicted oldest-first when the session count or the global
+    byte budget is exceeded; every access goes through one lock.
     """
-    # If user specifically requested a voice and it exists, use it
-    if requested_voice and requested_voice in VOICE_CONFIGS:
-        return requested_voice
     
-    # Get FP8 voices (fastest)
-    fp8_voices = [k for k, v in VOICE_CONFIGS.items() if v.get('precision') == 'fp8']
+    def __init__(self, ttl_seconds=SESSION_TTL_SECONDS, max_sessions=SESSION_MAX_SESSIONS,
+                 max_messages=SESSION_MAX_MESSAGES, memory_budget_bytes=SESSION_MEMORY_MB * 1024 * 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self.memory_budget_bytes = memory_budget_bytes
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()  # session_id -> {'messages': [(entry, size)], 'bytes': int, 'last_access': float}
+        self._bytes = 0
+        self.stats = {'expired': 0, 'evicted': 0}
     
-    # Prefer specific fast voices in order
-    speed_priority = ['orpheus_leah', 'orpheus_jess', 'orpheus_dan', 'orpheus_zac', 'orpheus_zoe']
+    def get_history(self, session_id):
+        """Return a copy of the session's messages, oldest first"""
+        with self._lock:
+            session = self._get_live_session(session_id)
+            if session is None:
+                return []
+            session['last_access'] = time.time()
+            self._sessions.move_to_end(session_id)
+            return [entry for entry, _ in session['messages']]
     
-    for voice in speed_priority:
-        if voice in fp8_voices:
-            return voice
+    def append(self, session_id, entry, max_messages=None):
+        """Append one message and trim the session to max_messages"""
+        size = len(json.dumps(entry, default=str))
+        limit = min(max_messages or self.max_messages, self.max_messages)
+        with self._lock:
+            session = self._get_live_session(session_id)
+            if session is None:
+                session = {'messages': [], 'bytes': 0, 'last_access': 0}
+                self._sessions[session_id] = session
+            session['messages'].append((entry, size))
+            session['bytes'] += size
+            self._bytes += size
+            while len(session['messages']) > limit:
+                _, dropped_size = session['messages'].pop(0)
+                session['bytes'] -= dropped_size
+                self._bytes -= dropped_size
+            session['last_access'] = time.time()
+            self._sessions.move_to_end(session_id)
+            self._evict()
     
-    # Fallback to any FP8 voice
-    if fp8_voices:
-        return fp8_voices[0]
+    def clear(self, session_id):
+        with self._lock:
+            self._drop(session_id)
     
-    # Ultimate fallback
-    return 'orpheus_leah'
+    def session_ids(self):
+        with self._lock:
+            self._expire()
+            return list(self._sessions.keys())
+    
+    def __len__(self):
+        with self._lock:
+            self._expire()
+            return len(self._sessions)
+    
+    def get_stats(self):
+        with self._lock:
+            self._expire()
+            return {
+                'backend': 'memory',
+                'active_sessions': len(self._sessions),
+                'total_messages': sum(len(session['messages']) for session in self._sessions.values()),
+                'memory_bytes': self._bytes,
+                'memory_budget_bytes': self.memory_budget_bytes,
+                **self.stats
+            }
+    
+    def _get_live_session(self, session_id):
+        # Caller holds the lock
+        session = self._sessions.get(session_id)
+        if session is not None and time.time() - session['last_access'] > self.ttl_seconds:
+            self._drop(session_id)
+            self.stats['expired'] += 1
+            return None
+        return session
+    
+    def _drop(self, session_id):
+        # Caller holds the lock
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self._bytes -= session['bytes']
+    
+    def _expire(self):
+        # Caller holds the lock; the LRU head is always the longest idle session
+        cutoff = time.time() - self.ttl_seconds
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session['last_access'] >= cutoff:
+                break
+            self._drop(session_id)
+            self.stats['expired'] += 1
+    
+    def _evict(self):
+        # Caller holds the lock
+        self._expire()
+        while len(self._sessions) > 1 and (len(self._sessions) > self.max_sessions or self._bytes > self.memory_budget_bytes):
+            self._drop(next(iter(self._sessions)))
+            self.stats['evicted'] += 1
 
-def enhance_text_with_emotions(text, voice_config):
-    """Enhanced text processing with archetype-specific characteristics and emotions"""
-    if not text or not voice_config:
-        return text
+class SQLiteSessionStore:
+    """
+    SQLite-backed conversation history with the same interface as SessionStore.
+    Sessions survive restarts and can be shared by several server processes
+    pointing at the same file.
+    """
     
-    # Get voice configuration details
-    emotional_range = voice_config.get('emotional_range', [])
-    personality_traits = voice_config.get('personality_traits', [])
-    vocal_characteristics = voice_config.get('vocal_characteristics', [])
-    speaking_patterns = voice_config.get('speaking_patterns', [])
-    archetype = voice_config.get('archetype', None)
-    gender = voice_config.get('gender', None)
+    def __init__(self, path, ttl_seconds=SESSION_TTL_SECONDS, max_sessions=SESSION_MAX_SESSIONS, max_messages=SESSION_MAX_MESSAGES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self._lock = threading.Lock()
+        self._connection = self._connect()
+        self.stats = {'expired': 0, 'evicted': 0}
     
-    enhanced_text = text
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, last_access REAL NOT NULL)'
+        )
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS messages (id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, entry TEXT NOT NULL)'
+        )
+        connection.execute('CREATE INDEX IF NOT EXISTS messages_by_session ON messages (session_id, id)')
+        connection.execute('CREATE INDEX IF NOT EXISTS sessions_by_access ON sessions (last_access)')
+        return connection
     
-    # Apply archetype-specific text modifications
-    if archetype:
-        enhanced_text = apply_archetype_characteristics(enhanced_text, archetype, gender, personality_traits, speaking_patterns)
+    def reopen(self):
+        """Fresh connection and lock for a forked worker - SQLite handles must not cross fork()"""
+        self._lock = threading.Lock()
+        self._connection = self._connect()
     
-    # Add appropriate emotional tags based on voice characteristics
-    if 'expressive' in emotional_range or 'dramatic' in personality_traits:
-        # Add emotional expressiveness for dramatic archetypes
-        enhanced_text = add_emotional_expression_tags(enhanced_text, voice_config)
+    def get_history(self, session_id):
+        with self._lock:
+            self._expire()
+            rows = self._connection.execute(
+                'SELECT entry FROM messages WHERE session_id = ? ORDER BY id', (session_id,)
+            ).fetchall()
+            if rows:
+                self._connection.execute('UPDATE sessions SET last_access = ? WHERE session_id = ?', (time.time(), session_id))
+            return [json.loads(entry) for (entry,) in rows]
     
-    # Apply speaking pattern modifications
-    if speaking_patterns:
-        enhanced_text = apply_speaking_patterns(enhanced_text, speaking_patterns, archetype)
+    def append(self, session_id, entry, max_messages=None):
+        limit = min(max_messages or self.max_messages, self.max_messages)
+        with self._lock:
+            self._expire()
+            with self._transaction():
+                self._connection.execute(
+                    'INSERT INTO sessions (session_id, last_access) VALUES (?, ?) '
+                    'ON CONFLICT(session_id) DO UPDATE SET last_access = excluded.last_access',
+                    (session_id, time.time())
+                )
+                self._connection.execute(
+                    'INSERT INTO messages (session_id, entry) VALUES (?, ?)', (session_id, json.dumps(entry, default=str))
+                )
+                self._connection.execute(
+                    'DELETE FROM messages WHERE session_id = ? AND id NOT IN '
+                    '(SELECT id FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT ?)',
+                    (session_id, session_id, limit)
+                )
+                overflow = self._connection.execute(
+                    'SELECT session_id FROM sessions ORDER BY last_access DESC LIMIT -1 OFFSET ?', (self.max_sessions,)
+                ).fetchall()
+                for (evicted_id,) in overflow:
+                    self._delete(evicted_id)
+                self.stats['evicted'] += len(overflow)
     
-    # Add vocal characteristic tags for Orpheus processing
-    if vocal_characteristics:
-        enhanced_text = add_vocal_characteristic_tags(enhanced_text, vocal_characteristics)
+    def clear(self, session_id):
+        with self._lock, self._transaction():
+            self._delete(session_id)
     
-    return enhanced_text
+    def session_ids(self):
+        with self._lock:
+            self._expire()
+            return [row[0] for row in self._connection.execute('SELECT session_id FROM sessions ORDER BY last_access')]
+    
+    def __len__(self):
+        with self._lock:
+            self._expire()
+            return self._connection.execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+    
+    def get_stats(self):
+        with self._lock:
+            self._expire()
+            return {
+                'backend': 'sqlite',
+                'path': self.path,
+                'active_sessions': self._connection.execute('SELECT COUNT(*) FROM sessions').fetchone()[0],
+                'total_messages': self._connection.execute('SELECT COUNT(*) FROM messages').fetchone()[0],
+                **self.stats
+            }
+    
+    def _transaction(self):
+        # Autocommit connection: open the transaction explicitly, the context manager commits or rolls back
+        self._connection.execute('BEGIN IMMEDIATE')
+        return self._connection
+    
+    def _delete(self, session_id):
+        # Caller holds the lock
+        self._connection.execute('DELETE FROM messages WHERE session_id = ?', (session_id,))
+        self._connection.execute('DELETE FROM sessions WHERE session_id = ?', (session_id,))
+    
+    def _expire(self):
+        # Caller holds the lock
+        cutoff = time.time() - self.ttl_seconds
+        expired = self._connection.execute('SELECT session_id FROM sessions WHERE last_access < ?', (cutoff,)).fetchall()
+        if not expired:
+            return
+        with self._transaction():
+            for (session_id,) in expired:
+                self._delete(session_id)
+        self.stats['expired'] += len(expired)
 
-def apply_archetype_characteristics(text, archetype, gender, personality_traits, speaking_patterns):
-    """Apply archetype-specific text modifications"""
-    enhanced_text = text
+def create_session_store():
+    """Build the configured session store, falling back to memory if SQLite cannot be opened"""
+    if SESSION_STORE_BACKEND == 'sqlite':
+        try:
+            store = SQLiteSessionStore(SESSION_STORE_PATH)
+            print(f"💾 Conversation sessions stored in SQLite: {SESSION_STORE_PATH}")
+            return store
+        except sqlite3.Error as e:
+            print(f"⚠️ Could not open session store {SESSION_STORE_PATH}: {e} - using in-memory sessions")
+    return SessionStore()
+
+# Conversation history storage
+conversation_sessions = create_session_store()
+
+# Set up OpenAI client with the provided API key
+openai_client = None
+if OPENAI_API_KEY:
+    try:
+        openai_client = OpenAI(api_key=OPENAI_API_KEY)
+        print("🤖 OpenAI client initialized successfully")
+    except Exception as e:
+        print(f"❌ Failed to initialize OpenAI client: {e}")
+        openai_client = None
+else:
+    print("❌ OpenAI client not initialized - no API key found")
+
+# Emotional Analysis Components
+class EmotionalState(Enum):
+    JOYFUL = "joyful"
+    SAD = "sad"
+    ANGRY = "angry"
+    EXCITED = "excited"
+    FRUSTRATED = "frustrated"
+    CALM = "calm"
+    WORRIED = "worried"
+    SURPRISED = "surprised"
+    CONFIDENT = "confident"
+    EMPATHETIC = "empathetic"
+
+class EmotionalIntensity(Enum):
+    LOW = 0.3
+    MEDIUM = 0.6
+    HIGH = 0.9
+
+@dataclass
+class EmotionalContext:
+    primary_emotion: EmotionalState
+    intensity: float
+    confidence: float
+    triggers: List[str]
+    context_words: List[str]
+
+@dataclass
+class UserEmotionalProfile:
+    current_emotion: EmotionalState
+    emotion_history: List[EmotionalContext]
+    conversation_sentiment_trend: float
+    emotional_volatility: float
+    preferred_response_style: str
+
+class KeywordMatcher:
+    """
+    Multi-pattern keyword automaton with word-boundary matching.
+    Keywords (including phrases like 'fed up') are compiled once into a trie over
+    word tokens; match() tokenizes the text once and walks it in a single pass,
+    so 'mad' no longer fires inside 'made'.
+    Inflected forms ('angrily' for 'angry', 'saddened' for 'sad') only match
+    when they are listed for the keyword in inflections - suffixes are never
+    generated, so 'care' does not fire inside 'career'.
+    """
     
-    # Archetype-specific text processing
-    archetype_modifiers = {
-        'outbacker': {
-            'phrases': {'mate', 'fair dinkum', 'right-o', 'crikey'},
-            'style': 'australian_warmth',
-            'emphasis': 'hearty_delivery'
-        },
-        'rocker': {
-            'phrases': {'ROCK', 'RAGE', 'SAVAGE', 'BRUTAL', 'DESTROY', 'ANNIHILATE', 'VIOLENT', 'FIERCE'},
-            'style': 'brutal_aggressive_energy',
-            'emphasis': 'savage_delivery'
-        },
-        'clown': {
-            'phrases': {'ta-da', 'whoopee', 'ha-ha', 'surprise'},
-            'style': 'theatrical_joy',
-            'emphasis': 'exaggerated_delivery'
-        },
-        'royal': {
-            'phrases': {'indeed', 'certainly', 'one must', 'properly'},
-            'style': 'elegant_authority',
-            'emphasis': 'regal_delivery'
-        },
-        'beatnik': {
-            'phrases': {'dig it', 'cool', 'far out', 'zen'},
-            'style': 'poetic_flow',
-            'emphasis': 'contemplative_delivery'
-        },
-        'mystic': {
-            'phrases': {'the universe', 'energy', 'transcend', 'enlighten'},
-            'style': 'ethereal_wisdom',
-            'emphasis': 'mystical_delivery'
-        },
-        'fortune_teller': {
-            'phrases': {'I see', 'the cards reveal', 'destiny', 'future'},
-            'style': 'mysterious_insight',
-            'emphasis': 'prophetic_delivery'
-        },
-        'mad_professor': {
-            'phrases': {'eureka', 'fascinating', 'experiment', 'brilliant'},
-            'style': 'chaotic_genius',
-            'emphasis': 'manic_delivery'
-        },
-        'angel': {
-            'phrases': {'blessed', 'divine', 'holy', 'righteous', 'eternal', 'sacred', 'heavenly'},
-            'style': 'overwhelming_divine_grace',
-            'emphasis': 'celestial_delivery'
-        },
-        'devil': {
-            'phrases': {'delicious', 'tempting', 'wicked', 'sinful', 'corrupt', 'desire', 'darkness'},
-            'style': 'overwhelming_dark_seduction',
-            'emphasis': 'corrupting_delivery'
-        },
-        'school_master': {
-            'phrases': {'precisely', 'attention', 'learn', 'knowledge'},
-            'style': 'scholarly_authority',
-            'emphasis': 'educational_delivery'
-        },
-        'cowboy': {
-            'phrases': {'partner', 'reckon', 'howdy', 'frontier'},
-            'style': 'frontier_wisdom',
-            'emphasis': 'drawling_delivery'
-        },
-        'philosopher': {
-            'phrases': {'ponder', 'wisdom', 'truth', 'existence'},
-            'style': 'ancient_wisdom',
-            'emphasis': 'thoughtful_delivery'
-        },
-        'sprite': {
-            'phrases': {'magical', 'sparkle', 'whimsical', 'enchant'},
-            'style': 'magical_energy',
-            'emphasis': 'playful_delivery'
-        },
-        'pirate': {
-            'phrases': {'ahoy', 'matey', 'treasure', 'adventure'},
-            'style': 'seafaring_boldness',
-            'emphasis': 'commanding_delivery'
-        },
-        'street_urchin': {
-            'phrases': {'street smart', 'savvy', 'hustle', 'clever'},
-            'style': 'streetwise_energy',
-            'emphasis': 'quick_delivery'
-        },
-        'hypnotist': {
-            'phrases': {'relax', 'focus', 'deeper', 'surrender'},
-            'style': 'entrancing_control',
-            'emphasis': 'hypnotic_delivery'
-        },
-        'sports_coach': {
-            'phrases': {'champion', 'victory', 'team', 'push harder'},
-            'style': 'motivating_energy',
-            'emphasis': 'powerful_delivery'
-        },
-        'vampire': {
-            'phrases': {'eternal', 'blood', 'midnight', 'immortal'},
-            'style': 'seductive_darkness',
-            'emphasis': 'intense_delivery'
-        },
-        'punk': {
-            'phrases': {'rebel', 'fight', 'anarchist', 'raw'},
-            'style': 'rebellious_edge',
-            'emphasis': 'defiant_delivery'
-        },
-        'wizard': {
-            'phrases': {'magic', 'spell', 'ancient', 'power'},
-            'style': 'mystical_authority',
-            'emphasis': 'theatrical_delivery'
-        },
-        'witch': {
-            'phrases': {'enchant', 'potion', 'mystical', 'wisdom'},
-            'style': 'enchanting_power',
-            'emphasis': 'magical_delivery'
+    TOKEN_PATTERN = re.compile(r"\w+")
+    
+    def __init__(self, keyword_table, inflections=None):
+        # keyword_table: {label: [keyword, ...]} - a keyword may appear under several labels
+        # inflections: {keyword: [form, ...]} - extra single-word forms that count as the keyword
+        inflections = inflections or {}
+        self._root = {}
+        for label, keywords in keyword_table.items():
+            for position, keyword in enumerate(keywords):
+                for form in [keyword, *inflections.get(keyword, ())]:
+                    node = self._root
+                    for word in self.TOKEN_PATTERN.findall(form.lower()):
+                        node = node.setdefault(word, {})
+                    node.setdefault(None, []).append((label, position, keyword))
+    
+    def match(self, text):
+        """Return {label: {position: keyword}} for every keyword present in text"""
+        tokens = self.TOKEN_PATTERN.findall(text.lower())
+        matches = {}
+        for start in range(len(tokens)):
+            node = self._root.get(tokens[start])
+            offset = start + 1
+            while node is not None:
+                for label, position, keyword in node.get(None, ()):
+                    matches.setdefault(label, {})[position] = keyword
+                if offset >= len(tokens):
+                    break
+                node = node.get(tokens[offset])
+                offset += 1
+        return matches
+
+class EmotionalIntelligenceEngine:
+    """
+    Advanced emotional intelligence engine that analyzes user input
+    and generates appropriate emotional responses
+    """
+    
+    def __init__(self):
+        self.emotion_keywords = {
+            EmotionalState.JOYFUL: ['happy', 'excited', 'great', 'awesome', 'wonderful', 'love', 'amazing', 'fantastic', 'thrilled', 'delighted'],
+            EmotionalState.SAD: ['sad', 'upset', 'down', 'depressed', 'disappointed', 'hurt', 'lonely', 'miserable', 'unhappy'],
+            EmotionalState.ANGRY: ['angry', 'mad', 'furious', 'annoyed', 'irritated', 'frustrated', 'pissed', 'rage', 'outraged'],
+            EmotionalState.EXCITED: ['excited', 'pumped', 'energetic', 'enthusiastic', 'eager', 'thrilled', 'hyped', 'stoked'],
+            EmotionalState.FRUSTRATED: ['frustrated', 'annoyed', 'stuck', 'blocked', 'irritated', 'fed up', 'exasperated'],
+            EmotionalState.CALM: ['calm', 'peaceful', 'relaxed', 'serene', 'tranquil', 'composed', 'zen', 'centered'],
+            EmotionalState.WORRIED: ['worried', 'anxious', 'concerned', 'nervous', 'stressed', 'troubled', 'uneasy'],
+            EmotionalState.SURPRISED: ['surprised', 'shocked', 'amazed', 'astonished', 'stunned', 'wow', 'incredible'],
+            EmotionalState.CONFIDENT: ['confident', 'sure', 'certain', 'determined', 'strong', 'capable', 'ready'],
+            EmotionalState.EMPATHETIC: ['understand', 'feel', 'sorry', 'empathize', 'relate', 'compassion', 'care']
+        }
+        
+        self.emotional_response_templates = {
+            EmotionalState.JOYFUL: {
+                'voice_tone': 'warm',
+                'response_style': 'enthusiastic and supportive',
+                'conversation_approach': 'share in the excitement, be encouraging'
+            },
+            EmotionalState.SAD: {
+                'voice_tone': 'gentle',
+                'response_style': 'compassionate and understanding',
+                'conversation_approach': 'offer comfort and support, validate feelings'
+            },
+            EmotionalState.ANGRY: {
+                'voice_tone': 'calm',
+                'response_style': 'patient and de-escalating',
+                'conversation_approach': 'acknowledge frustration, help find solutions'
+            },
+            EmotionalState.EXCITED: {
+                'voice_tone': 'energetic',
+                'response_style': 'match energy level, build on excitement',
+                'conversation_approach': 'match energy level, build on excitement'
+            },
+            EmotionalState.FRUSTRATED: {
+                'voice_tone': 'patient',
+                'response_style': 'helpful problem-solving approach',
+                'conversation_approach': 'focus on solutions, break down problems'
+            },
+            EmotionalState.CALM: {
+                'voice_tone': 'neutral',
+                'response_style': 'balanced and informative',
+                'conversation_approach': 'respond naturally and supportively'
+            },
+            EmotionalState.WORRIED: {
+                'voice_tone': 'reassuring',
+                'response_style': 'calming and supportive',
+                'conversation_approach': 'provide reassurance, offer practical help'
+            },
+            EmotionalState.SURPRISED: {
+                'voice_tone': 'engaged',
+                'response_style': 'curious and responsive',
+                'conversation_approach': 'explore the surprise, ask follow-up questions'
+            },
+            EmotionalState.CONFIDENT: {
+                'voice_tone': 'assured',
+                'response_style': 'supportive, reinforce positive feelings',
+                'conversation_approach': 'be supportive, reinforce positive feelings'
+            },
+            EmotionalState.EMPATHETIC: {
+                'voice_tone': 'warm',
+                'response_style': 'understanding and connecting',
+                'conversation_approach': 'validate emotions, create connection'
+            }
+        }
+        
+        # Curated inflections per keyword - hand-picked so no unrelated word is caught
+        self.emotion_keyword_inflections = {
+            'happy': ['happily', 'happier', 'happiest', 'happiness'],
+            'excited': ['excitedly'],
+            'wonderful': ['wonderfully'],
+            'love': ['loved', 'loves', 'loving', 'lovingly'],
+            'amazing': ['amazingly'],
+            'fantastic': ['fantastically'],
+            'sad': ['sadly', 'sadder', 'saddest', 'sadness', 'saddened'],
+            'upset': ['upsetting'],
+            'hurt': ['hurts', 'hurting'],
+            'lonely': ['loneliness'],
+            'miserable': ['miserably'],
+            'unhappy': ['unhappily', 'unhappiness'],
+            'angry': ['angrily', 'angrier', 'angriest'],
+            'mad': ['madly', 'maddening', 'maddened'],
+            'furious': ['furiously'],
+            'rage': ['raging', 'raged'],
+            'energetic': ['energetically'],
+            'enthusiastic': ['enthusiastically'],
+            'eager': ['eagerly', 'eagerness'],
+            'calm': ['calmly', 'calmness'],
+            'peaceful': ['peacefully'],
+            'serene': ['serenely'],
+            'worried': ['worriedly'],
+            'anxious': ['anxiously', 'anxiety'],
+            'nervous': ['nervously', 'nervousness'],
+            'incredible': ['incredibly'],
+            'confident': ['confidently'],
+            'understand': ['understands', 'understanding'],
+            'feel': ['feels', 'feeling', 'feelings'],
+            'compassion': ['compassionate'],
+            'care': ['cares', 'cared', 'caring']
+        }
+        self.keyword_matcher = KeywordMatcher(self.emotion_keywords, self.emotion_keyword_inflections)
+        
+        # Bounded LRU of per-user profiles, shared by concurrent handlers
+        self.user_profiles = OrderedDict()
+        self.max_user_profiles = EMOTION_PROFILE_MAX_USERS
+        self._profiles_lock = threading.Lock()
+    
+    def analyze_user_emotion(self, text: str, user_id: str = "default") -> EmotionalContext:
+        """Analyze emotional content of user input"""
+        return self._build_emotional_context(self.keyword_matcher.match(text))
+    
+    def analyze_user_emotions_batch(self, texts: List[str]) -> List[EmotionalContext]:
+        """Score many utterances at once, e.g. for offline transcript analysis"""
+        match = self.keyword_matcher.match
+        return [self._build_emotional_context(match(text)) for text in texts]
+    
+    def _build_emotional_context(self, matches: Dict) -> EmotionalContext:
+        # Score each emotion by the number of its distinct keywords present
+        emotion_scores = {emotion: len(found) for emotion, found in matches.items()}
+
+        # Default to calm if no strong emotions detected
+        if not emotion_scores:
+            primary_emotion = EmotionalState.CALM
+            intensity = 0.2
+            confidence = 0.7
+        else:
+            # Find dominant emotion (ties go to the first emotion in the keyword table)
+            primary_emotion = max((emotion for emotion in self.emotion_keywords if emotion in emotion_scores), key=emotion_scores.get)
+            max_score = emotion_scores[primary_emotion]
+            
+            # Calculate intensity and confidence
+            intensity = min(max_score * 0.3, 1.0)
+            confidence = min(max_score * 0.2 + 0.5, 1.0)
+
+        # Extract context triggers in keyword table order
+        triggers = []
+        context_words = []
+        
+        for emotion in self.emotion_keywords:
+            found = matches.get(emotion)
+            if found:
+                found_words = [found[position] for position in sorted(found)]
+                triggers.extend(found_words)
+                if emotion == primary_emotion:
+                    context_words = found_words
+
+        return EmotionalContext(
+            primary_emotion=primary_emotion,
+            intensity=intensity,
+            confidence=confidence,
+            triggers=triggers,
+            context_words=context_words
+        )
+
+    def generate_emotionally_aware_response(self, user_input: str, user_id: str = "default") -> Dict:
+        """Generate emotionally aware response configuration"""
+        
+        # Analyze user's emotional state
+        emotional_context = self.analyze_user_emotion(user_input, user_id)
+        
+        with self._profiles_lock:
+            # Get or create user profile
+            if user_id not in self.user_profiles:
+                self.user_profiles[user_id] = UserEmotionalProfile(
+                    current_emotion=emotional_context.primary_emotion,
+                    emotion_history=[],
+                    conversation_sentiment_trend=0.0,
+                    emotional_volatility=0.0,
+                    preferred_response_style="balanced"
+                )
+            self.user_profiles.move_to_end(user_id)
+            while len(self.user_profiles) > self.max_user_profiles:
+                self.user_profiles.popitem(last=False)
+            
+            profile = self.user_profiles[user_id]
+            profile.emotion_history.append(emotional_context)
+            profile.current_emotion = emotional_context.primary_emotion
+            
+            # Keep history manageable
+            if len(profile.emotion_history) > 10:
+                profile.emotion_history = profile.emotion_history[-10:]
+        
+        # Get response configuration
+        response_config = self.emotional_response_templates[emotional_context.primary_emotion]
+        
+        return {
+            'detected_emotion': emotional_context.primary_emotion.value,
+            'emotion_intensity': emotional_context.intensity,
+            'confidence': emotional_context.confidence,
+            'voice_tone': response_config['voice_tone'],
+            'response_style': response_config['response_style'],
+            'conversation_approach': response_config['conversation_approach'],
+            'emotional_subtext': f"{emotional_context.primary_emotion.value} state",
+            'response_suggestion': "respond helpfully",
+            'user_profile': {
+                'current_emotion': profile.current_emotion.value,
+                'sentiment_trend': profile.conversation_sentiment_trend,
+                'emotional_volatility': profile.emotional_volatility
+            }
+        }
+
+# Global emotional intelligence engine
+emotional_engine = EmotionalIntelligenceEngine()
+
+@dataclass
+class EmotionalRequestContext:
+    """Per-request emotional analysis, computed once and passed to the chat and TTS stages"""
+    user_input: str
+    session_id: str
+    emotional_analysis: Dict
+    emotion_mode: str
+    stage_timings: Dict[str, float] = field(default_factory=dict)
+    
+    @contextmanager
+    def stage(self, name):
+        """Time one pipeline stage into stage_timings (seconds)"""
+        stage_start = time.time()
+        try:
+            yield
+        finally:
+            self.stage_timings[name] = self.stage_timings.get(name, 0) + time.time() - stage_start
+
+def analyze_emotional_request(user_input: str, session_id: str) -> EmotionalRequestContext:
+    """Run the emotional analysis for a request exactly once"""
+    stage_start = time.time()
+    emotional_analysis = emotional_engine.generate_emotionally_aware_response(user_input, session_id)
+    return EmotionalRequestContext(
+        user_input=user_input,
+        session_id=session_id,
+        emotional_analysis=emotional_analysis,
+        emotion_mode=emotional_analysis.get('voice_tone', 'natural'),
+        stage_timings={'analysis': time.time() - stage_start}
+    )
+
+def openai_chat_headers():
+    """Headers for direct chat completions calls"""
+    return {
+        "Authorization": f"Bearer {OPENAI_API_KEY}",
+        "Content-Type": "application/json"
+    }
+
+def build_fast_chat_payload(user_input: str, session_id: str = "default") -> Dict:
+    """Build the speed-optimized chat completions payload from the session history"""
+    # Get conversation history for context
+    conversation_history = conversation_sessions.get_history(session_id)
+    
+    # Build simple, fast prompt - no complex emotional analysis
+    messages = [
+        {"role": "system", "content": "You are a helpful, friendly AI assistant. Keep responses concise and natural. Respond in 1-2 sentences when possible."}
+    ]
+    
+    # Add recent context (last 3 exchanges only for speed)
+    recent_history = conversation_history[-6:] if len(conversation_history) > 6 else conversation_history
+    for msg in recent_history:
+        if msg.get("user"):
+            messages.append({"role": "user", "content": msg["user"]})
+        if msg.get("assistant"):
+            messages.append({"role": "assistant", "content": msg["assistant"]})
+    
+    # Add current user input
+    messages.append({"role": "user", "content": user_input})
+    
+    return {
+        "model": "gpt-3.5-turbo",  # Faster than GPT-4
+        "messages": messages,
+        "max_tokens": 150,  # Limit response length for speed
+        "temperature": 0.7
+    }
+
+def record_fast_chat_exchange(session_id: str, user_input: str, ai_response: str):
+    """Store a fast-mode exchange in the session history (keep last 10 exchanges only)"""
+    conversation_sessions.append(session_id, {
+        "user": user_input,
+        "assistant": ai_response,
+        "timestamp": time.time()
+    }, max_messages=10)
+
+def generate_fast_chatgpt_response(user_input: str, session_id: str = "default") -> str:
+    """
+    SPEED OPTIMIZED: Fast ChatGPT response without heavy emotional processing
+    Target: <3 seconds total response time
+    """
+    if not OPENAI_API_KEY:
+        return "I'm here to help! What can I do for you?"
+    
+    try:
+        payload = build_fast_chat_payload(user_input, session_id)
+        
+        response = upstream_sessions.post(
+            OPENAI_CHAT_URL,
+            headers=openai_chat_headers(),
+            json=payload,
+            timeout=6  # 6 second total timeout
+        )
+        
+        if response.status_code == 200:
+            data = response.json()
+            ai_response = data['choices'][0]['message']['content'].strip()
+            record_fast_chat_exchange(session_id, user_input, ai_response)
+            return ai_response
+        else:
+            print(f"❌ ChatGPT API Error: {response.status_code} - {response.text}")
+            return "I'm here to help! What would you like to know?"
+        
+    except requests.exceptions.Timeout:
+        return "I'm thinking as fast as I can! Could you try again?"
+    except Exception as e:
+        print(f"⚡ Fast ChatGPT error: {e}")
+        return "I'm here to help! What can I do for you?"
+
+def stream_chat_completion_tokens(payload: Dict, timeout: float = 6):
+    """Yield content deltas from a streamed chat completions call as they arrive"""
+    response = upstream_sessions.post(
+        OPENAI_CHAT_URL,
+        headers=openai_chat_headers(),
+        json={**payload, "stream": True},
+        stream=True,
+        timeout=timeout
+    )
+    try:
+        if response.status_code != 200:
+            raise requests.exceptions.HTTPError(f"ChatGPT API Error: {response.status_code} - {response.text}")
+        
+        # chunk_size=None hands over each chunked-encoding frame as it arrives instead of waiting for 512 bytes.
+        # Lines stay bytes until split: text/event-stream has no charset, so decode_unicode would fall back to ISO-8859-1
+        for raw_line in response.iter_lines(chunk_size=None):
+            line = raw_line.decode('utf-8')
+            # Server-sent events: "data: {json}" lines, terminated by "data: [DONE]"
+            if not line or not line.startswith('data:'):
+                continue
+            event = line[len('data:'):].strip()
+            if event == '[DONE]':
+                break
+            choices = json.loads(event).get('choices') or [{}]
+            token = choices[0].get('delta', {}).get('content')
+            if token:
+                yield token
+    finally:
+        response.close()
+
+def record_time_to_first_token(time_to_first_token):
+    """Record one streamed chat request's time-to-first-token"""
+    metrics.observe('chat_time_to_first_token_seconds', time_to_first_token)
+
+def generate_fast_chatgpt_response_stream(user_input: str, session_id: str = "default", stream_stats: Optional[Dict] = None):
+    """
+    Streaming variant of generate_fast_chatgpt_response: yields text deltas as they
+    arrive so callers can show captions or start TTS early. stream_stats receives
+    time_to_first_token and the full response; the exchange is stored in
+    conversation_sessions once the stream completes.
+    """
+    stream_stats = stream_stats if stream_stats is not None else {}
+    if not OPENAI_API_KEY:
+        stream_stats['response'] = "I'm here to help! What can I do for you?"
+        yield stream_stats['response']
+        return
+    
+    start_time = time.time()
+    parts = []
+    try:
+        for token in stream_chat_completion_tokens(build_fast_chat_payload(user_input, session_id)):
+            if not parts:
+                stream_stats['time_to_first_token'] = time.time() - start_time
+                record_time_to_first_token(stream_stats['time_to_first_token'])
+            parts.append(token)
+            yield token
+    except requests.exceptions.Timeout:
+        if not parts:
+            parts.append("I'm thinking as fast as I can! Could you try again?")
+            yield parts[0]
+    except Exception as e:
+        print(f"⚡ Fast ChatGPT stream error: {e}")
+        if not parts:
+            parts.append("I'm here to help! What can I do for you?")
+            yield parts[0]
+    
+    stream_stats['response'] = ''.join(parts).strip()
+    stream_stats['chatgpt_time'] = time.time() - start_time
+    if stream_stats['response'] and 'time_to_first_token' in stream_stats:
+        record_fast_chat_exchange(session_id, user_input, stream_stats['response'])
+
+def build_emotional_chat_payload(user_input: str, emotional_analysis: Dict) -> Dict:
+    """Build the emotionally-aware chat completions payload for an analysed user message"""
+    # Create emotionally-aware system prompt
+    emotional_prompt = f"""
+    You are an emotionally intelligent AI assistant. Based on analysis of the user's message:
+    
+    DETECTED EMOTION: {emotional_analysis['detected_emotion']} (intensity: {emotional_analysis['emotion_intensity']:.2f})
+    EMOTIONAL CONTEXT: {emotional_analysis['emotional_subtext']}
+    
+    RESPONSE GUIDELINES:
+    - Style: {emotional_analysis['response_style']}
+    - Approach: {emotional_analysis['conversation_approach']}
+    - Voice should be: {emotional_analysis['voice_tone']}
+    
+    Respond to the user's message with appropriate emotional intelligence. Match their emotional state appropriately - don't ignore their feelings, but help guide them toward a positive resolution if needed.
+    
+    Keep your response conversational, empathetic, and under 150 words.
+    """
+    
+    return {
+        "model": "gpt-4",
+        "messages": [
+            {"role": "system", "content": emotional_prompt},
+            {"role": "user", "content": user_input}
+        ],
+        "temperature": 0.7,
+        "max_tokens": 300
+    }
+
+def record_emotional_chat_exchange(session_id: str, user_input: str, ai_response: str, emotional_analysis: Dict):
+    """Store an emotional-mode exchange in the session history"""
+    conversation_sessions.append(session_id, {
+        'user_input': user_input,
+        'ai_response': ai_response,
+        'emotional_analysis': emotional_analysis,
+        'timestamp': time.time()
+    })
+
+def generate_emotionally_aware_chatgpt_response(user_input: str, session_id: str, request_context: Optional[EmotionalRequestContext] = None) -> str:
+    """
+    Generate ChatGPT response that's emotionally aware and appropriate.
+    Pass the request's EmotionalRequestContext to reuse its analysis instead of analysing again.
+    """
+    if not OPENAI_API_KEY:
+        return "I understand your feelings. I'm here to help you with whatever you need."
+    
+    try:
+        if request_context is None:
+            request_context = analyze_emotional_request(user_input, session_id)
+        emotional_analysis = request_context.emotional_analysis
+        
+        with request_context.stage('prompt_build'):
+            payload = build_emotional_chat_payload(user_input, emotional_analysis)
+        
+        with request_context.stage('llm'):
+            response = upstream_sessions.post(
+                OPENAI_CHAT_URL,
+                headers=openai_chat_headers(),
+                json=payload,
+                timeout=15
+            )
+        
+        if response.status_code == 200:
+            data = response.json()
+            ai_response = data['choices'][0]['message']['content'].strip()
+            
+            # Store conversation context
+            record_emotional_chat_exchange(session_id, user_input, ai_response, emotional_analysis)
+            
+            return ai_response
+        else:
+            print(f"❌ ChatGPT API Error: {response.status_code} - {response.text}")
+            return f"I understand you're feeling {emotional_analysis['detected_emotion']}. I'm here to help you with whatever you need."
+        
+    except Exception as e:
+        print(f"Error generating emotionally aware response: {e}")
+        return "I understand your feelings. I'm here to help you with whatever you need."
+
+def create_wav_header(data_size, file_size):
+    """Build a 24 kHz 16-bit mono PCM WAV header for the given chunk sizes"""
+    byte_rate = ORPHEUS_SAMPLE_RATE * 1 * 16 // 8
+    block_align = 1 * 16 // 8
+    
+    header = b'RIFF'
+    header += struct.pack('<I', file_size)
+    header += b'WAVE'
+    header += b'fmt '
+    header += struct.pack('<I', 16)
+    header += struct.pack('<H', 1)
+    header += struct.pack('<H', 1)
+    header += struct.pack('<I', ORPHEUS_SAMPLE_RATE)
+    header += struct.pack('<I', byte_rate)
+    header += struct.pack('<H', block_align)
+    header += struct.pack('<H', 16)
+    header += b'data'
+    header += struct.pack('<I', data_size)
+    
+    return header
+
+def create_orpheus_wav(raw_audio_data):
+    """Convert raw Orpheus audio to proper WAV format with optimizations"""
+    data_size = len(raw_audio_data)
+    return create_wav_header(data_size, data_size + 36) + raw_audio_data
+
+def create_streaming_wav_header():
+    """WAV header for audio of unknown length - players read until the stream ends"""
+    return create_wav_header(0xFFFFFFFF, 0xFFFFFFFF)
+
+def heuristic_max_tokens(word_count, base_max_tokens):
+    """Word-count max_tokens guess used until a voice has a fitted model"""
+    estimated_tokens = word_count * 15  # More generous estimate for complex speech
+    
+    # For conversation responses, be more generous with tokens
+    if word_count > 30:  # Longer responses (typical ChatGPT)
+        min_tokens = max(1200, estimated_tokens)  # Ensure minimum for full response
+    else:
+        min_tokens = max(800, estimated_tokens)   # Shorter responses
+        
+    return min(min_tokens, base_max_tokens)
+
+def prepare_orpheus_request(text, voice_config, emotion_mode='natural', add_emotion_tags=True):
+    """Build the Orpheus payload, headers and tuning parameters shared by the sync and async clients"""
+    # Optimize text and parameters
+    word_count = len(text.split())
+    base_max_tokens = voice_config.get('max_tokens', 2200)
+    
+    # Clean up text
+    optimized_text = clean_orpheus_text(text)
+    
+    # EMOTIONAL ENHANCEMENT
+    # Get temperature based on emotion mode
+    profile = voice_profile_for_config(voice_config)
+    temperature_presets = profile.temperature_presets if profile is not None else voice_config.get(
+        'temperature_presets', DEFAULT_TEMPERATURE_PRESETS
+    )
+    base_temperature = temperature_presets.get(emotion_mode, 0.7)
+    
+    # Add contextual emotion tags if enabled
+    if add_emotion_tags:
+        optimized_text = enhance_text_with_emotions(optimized_text, voice_config)
+    
+    # Size max_tokens from the voice's fitted duration model once it has enough samples
+    estimator_key = MaxTokensEstimator.key_for(voice_config)
+    spoken_chars = MaxTokensEstimator.spoken_length(optimized_text)
+    heuristic_tokens = heuristic_max_tokens(word_count, base_max_tokens)
+    optimized_max_tokens, predicted_duration = max_tokens_estimator.estimate(
+        estimator_key, spoken_chars, heuristic_tokens, base_max_tokens
+    )
+    
+    if profile is not None:
+        payload = profile.build_payload(optimized_text, optimized_max_tokens, base_temperature)
+    else:
+        payload = {
+            "voice": voice_config['orpheus_voice'],
+            "prompt": optimized_text,
+            "max_tokens": optimized_max_tokens,
+            "temperature": base_temperature,  # Dynamic temperature based on emotion
+            "repetition_penalty": ORPHEUS_REPETITION_PENALTY
+        }
+    
+    headers = {
+        "Authorization": f"Api-Key {BASETEN_API_KEY}",
+        "Content-Type": "application/json"
+    }
+    
+    return {
+        'payload': payload,
+        'headers': headers,
+        'precision': voice_config.get('precision', 'fp8'),
+        'optimized_max_tokens': optimized_max_tokens,
+        'cache_max_tokens': heuristic_tokens,  # Stable across model updates - see audio_cache_key
+        'temperature': base_temperature,
+        'estimator_key': estimator_key,
+        'spoken_chars': spoken_chars,
+        'predicted_duration': predicted_duration
+    }
+
+def orpheus_capacity_error(priority='generate'):
+    """Result returned when a request's deadline passes before an Orpheus slot frees up"""
+    print(f"🚦 Orpheus at capacity ({orpheus_scheduler.limit} streams) - dropped {priority} request whose deadline passed in the queue")
+    return {
+        'success': False,
+        'error': f'Orpheus capacity exhausted ({orpheus_scheduler.limit} concurrent streams) - try again shortly',
+        'status_code': 503,
+        'fallback_used': None
+    }
+
+def build_orpheus_success_result(raw_audio_data, start_time, request_info, emotion_mode, add_emotion_tags, cache_hit=False):
+    """Turn raw Orpheus PCM into a WAV result and update the global performance metrics"""
+    global ORPHEUS_MODEL_AVAILABLE, ORPHEUS_DEPLOYMENT_STATUS
+    
+    # Kept in memory - handlers send it as binary or base64 without a disk round trip
+    wav_data = create_orpheus_wav(raw_audio_data)
+    
+    # Calculate metrics
+    audio_size = len(raw_audio_data)
+    duration = max(0.1, audio_size / (ORPHEUS_SAMPLE_RATE * 2))
+    generation_time = time.time() - start_time
+    
+    # Cache hits never reached Baseten - keep them out of the generation averages
+    if not cache_hit:
+        # Update global status
+        ORPHEUS_MODEL_AVAILABLE = True
+        ORPHEUS_DEPLOYMENT_STATUS = "ACTIVE"
+        
+        # Update performance metrics
+        voice = request_info['payload']['voice']
+        metrics.inc('orpheus_requests_total', voice=voice, precision=request_info['precision'])
+        metrics.observe('orpheus_generation_seconds', generation_time, voice=voice, precision=request_info['precision'])
+        
+        # Estimate tokens per second
+        metrics.inc('orpheus_estimated_tokens_total', audio_size // 100, voice=voice, precision=request_info['precision'])
+        
+        # Teach the max_tokens model how long this voice actually spoke
+        if 'estimator_key' in request_info:
+            max_tokens_estimator.record(
+                request_info['estimator_key'], request_info['spoken_chars'], duration,
+                request_info['optimized_max_tokens'], request_info['predicted_duration']
+            )
+        
+        # Performance warnings
+        if generation_time > 5.0:
+            print(f"⚠️ Slow generation: {generation_time:.1f}s (target: <3s)")
+    
+    performance_metrics = performance_metrics_snapshot()
+    return {
+        'success': True,
+        'audio_data': wav_data,
+        'content_type': 'audio/wav',
+        'duration': duration,
+        'generation_time': generation_time,
+        'file_size': len(wav_data),
+        'raw_audio_size': audio_size,
+        'streaming': False,  # Using standard for stability
+        'emotion_mode': emotion_mode,
+        'temperature_used': request_info['temperature'],
+        'fallback_used': None,
+        'cache_hit': cache_hit,
+        'performance': {
+            'tokens_per_second': performance_metrics['tokens_per_second'],
+            'avg_generation_time': performance_metrics['avg_generation_time'],
+            'precision': request_info['precision'],
+            'optimized_tokens': request_info['optimized_max_tokens'],
+            'emotion_enhanced': add_emotion_tags
+        }
+    }
+
+def orpheus_unavailable_reason(status_code, error_text):
+    """'deployment waking up' / 'deployment inactive' for a Baseten error meaning the model is not serving, else None"""
+    # Check for deployment waking up or model not found
+    if status_code == 404 or "model_id" in error_text.lower():
+        return 'deployment waking up'
+    # Check for deactivation error
+    if "deactivated" in error_text.lower() or "needs to be activated" in error_text.lower():
+        return 'deployment inactive'
+    return None
+
+def should_fallback_after_orpheus_error(status_code, error_text):
+    """
+    Inspect a failed Orpheus response, update the deployment status and
+    report whether the OpenAI TTS fallback should take over
+    """
+    global ORPHEUS_MODEL_AVAILABLE, ORPHEUS_DEPLOYMENT_STATUS
+    
+    print(f"❌ Orpheus API Error: {status_code} - {error_text}")
+    
+    reason = orpheus_unavailable_reason(status_code, error_text)
+    if reason == 'deployment waking up':
+        print(f"🔄 Orpheus deployment still waking up - using OpenAI TTS fallback")
+        return True
+        
+    if reason == 'deployment inactive':
+        ORPHEUS_DEPLOYMENT_STATUS = "INACTIVE"
+        ORPHEUS_MODEL_AVAILABLE = False
+        print(f"🚨 Orpheus deployment detected as INACTIVE - using OpenAI TTS fallback")
+        return True
+    
+    return False
+
+def record_orpheus_outcome(circuit_ticket, status_code, error_text=''):
+    """
+    Report one Baseten call to orpheus_circuit with the ticket allow_request()
+    gave it. status_code None means the connection or read failed (error_text
+    names the exception). A sleeping deployment opens the circuit at once;
+    5xx/429 count towards the threshold; any other answer shows Baseten is up.
+    """
+    if status_code is None:
+        orpheus_circuit.record_failure(circuit_ticket, error_text or 'connection failed')
+        return
+    reason = orpheus_unavailable_reason(status_code, error_text)
+    if reason is not None:
+        orpheus_circuit.record_failure(circuit_ticket, reason, trip=True)
+    elif status_code >= 500 or status_code == 429:
+        orpheus_circuit.record_failure(circuit_ticket, f'HTTP {status_code}')
+    else:
+        orpheus_circuit.record_success(circuit_ticket)
+
+class OrpheusStreamError(Exception):
+    """Raised by stream_orpheus_tts when predict_stream fails before any audio is sent"""
+    
+    def __init__(self, status_code, error_text):
+        super().__init__(f'Orpheus API error: {status_code} - {error_text}')
+        self.status_code = status_code
+        self.error_text = error_text
+
+class OrpheusCircuitOpenError(Exception):
+    """Raised by stream_orpheus_tts instead of calling Baseten while orpheus_circuit is open"""
+
+class OrpheusCallCancelled(Exception):
+    """Raised inside synthesize_orpheus_uncached once its CallCancellation fires (a hedge race it lost)"""
+
+def circuit_open_fallback(text, voice_config, emotion_mode):
+    """Skip Baseten while the circuit is open and answer from the OpenAI fallback straight away"""
+    print(f"🔌 Orpheus circuit {orpheus_circuit.state} - using OpenAI TTS fallback without calling Baseten")
+    return generate_openai_tts_fallback(text, voice_config, emotion_mode)
+
+def record_time_to_first_audio(time_to_first_audio, voice):
+    """Record one streamed request's time-to-first-audio"""
+    metrics.observe('orpheus_time_to_first_audio_seconds', time_to_first_audio, voice=voice)
+
+def stream_orpheus_tts(text, voice_config, emotion_mode='natural', add_emotion_tags=True, stream_stats=None, request_info=None, use_cache=True,
+                       priority='generate', deadline=None):
+    """
+    Yield raw 16-bit PCM from Orpheus predict_stream as it is generated.
+    Chunks are CHUNK_SIZE bytes and always hold whole samples.
+    stream_stats, if given, is filled with time_to_first_audio and bytes_streamed.
+    With use_cache, cached clips are replayed and completed streams are stored.
+    priority/deadline place the call in the orpheus_scheduler queue.
+    """
+    start_time = time.time()
+    stream_stats = stream_stats if stream_stats is not None else {}
+    if request_info is None:
+        request_info = prepare_orpheus_request(text, voice_config, emotion_mode, add_emotion_tags)
+    
+    cache_key = audio_cache_key(request_info) if use_cache else None
+    if cache_key is not None:
+        cached_audio = audio_cache.get(cache_key)
+        if cached_audio is not None:
+            print(f"💾 Audio cache hit (stream) - Voice: {voice_config['orpheus_voice']}, {len(cached_audio):,} bytes")
+            stream_stats['time_to_first_audio'] = time.time() - start_time
+            stream_stats['bytes_streamed'] = len(cached_audio)
+            stream_stats['cache_hit'] = True
+            for offset in range(0, len(cached_audio), CHUNK_SIZE):
+                yield cached_audio[offset:offset + CHUNK_SIZE]
+            return
+    
+    print(f"🌊 Streaming Orpheus API - Voice: {voice_config['orpheus_voice']}, Precision: {request_info['precision']}, Tokens: {request_info['optimized_max_tokens']}, Emotion: {emotion_mode}")
+    
+    circuit_ticket = orpheus_circuit.allow_request()
+    if circuit_ticket is None:
+        raise OrpheusCircuitOpenError(f'Orpheus circuit {orpheus_circuit.state}')
+    if orpheus_scheduler.acquire(priority, deadline) != 'granted':
+        raise OrpheusStreamError(503, f'Orpheus capacity exhausted ({orpheus_scheduler.limit} concurrent streams)')
+    
+    granted_at = time.time()
+    upstream_status = None  # Stays None if the connection or a read fails
+    bytes_streamed = 0
+    consumer_seconds = 0.0  # Time spent suspended at yield - a slow consumer is not upstream latency
+    upstream_seconds = None
+    reported = False  # Set once the call has an outcome - a stream abandoned by its consumer is not a sample
+    try:
+        response = upstream_sessions.post(
+            ORPHEUS_STREAM_ENDPOINT,
+            headers=request_info['headers'],
+            json=request_info['payload'],
+            timeout=REQUEST_TIMEOUT,
+            stream=True
+        )
+        upstream_status = response.status_code
+        try:
+            if response.status_code != 200:
+                reported = True
+                record_orpheus_outcome(circuit_ticket, response.status_code, response.text)
+                raise OrpheusStreamError(response.status_code, response.text)
+            record_orpheus_outcome(circuit_ticket, 200)
+            
+            pending = b''
+            streamed_chunks = [] if cache_key is not None else None
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                if not chunk:
+                    continue
+                pending += chunk
+                # Hold back a trailing odd byte so every chunk is whole samples
+                usable = len(pending) - (len(pending) % 2)
+                if not usable:
+                    continue
+                audio, pending = pending[:usable], pending[usable:]
+                if bytes_streamed == 0:
+                    stream_stats['time_to_first_audio'] = time.time() - start_time
+                    record_time_to_first_audio(stream_stats['time_to_first_audio'], voice_config.get('orpheus_voice', 'unknown'))
+                bytes_streamed += len(audio)
+                stream_stats['bytes_streamed'] = bytes_streamed
+                if streamed_chunks is not None:
+                    streamed_chunks.append(audio)
+                yielded_at = time.time()
+                yield audio
+                consumer_seconds += time.time() - yielded_at
+            upstream_seconds = time.time() - granted_at - consumer_seconds
+            reported = True
+            
+            # Only a stream that ran to completion is worth replaying
+            if streamed_chunks:
+                audio_cache.put(cache_key, voice_config['orpheus_voice'], b''.join(streamed_chunks))
+        finally:
+            response.close()
+    except requests.exceptions.RequestException as e:
+        # A read that fails mid-stream has already reported its 200 - only failed connections count here
+        if upstream_status is None:
+            record_orpheus_outcome(circuit_ticket, None, type(e).__name__)
+        upstream_status = None
+        reported = True
+        raise
+    finally:
+        orpheus_scheduler.release()
+        if reported:
+            orpheus_concurrency.record(granted_at, upstream_status, bytes_streamed, upstream_seconds)
+    
+    if 'time_to_first_audio' in stream_stats:
+        print(f"🌊 First audio after {stream_stats['time_to_first_audio']:.2f}s, streamed {stream_stats['bytes_streamed']:,} bytes in {time.time() - start_time:.1f}s")
+
+def synthesize_orpheus_uncached(text, voice_config, request_info, cache_key, start_time, use_streaming, emotion_mode, add_emotion_tags,
+                                priority='generate', deadline=None, cancellation=None):
+    """
+    Upstream half of generate_orpheus_tts_optimized: Baseten call, cache fill
+    and fallbacks. cancellation (a CallCancellation, non-streaming calls only)
+    lets synthesize_orpheus_hedged abandon the queue wait or the response body.
+    """
+    try:
+        if use_streaming:
+            # Pull the clip through predict_stream so time-to-first-audio is measured
+            stream_stats = {}
+            raw_audio_data = b''.join(stream_orpheus_tts(text, voice_config, emotion_mode, add_emotion_tags, stream_stats, request_info,
+                                                         use_cache=False, priority=priority, deadline=deadline))
+            audio_cache.put(cache_key, voice_config['orpheus_voice'], raw_audio_data)
+            result = build_orpheus_success_result(raw_audio_data, start_time, request_info, emotion_mode, add_emotion_tags)
+            result['streaming'] = True
+            result['time_to_first_audio'] = stream_stats.get('time_to_first_audio')
+            return result
+        
+        circuit_ticket = orpheus_circuit.allow_request()
+        if circuit_ticket is None:
+            return circuit_open_fallback(text, voice_config, emotion_mode)
+        
+        print(f"🚀 Calling Optimized Orpheus API - Voice: {voice_config['orpheus_voice']}, Precision: {request_info['precision']}, Tokens: {request_info['optimized_max_tokens']}, Emotion: {emotion_mode}")
+        
+        # Wait for a free upstream stream - conversation turns are dispatched ahead of generate and batch work
+        if orpheus_scheduler.acquire(priority, deadline, cancellation) != 'granted':
+            if cancellation is not None and cancellation.cancelled:
+                raise OrpheusCallCancelled()
+            return orpheus_capacity_error(priority)
+
+        granted_at = time.time()
+        response = None
+        try:
+            if cancellation is not None and cancellation.cancelled:
+                raise OrpheusCallCancelled()
+            # Streamed so a cancelled call can close the connection instead of downloading the clip
+            response = upstream_sessions.post(ORPHEUS_ENDPOINT, headers=request_info['headers'], json=request_info['payload'], timeout=REQUEST_TIMEOUT,
+                                              stream=True)
+            if cancellation is not None and not cancellation.on_cancel(response.close):
+                raise OrpheusCallCancelled()
+            audio_data = response.content
+            if cancellation is not None and cancellation.cancelled:
+                raise OrpheusCallCancelled()
+        except OrpheusCallCancelled:
+            raise
+        except Exception as e:
+            # Reading a response closed by cancel() fails - that is not an upstream error
+            if cancellation is not None and cancellation.cancelled:
+                raise OrpheusCallCancelled() from e
+            if isinstance(e, requests.exceptions.RequestException):
+                record_orpheus_outcome(circuit_ticket, None, type(e).__name__)
+            orpheus_concurrency.record(granted_at, None)
+            raise
+        finally:
+            orpheus_scheduler.release()
+            if response is not None:
+                response.close()
+        orpheus_concurrency.record(granted_at, response.status_code, len(audio_data))
+        record_orpheus_outcome(circuit_ticket, response.status_code, response.text if response.status_code != 200 else '')
+        
+        if response.status_code == 200:
+            audio_cache.put(cache_key, voice_config['orpheus_voice'], response.content)
+            return build_orpheus_success_result(response.content, start_time, request_info, emotion_mode, add_emotion_tags)
+        else:
+            # Handle specific error cases
+            if should_fallback_after_orpheus_error(response.status_code, response.text):
+                return generate_openai_tts_fallback(text, voice_config, emotion_mode)
+                
+            return {
+                'success': False,
+                'error': f'Orpheus API error: {response.status_code} - {response.text}',
+                'fallback_used': None
+            }
+            
+    except OrpheusCircuitOpenError:
+        return circuit_open_fallback(text, voice_config, emotion_mode)
+    except OrpheusCallCancelled:
+        return {
+            'success': False,
+            'error': 'Orpheus call cancelled',
+            'fallback_used': None
+        }
+    except OrpheusStreamError as e:
+        if e.status_code == 503:
+            return orpheus_capacity_error(priority)
+        if should_fallback_after_orpheus_error(e.status_code, e.error_text):
+            return generate_openai_tts_fallback(text, voice_config, emotion_mode)
+        return {
+            'success': False,
+            'error': str(e),
+            'fallback_used': None
+        }
+    except requests.exceptions.Timeout:
+        print(f"⏰ Orpheus API timeout - using OpenAI TTS fallback")
+        return generate_openai_tts_fallback(text, voice_config, emotion_mode)
+    except Exception as e:
+        print(f"💥 Orpheus TTS error: {str(e)} - using OpenAI TTS fallback")
+        return generate_openai_tts_fallback(text, voice_config, emotion_mode)
+
+def pick_hedge_winner(current, candidate):
+    """First successful result wins; a failure is only kept until the other call reports"""
+    return candidate if current is None or (not current[1]['success'] and candidate[1]['success']) else current
+
+def synthesize_orpheus_hedged(text, voice_config, request_info, cache_key, start_time, use_streaming, emotion_mode, add_emotion_tags,
+                              priority='generate', deadline=None):
+    """
+    synthesize_orpheus_uncached with tts_hedging: if the call is still running
+    at the voice's p90, a hedge (Orpheus again or the OpenAI fallback) races it
+    and the first successful result is returned. An Orpheus loser is cancelled:
+    it leaves the queue, or its response is closed and its slot released. A
+    call still waiting for response headers only notices once they arrive, and
+    an OpenAI fallback loser runs to completion with its result discarded.
+    """
+    args = (text, voice_config, request_info, cache_key, start_time, use_streaming, emotion_mode, add_emotion_tags, priority, deadline)
+    delay = None if use_streaming else tts_hedging.delay_for(request_info, priority)
+    if delay is None:
+        return synthesize_orpheus_uncached(*args)
+    
+    results = queue.Queue()
+    cancellations = {'primary': CallCancellation(), 'hedge': CallCancellation()}
+    
+    def run(source, function, *call_args):
+        try:
+            result = function(*call_args)
+        except Exception as e:
+            result = {'success': False, 'error': str(e), 'fallback_used': None}
+        results.put((source, result))
+    
+    Thread(target=run, args=('primary', synthesize_orpheus_uncached) + args + (cancellations['primary'],), daemon=True, name='hedge-primary').start()
+    try:
+        return results.get(timeout=delay)[1]
+    except queue.Empty:
+        pass
+    if not tts_hedging.try_hedge():
+        return results.get()[1]
+    
+    print(f"🪁 Orpheus call past p90 ({delay:.1f}s) - hedging to {tts_hedging.target} - Voice: {voice_config['orpheus_voice']}")
+    if tts_hedging.target == 'fallback':
+        hedge_call = (generate_openai_tts_fallback, text, voice_config, emotion_mode)
+    else:
+        hedge_call = (synthesize_orpheus_uncached,) + args + (cancellations['hedge'],)
+    Thread(target=run, args=('hedge',) + hedge_call, daemon=True, name='hedge').start()
+    
+    winner = pick_hedge_winner(None, results.get())
+    if not winner[1]['success']:
+        winner = pick_hedge_winner(winner, results.get())
+    tts_hedging.record(winner[0] == 'hedge')
+    # The race is decided - stop the other call (a no-op if it has already reported)
+    cancellations['hedge' if winner[0] == 'primary' else 'primary'].cancel()
+    return winner[1]
+
+def generate_orpheus_tts_optimized(text, voice_config, use_streaming=False, emotion_mode='natural', add_emotion_tags=True,
+                                   priority='generate', deadline=None):
+    """Generate audio using Orpheus TTS with performance optimizations and emotional controls"""
+    try:
+        start_time = time.time()
+        metrics.add_gauge('orpheus_active_streams', 1)
+        
+        request_info = prepare_orpheus_request(text, voice_config, emotion_mode, add_emotion_tags)
+        
+        # Identical prompt + parameters already synthesised - skip Baseten
+        cache_key = audio_cache_key(request_info)
+        cached_audio = audio_cache.get(cache_key)
+        if cached_audio is not None:
+            print(f"💾 Audio cache hit - Voice: {voice_config['orpheus_voice']}, {len(cached_audio):,} bytes")
+            return build_orpheus_success_result(cached_audio, start_time, request_info, emotion_mode, add_emotion_tags, cache_hit=True)
+        
+        # Same synthesis already in flight - wait for it instead of calling Baseten again
+        result, coalesced = orpheus_single_flight.run(
+            cache_key, synthesize_orpheus_hedged,
+            text, voice_config, request_info, cache_key, start_time, use_streaming, emotion_mode, add_emotion_tags, priority, deadline
+        )
+        if coalesced:
+            print(f"🔗 Coalesced with in-flight synthesis - Voice: {voice_config['orpheus_voice']}")
+            return coalesced_tts_result(result, start_time)
+        return result
+            
+    except Exception as e:
+        print(f"💥 Orpheus TTS error: {str(e)} - using OpenAI TTS fallback")
+        return generate_openai_tts_fallback(text, voice_config, emotion_mode)
+    finally:
+        metrics.add_gauge('orpheus_active_streams', -1)
+
+# Map Orpheus voices to OpenAI voices
+ORPHEUS_TO_OPENAI_VOICE = {
+    'leah': 'nova',
+    'jess': 'shimmer', 
+    'dan': 'onyx',
+    'zac': 'fable',
+    'zoe': 'nova',
+    'tara': 'alloy',
+    'leo': 'echo',
+    'mia': 'shimmer'
+}
+
+def openai_fallback_voice(voice_config):
+    return ORPHEUS_TO_OPENAI_VOICE.get(voice_config.get('orpheus_voice', 'leah'), 'nova')
+
+def build_openai_tts_fallback_result(audio_data, text, openai_voice, start_time, emotion_mode):
+    """Result dict for speech generated by the OpenAI fallback - shared by the sync and async clients"""
+    generation_time = time.time() - start_time
+    
+    # Estimate duration (rough calculation)
+    word_count = len(text.split())
+    estimated_duration = word_count * 0.6  # ~0.6 seconds per word average
+    
+    print(f"✅ OpenAI TTS generated in {generation_time:.1f}s using voice '{openai_voice}'")
+    metrics.inc('tts_fallback_total', voice=openai_voice)
+    
+    return {
+        'success': True,
+        'audio_data': audio_data,
+        'content_type': 'audio/mpeg',
+        'duration': estimated_duration,
+        'generation_time': generation_time,
+        'file_size': len(audio_data),
+        'raw_audio_size': 0,
+        'streaming': False,
+        'emotion_mode': emotion_mode,
+        'temperature_used': 0.7,
+        'fallback_used': 'openai_tts',
+        'openai_voice_used': openai_voice,
+        'performance': {
+            'tokens_per_second': 0,
+            'avg_generation_time': generation_time,
+            'precision': 'openai_standard',
+            'optimized_tokens': 0,
+            'emotion_enhanced': False
+        }
+    }
+
+def openai_tts_fallback_error(error):
+    return {
+        'success': False,
+        'error': error,
+        'fallback_used': 'openai_tts'
+    }
+
+def generate_openai_tts_fallback(text, voice_config, emotion_mode='natural'):
+    """Fallback TTS using OpenAI when Orpheus is unavailable"""
+    try:
+        start_time = time.time()
+        print(f"🔄 Using OpenAI TTS fallback for: {text[:50]}...")
+        openai_voice = openai_fallback_voice(voice_config)
+        
+        # Initialize OpenAI client
+        if not OPENAI_API_KEY:
+            return openai_tts_fallback_error('OpenAI API key not configured')
+            
+        client = openai_client or OpenAI(api_key=OPENAI_API_KEY)
+        
+        # Generate speech
+        response = client.audio.speech.create(
+            model="tts-1",  # or "tts-1-hd" for higher quality
+            voice=openai_voice,
+            input=text
+        )
+        
+        return build_openai_tts_fallback_result(response.content, text, openai_voice, start_time, emotion_mode)
+        
+    except Exception as e:
+        print(f"❌ OpenAI TTS fallback failed: {str(e)}")
+        return openai_tts_fallback_error(f'OpenAI TTS fallback error: {str(e)}')
+
+LONG_FORM_SENTENCE_PATTERN = re.compile(r'(?<=[.!?…])["\')\]]*\s+')
+LONG_FORM_CLAUSE_PATTERN = re.compile(r'(?<=[,;:—])\s+')
+
+def split_long_text(text, max_chars=LONG_FORM_SEGMENT_CHARS):
+    """Split text into segments of at most ~max_chars at sentence, then clause, then word boundaries"""
+    pieces = []
+    for sentence in LONG_FORM_SENTENCE_PATTERN.split(text):
+        if len(sentence) <= max_chars:
+            pieces.append(sentence)
+            continue
+        for clause in LONG_FORM_CLAUSE_PATTERN.split(sentence):
+            while len(clause) > max_chars:
+                cut = clause.rfind(' ', 0, max_chars)
+                cut = cut if cut > 0 else max_chars
+                pieces.append(clause[:cut])
+                clause = clause[cut:].lstrip()
+            pieces.append(clause)
+    
+    # Pack neighbouring pieces back together up to max_chars
+    segments = []
+    for piece in (piece.strip() for piece in pieces):
+        if not piece:
+            continue
+        if segments and len(segments[-1]) + 1 + len(piece) <= max_chars:
+            segments[-1] = f'{segments[-1]} {piece}'
+        else:
+            segments.append(piece)
+    return segments
+
+def crossfade_pcm(segments_pcm, crossfade_ms=LONG_FORM_CROSSFADE_MS):
+    """Join 16-bit mono PCM segments with a short linear crossfade at each seam"""
+    overlap = int(ORPHEUS_SAMPLE_RATE * crossfade_ms / 1000)
+    joined = array('h')
+    for pcm in segments_pcm:
+        samples = array('h', pcm[:len(pcm) - len(pcm) % 2])
+        fade = min(overlap, len(joined), len(samples))
+        if fade:
+            tail = len(joined) - fade
+            for i in range(fade):
+                weight = (i + 1) / (fade + 1)
+                joined[tail + i] = int(joined[tail + i] * (1 - weight) + samples[i] * weight)
+            samples = samples[fade:]
+        joined.extend(samples)
+    return joined.tobytes()
+
+def prepare_long_form_segments(text, voice_config, add_emotion_tags):
+    """Clean and enhance the whole text once, then split it - segments are synthesised without re-enhancing"""
+    enhanced_text = clean_orpheus_text(text)
+    if add_emotion_tags:
+        enhanced_text = enhance_text_with_emotions(enhanced_text, voice_config)
+    return split_long_text(enhanced_text)
+
+def fallback_failed_segments(segments, segment_results, voice_config, emotion_mode):
+    """Re-synthesise only the segments that failed (and did not already try it) with the OpenAI fallback"""
+    return [
+        result if result['success'] or result.get('fallback_used') else generate_openai_tts_fallback(segment, voice_config, emotion_mode)
+        for segment, result in zip(segments, segment_results)
+    ]
+
+def segment_pcm(result):
+    """Raw PCM of one segment - Orpheus WAVs lose their 44-byte header, fallback MP3s are decoded (None if ffmpeg can't)"""
+    if result.get('content_type', 'audio/wav') == 'audio/wav':
+        return result['audio_data'][44:]
+    return audio_encoder.decode_pcm(result['audio_data'])
+
+def stitch_long_form_result(segments, segment_results, start_time, emotion_mode):
+    """
+    Combine per-segment results into one WAV result, return the failed
+    segment's result if one could not be synthesised at all, or None if a
+    fallback segment cannot be decoded to PCM
+    """
+    for result in segment_results:
+        if not result['success']:
+            return result
+    segments_pcm = [segment_pcm(result) for result in segment_results]
+    if any(pcm is None for pcm in segments_pcm):
+        return None
+    
+    raw_audio_data = crossfade_pcm(segments_pcm)
+    wav_data = create_orpheus_wav(raw_audio_data)
+    generation_time = time.time() - start_time
+    
+    return {
+        'success': True,
+        'audio_data': wav_data,
+        'content_type': 'audio/wav',
+        'duration': len(raw_audio_data) / (ORPHEUS_SAMPLE_RATE * 2),
+        'generation_time': generation_time,
+        'file_size': len(wav_data),
+        'raw_audio_size': len(raw_audio_data),
+        'streaming': False,
+        'emotion_mode': emotion_mode,
+        'temperature_used': segment_results[0].get('temperature_used', 0.7),
+        'fallback_used': 'openai_tts' if any(result.get('fallback_used') for result in segment_results) else None,
+        'cache_hit': all(result.get('cache_hit') for result in segment_results),
+        'long_form': True,
+        'segments': [
+            {
+                'index': index,
+                'chars': len(segment),
+                'generation_time': round(result['generation_time'], 3),
+                'duration': round(result['duration'], 2),
+                'cache_hit': result.get('cache_hit', False),
+                'coalesced': result.get('coalesced', False),
+                'fallback_used': result.get('fallback_used')
+            }
+            for index, (segment, result) in enumerate(zip(segments, segment_results))
+        ],
+        'performance': segment_results[0].get('performance', {})
+    }
+
+def wants_long_form(data, text):
+    """Long-form on request, or automatically for texts above LONG_FORM_AUTO_CHARS"""
+    if 'long_form' in data:
+        return bool(data['long_form'])
+    return LONG_FORM_AUTO_CHARS > 0 and len(text) > LONG_FORM_AUTO_CHARS
+
+def generate_long_form_tts(text, voice_config, emotion_mode='natural', add_emotion_tags=True, priority='generate', deadline=None):
+    """
+    Long-form synthesis: split after enhancement, synthesise segments in parallel
+    (orpheus_scheduler still caps upstream calls) and crossfade them into one WAV.
+    """
+    start_time = time.time()
+    segments = prepare_long_form_segments(text, voice_config, add_emotion_tags)
+    if len(segments) <= 1:
+        return generate_orpheus_tts_optimized(text, voice_config, emotion_mode=emotion_mode, add_emotion_tags=add_emotion_tags,
+                                              priority=priority, deadline=deadline)
+    
+    print(f"📜 Long-form synthesis: {len(segments)} segments, {len(text)} chars - Voice: {voice_config['orpheus_voice']}")
+    with ThreadPoolExecutor(max_workers=min(len(segments), MAX_CONCURRENT_STREAMS), thread_name_prefix='long-form') as pool:
+        segment_results = list(pool.map(
+            lambda segment: generate_orpheus_tts_optimized(segment, voice_config, emotion_mode=emotion_mode, add_emotion_tags=False,
+                                                           priority=priority, deadline=deadline),
+            segments
+        ))
+    
+    segment_results = fallback_failed_segments(segments, segment_results, voice_config, emotion_mode)
+    result = stitch_long_form_result(segments, segment_results, start_time, emotion_mode)
+    # Only when MP3 fallback segments can't be decoded (no ffmpeg) - the Orpheus segments stay in the audio cache for a retry
+    return result if result is not None else generate_openai_tts_fallback(text, voice_config, emotion_mode)
+
+def get_fastest_voice_for_conversation(requested_voice=None):
+    """
+    Get the fastest available voice for conversation responses.
+    Prioritizes FP8 voices for speed, but respects user's FP16 choice if specified.
+    """
+    # If user specifically requested a voice and it exists, use it
+    if requested_voice and requested_voice in VOICE_CONFIGS:
+        return requested_voice
+    
+    # Get FP8 voices (fastest)
+    fp8_voices = [k for k, v in VOICE_CONFIGS.items() if v.get('precision') == 'fp8']
+    
+    # Prefer specific fast voices in order
+    speed_priority = ['orpheus_leah', 'orpheus_jess', 'orpheus_dan', 'orpheus_zac', 'orpheus_zoe']
+    
+    for voice in speed_priority:
+        if voice in fp8_voices:
+            return voice
+    
+    # Fallback to any FP8 voice
+    if fp8_voices:
+        return fp8_voices[0]
+    
+    # Ultimate fallback
+    return 'orpheus_leah'
+
+def enhance_text_with_emotions(text, voice_config):
+    """Enhanced text processing with archetype-specific characteristics and emotions"""
+    if not text or not voice_config:
+        return text
+    return get_text_enhancement_plan(voice_config).apply(text)
+
+def enhance_text_with_emotions_stepwise(text, voice_config):
+    """Stage-by-stage reference for TextEnhancementPlan - kept for benchmark_text_enhancement.py"""
+    if not text or not voice_config:
+        return text
+    
+    # Get voice configuration details
+    emotional_range = voice_config.get('emotional_range', [])
+    personality_traits = voice_config.get('personality_traits', [])
+    vocal_characteristics = voice_config.get('vocal_characteristics', [])
+    speaking_patterns = voice_config.get('speaking_patterns', [])
+    archetype = voice_config.get('archetype', None)
+    gender = voice_config.get('gender', None)
+    
+    enhanced_text = text
+    
+    # Apply archetype-specific text modifications
+    if archetype:
+        enhanced_text = apply_archetype_characteristics(enhanced_text, archetype, gender, personality_traits, speaking_patterns)
+    
+    # Add appropriate emotional tags based on voice characteristics
+    if 'expressive' in emotional_range or 'dramatic' in personality_traits:
+        # Add emotional expressiveness for dramatic archetypes
+        enhanced_text = add_emotional_expression_tags(enhanced_text, voice_config)
+    
+    # Apply speaking pattern modifications
+    if speaking_patterns:
+        enhanced_text = apply_speaking_patterns(enhanced_text, speaking_patterns, archetype)
+    
+    # Add vocal characteristic tags for Orpheus processing
+    if vocal_characteristics:
+        enhanced_text = add_vocal_characteristic_tags(enhanced_text, vocal_characteristics)
+    
+    return enhanced_text
+
+# Archetype-specific text processing
+ARCHETYPE_MODIFIERS = {
+    'outbacker': {
+        'phrases': {'mate', 'fair dinkum', 'right-o', 'crikey'},
+        'style': 'australian_warmth',
+        'emphasis': 'hearty_delivery'
+    },
+    'rocker': {
+        'phrases': {'ROCK', 'RAGE', 'SAVAGE', 'BRUTAL', 'DESTROY', 'ANNIHILATE', 'VIOLENT', 'FIERCE'},
+        'style': 'brutal_aggressive_energy',
+        'emphasis': 'savage_delivery'
+    },
+    'clown': {
+        'phrases': {'ta-da', 'whoopee', 'ha-ha', 'surprise'},
+        'style': 'theatrical_joy',
+        'emphasis': 'exaggerated_delivery'
+    },
+    'royal': {
+        'phrases': {'indeed', 'certainly', 'one must', 'properly'},
+        'style': 'elegant_authority',
+        'emphasis': 'regal_delivery'
+    },
+    'beatnik': {
+        'phrases': {'dig it', 'cool', 'far out', 'zen'},
+        'style': 'poetic_flow',
+        'emphasis': 'contemplative_delivery'
+    },
+    'mystic': {
+        'phrases': {'the universe', 'energy', 'transcend', 'enlighten'},
+        'style': 'ethereal_wisdom',
+        'emphasis': 'mystical_delivery'
+    },
+    'fortune_teller': {
+        'phrases': {'I see', 'the cards reveal', 'destiny', 'future'},
+        'style': 'mysterious_insight',
+        'emphasis': 'prophetic_delivery'
+    },
+    'mad_professor': {
+        'phrases': {'eureka', 'fascinating', 'experiment', 'brilliant'},
+        'style': 'chaotic_genius',
+        'emphasis': 'manic_delivery'
+    },
+    'angel': {
+        'phrases': {'blessed', 'divine', 'holy', 'righteous', 'eternal', 'sacred', 'heavenly'},
+        'style': 'overwhelming_divine_grace',
+        'emphasis': 'celestial_delivery'
+    },
+    'devil': {
+        'phrases': {'delicious', 'tempting', 'wicked', 'sinful', 'corrupt', 'desire', 'darkness'},
+        'style': 'overwhelming_dark_seduction',
+        'emphasis': 'corrupting_delivery'
+    },
+    'school_master': {
+        'phrases': {'precisely', 'attention', 'learn', 'knowledge'},
+        'style': 'scholarly_authority',
+        'emphasis': 'educational_delivery'
+    },
+    'cowboy': {
+        'phrases': {'partner', 'reckon', 'howdy', 'frontier'},
+        'style': 'frontier_wisdom',
+        'emphasis': 'drawling_delivery'
+    },
+    'philosopher': {
+        'phrases': {'ponder', 'wisdom', 'truth', 'existence'},
+        'style': 'ancient_wisdom',
+        'emphasis': 'thoughtful_delivery'
+    },
+    'sprite': {
+        'phrases': {'magical', 'sparkle', 'whimsical', 'enchant'},
+        'style': 'magical_energy',
+        'emphasis': 'playful_delivery'
+    },
+    'pirate': {
+        'phrases': {'ahoy', 'matey', 'treasure', 'adventure'},
+        'style': 'seafaring_boldness',
+        'emphasis': 'commanding_delivery'
+    },
+    'street_urchin': {
+        'phrases': {'street smart', 'savvy', 'hustle', 'clever'},
+        'style': 'streetwise_energy',
+        'emphasis': 'quick_delivery'
+    },
+    'hypnotist': {
+        'phrases': {'relax', 'focus', 'deeper', 'surrender'},
+        'style': 'entrancing_control',
+        'emphasis': 'hypnotic_delivery'
+    },
+    'sports_coach': {
+        'phrases': {'champion', 'victory', 'team', 'push harder'},
+        'style': 'motivating_energy',
+        'emphasis': 'powerful_delivery'
+    },
+    'vampire': {
+        'phrases': {'eternal', 'blood', 'midnight', 'immortal'},
+        'style': 'seductive_darkness',
+        'emphasis': 'intense_delivery'
+    },
+    'punk': {
+        'phrases': {'rebel', 'fight', 'anarchist', 'raw'},
+        'style': 'rebellious_edge',
+        'emphasis': 'defiant_delivery'
+    },
+    'wizard': {
+        'phrases': {'magic', 'spell', 'ancient', 'power'},
+        'style': 'mystical_authority',
+        'emphasis': 'theatrical_delivery'
+    },
+    'witch': {
+        'phrases': {'enchant', 'potion', 'mystical', 'wisdom'},
+        'style': 'enchanting_power',
+        'emphasis': 'magical_delivery'
+    },
+    'private_investigator': {
+        'phrases': {'investigate', 'clues', 'mystery', 'case'},
+        'style': 'noir_sophistication',
+        'emphasis': 'confident_delivery'
+    }
+}
+
+def apply_archetype_characteristics(text, archetype, gender, personality_traits, speaking_patterns):
+    """Apply archetype-specific text modifications"""
+    enhanced_text = text
+    
+    # Apply extreme transformations for devils and angels
+    if archetype == 'angel':
+        # Make angelic speech more extreme with divine pauses and sacred emphasis
+        enhanced_text = enhanced_text.replace('.', '... blessed be... ')
+        enhanced_text = enhanced_text.replace('!', '... divine grace!')
+        enhanced_text = f"✧ {enhanced_text.strip()} ✧"
+        
+    elif archetype == 'devil':
+        # Make devilish speech more extreme with tempting pauses and seductive emphasis
+        enhanced_text = enhanced_text.replace('.', '... so tempting... ')
+        enhanced_text = enhanced_text.replace('!', '... wickedly delicious!')
+        enhanced_text = f"♦ {enhanced_text.strip()} ♦"
+    
+    elif archetype == 'rocker' and gender == 'male':
+        # Make male rocker speech brutally aggressive and intense
+        enhanced_text = enhanced_text.upper()  # ALL CAPS for aggression
+        enhanced_text = enhanced_text.replace('.', '... BRUTAL RAGE... ')
+        enhanced_text = enhanced_text.replace('!', '!!! SAVAGE DESTROY!!!')
+        enhanced_text = f"🔥💀 {enhanced_text.strip()} 💀🔥"
+    
+    return enhanced_text
+
+def apply_speaking_patterns(text, speaking_patterns, archetype):
+    """Apply speaking pattern modifications based on archetype"""
+    enhanced_text = text
+    
+    # Pattern-specific modifications
+    if 'deliberate_pacing' in speaking_patterns:
+        # Add pauses for deliberate delivery
+        enhanced_text = enhanced_text.replace('.', '... ')
+        enhanced_text = enhanced_text.replace(',', ', ')
+    
+    if 'rapid_delivery' in speaking_patterns or 'fast_paced' in speaking_patterns:
+        # Remove some pauses for faster delivery
+        enhanced_text = enhanced_text.replace('...', '.')
+        enhanced_text = enhanced_text.replace(', ', ',')
+    
+    if 'theatrical_delivery' in speaking_patterns:
+        # Add dramatic emphasis
+        enhanced_text = enhanced_text.replace('!', '!')
+        enhanced_text = enhanced_text.replace('?', '?')
+    
+    if 'drawling_delivery' in speaking_patterns:
+        # Cowboy-style drawl modifications
+        enhanced_text = enhanced_text.replace('ing', "in'")
+        
+    if 'hypnotic_rhythm' in speaking_patterns:
+        # Add hypnotic pauses
+        enhanced_text = enhanced_text.replace('.', '... ')
+        
+    return enhanced_text
+
+def add_emotional_expression_tags(text, voice_config):
+    """Add emotional expression tags for dramatic archetypes"""
+    archetype = voice_config.get('archetype', '')
+    emotional_range = voice_config.get('emotional_range', [])
+    
+    # Add emotional tags based on archetype characteristics
+    if archetype in ['clown', 'sprite', 'mad_professor']:
+        # Playful archetypes get laughter
+        if any(word in text.lower() for word in ['funny', 'joke', 'amusing', 'silly']):
+            text = text + ' <laugh>'
+    
+    if archetype in ['mystic', 'fortune_teller', 'wizard', 'witch']:
+        # Mystical archetypes get thoughtful pauses
+        if any(word in text.lower() for word in ['ancient', 'mystical', 'power', 'magic']):
+            text = '<sigh> ' + text
+    
+    if archetype in ['vampire', 'devil']:
+        # Dark archetypes get seductive breathing
+        if any(word in text.lower() for word in ['tempting', 'desire', 'want']):
+            text = text + ' <gasp>'
+    
+    return text
+
+def add_vocal_characteristic_tags(text, vocal_characteristics):
+    """Add vocal characteristic tags for Orpheus processing"""
+    enhanced_text = text
+    
+    # Map vocal characteristics to Orpheus tags
+    characteristic_tags = {
+        'raspy_edge': '<groan>',
+        'ethereal_softness': '<sigh>',
+        'commanding_presence': '',  # Use natural authority
+        'playful_energy': '<chuckle>',
+        'seductive_warmth': '<gasp>',
+        'theatrical_projection': '',  # Use natural projection
+        'hypnotic_quality': '<yawn>',
+        'mysterious_depth': '<sigh>'
+    }
+    
+    # Apply relevant tags based on characteristics
+    for characteristic in vocal_characteristics:
+        if characteristic in characteristic_tags and characteristic_tags[characteristic]:
+            tag = characteristic_tags[characteristic]
+            # Add tag occasionally, not to every sentence
+            if len(enhanced_text.split('.')) > 1:
+                sentences = enhanced_text.split('.')
+                if len(sentences) > 1:
+                    sentences[1] = tag + ' ' + sentences[1]
+                    enhanced_text = '.'.join(sentences)
+    
+    return enhanced_text
+
+# Compiled once - runs on every Orpheus request
+PUNCTUATION_RUN_PATTERN = re.compile(r'\.{3,}|!{2,}|\?{2,}')
+PUNCTUATION_RUN_REPLACEMENTS = {'.': '...', '!': '!', '?': '?'}
+
+def clean_orpheus_text(text):
+    """Collapse '....', '!!', '??' runs in one regex pass and whitespace runs with split/join"""
+    text = PUNCTUATION_RUN_PATTERN.sub(lambda m: PUNCTUATION_RUN_REPLACEMENTS[m.group()[0]], text)
+    return ' '.join(text.split())
+
+# Archetype rewrites as translation tables (same output as the sequential str.replace calls)
+ARCHETYPE_TRANSLATIONS = {
+    'angel': (str.maketrans({'.': '... blessed be... ', '!': '... divine grace!'}), '✧ ', ' ✧', False),
+    'devil': (str.maketrans({'.': '... so tempting... ', '!': '... wickedly delicious!'}), '♦ ', ' ♦', False),
+    'rocker_male': (str.maketrans({'.': '... BRUTAL RAGE... ', '!': '!!! SAVAGE DESTROY!!!'}), '🔥💀 ', ' 💀🔥', True),
+}
+
+EXPRESSION_TAG_RULES = (
+    # (archetypes, trigger words, prefix tag, suffix tag)
+    (('clown', 'sprite', 'mad_professor'), ('funny', 'joke', 'amusing', 'silly'), '', ' <laugh>'),
+    (('mystic', 'fortune_teller', 'wizard', 'witch'), ('ancient', 'mystical', 'power', 'magic'), '<sigh> ', ''),
+    (('vampire', 'devil'), ('tempting', 'desire', 'want'), '', ' <gasp>'),
+)
+
+VOCAL_CHARACTERISTIC_TAGS = {
+    'raspy_edge': '<groan>',
+    'ethereal_softness': '<sigh>',
+    'playful_energy': '<chuckle>',
+    'seductive_warmth': '<gasp>',
+    'hypnotic_quality': '<yawn>',
+    'mysterious_depth': '<sigh>'
+}
+
+class TextEnhancementPlan:
+    """
+    Per-voice text enhancement compiled from its config: archetype rewrite,
+    expression tag rule, speaking-pattern steps and vocal tag prefix are all
+    decided once, so apply() only does the string work.
+    """
+    
+    def __init__(self, voice_config):
+        emotional_range = voice_config.get('emotional_range', [])
+        personality_traits = voice_config.get('personality_traits', [])
+        vocal_characteristics = voice_config.get('vocal_characteristics', [])
+        speaking_patterns = voice_config.get('speaking_patterns', [])
+        archetype = voice_config.get('archetype', None)
+        gender = voice_config.get('gender', None)
+        
+        translation_key = 'rocker_male' if archetype == 'rocker' and gender == 'male' else archetype
+        self.archetype_translation = ARCHETYPE_TRANSLATIONS.get(translation_key)
+        
+        self.expression_pattern = None
+        if 'expressive' in emotional_range or 'dramatic' in personality_traits:
+            for archetypes, words, prefix, suffix in EXPRESSION_TAG_RULES:
+                if archetype in archetypes:
+                    # Substring match on the lowered text, like the original any(word in text.lower())
+                    self.expression_pattern = re.compile('|'.join(re.escape(word) for word in words))
+                    self.expression_prefix = prefix
+                    self.expression_suffix = suffix
+                    break
+        
+        self.pattern_steps = []
+        if 'deliberate_pacing' in speaking_patterns:
+            self.pattern_steps.append(str.maketrans({'.': '... ', ',': ', '}))
+        if 'rapid_delivery' in speaking_patterns or 'fast_paced' in speaking_patterns:
+            self.pattern_steps.append(('...', '.'))
+            self.pattern_steps.append((', ', ','))
+        if 'drawling_delivery' in speaking_patterns:
+            self.pattern_steps.append(('ing', "in'"))
+        if 'hypnotic_rhythm' in speaking_patterns:
+            self.pattern_steps.append(str.maketrans({'.': '... '}))
+        
+        # Every matching characteristic prefixes the second sentence, the last one ending up first
+        tags = [VOCAL_CHARACTERISTIC_TAGS[c] for c in vocal_characteristics if c in VOCAL_CHARACTERISTIC_TAGS]
+        self.vocal_tag_prefix = ''.join(f'{tag} ' for tag in reversed(tags))
+    
+    def apply(self, text):
+        if self.archetype_translation:
+            table, opening, closing, shout = self.archetype_translation
+            if shout:
+                text = text.upper()
+            text = f"{opening}{text.translate(table).strip()}{closing}"
+        
+        if self.expression_pattern is not None and self.expression_pattern.search(text.lower()):
+            text = f"{self.expression_prefix}{text}{self.expression_suffix}"
+        
+        for step in self.pattern_steps:
+            text = text.replace(*step) if isinstance(step, tuple) else text.translate(step)
+        
+        if self.vocal_tag_prefix:
+            first_period = text.find('.')
+            if first_period != -1:
+                text = text[:first_period + 1] + self.vocal_tag_prefix + text[first_period + 1:]
+        
+        return text
+
+_text_enhancement_plans = {}
+
+def get_text_enhancement_plan(voice_config):
+    """Return the compiled plan for a voice config, compiling it on first use"""
+    profile = voice_profile_for_config(voice_config)
+    if profile is not None:
+        return profile.enhancement_plan
+    entry = _text_enhancement_plans.get(id(voice_config))
+    if entry is None or entry[0] is not voice_config:
+        entry = (voice_config, TextEnhancementPlan(voice_config))
+        _text_enhancement_plans[id(voice_config)] = entry
+    return entry[1]
+
+# Shared request handling - used by both the threaded handler and the asyncio engine
+SENTENCE_BOUNDARY_PATTERN = re.compile(r'[.!?…]+["\')\]]*\s+')
+
+def split_sentences_from_tokens(tokens, min_chars=PIPELINE_MIN_SENTENCE_CHARS):
+    """Group a token stream into sentences, yielding each one as soon as its boundary arrives"""
+    buffer = ''
+    for token in tokens:
+        buffer += token
+        search_from = 0
+        while True:
+            match = SENTENCE_BOUNDARY_PATTERN.search(buffer, search_from)
+            if not match:
+                break
+            # Very short sentences ("Sure!") ride along with the next one
+            if match.end() < min_chars:
+                search_from = match.end()
+                continue
+            sentence = buffer[:match.end()].strip()
+            buffer = buffer[match.end():]
+            search_from = 0
+            if sentence:
+                yield sentence
+    
+    if buffer.strip():
+        yield buffer.strip()
+
+def generate_pipelined_conversation(user_input, session_id, voice_config, parallelism=PIPELINE_TTS_PARALLELISM, stats=None):
+    """
+    Sentence-pipelined fast conversation: stream ChatGPT tokens, start Orpheus on each
+    sentence as soon as it is complete and yield the synthesised segments in order.
+    The first segment is ready after roughly one sentence of LLM + TTS time.
+    """
+    stats = stats if stats is not None else {}
+    chat_stats = {}
+    start_time = time.time()
+    segments = queue.Queue()
+    sentences = []
+    
+    def synthesize(sentence):
+        return generate_orpheus_tts_optimized(
+            sentence, voice_config, use_streaming=False,
+            emotion_mode='natural', add_emotion_tags=False, priority='conversation'
+        )
+    
+    def produce(tts_pool):
+        # Reads the chat stream and queues one TTS future per sentence, in order - until the consumer stops
+        token_stream = None
+        try:
+            token_stream = generate_fast_chatgpt_response_stream(user_input, session_id, chat_stats)
+            for sentence in split_sentences_from_tokens(takewhile(lambda _: not stopped.is_set(), token_stream)):
+                if stopped.is_set():
+                    return
+                if not sentences:
+                    stats['time_to_first_sentence'] = time.time() - start_time
+                sentences.append(sentence)
+                segments.put((sentence, tts_pool.submit(synthesize, sentence)))
+        except Exception as e:
+            if stopped.is_set():
+                return  # The pool was shut down under us - nobody is reading any more
+            print(f"⚡ Pipelined ChatGPT error: {e}")
+            if not sentences:
+                fallback = "I'm here to help! What can I do for you?"
+                sentences.append(fallback)
+                try:
+                    segments.put((fallback, tts_pool.submit(synthesize, fallback)))
+                except RuntimeError:
+                    pass  # Consumer stopped in the meantime
+        finally:
+            if token_stream is not None:
+                token_stream.close()  # Closes the upstream ChatGPT response
+            stats['chatgpt_time'] = time.time() - start_time
+            stats['time_to_first_token'] = chat_stats.get('time_to_first_token', 0)
+            segments.put(None)
+    
+    # Not a with-block: its exit waits for every queued sentence, even after the client has gone
+    tts_pool = ThreadPoolExecutor(max_workers=max(1, parallelism), thread_name_prefix='pipeline-tts')
+    stopped = threading.Event()
+    producer = Thread(target=produce, args=(tts_pool,), daemon=True)
+    producer.start()
+    
+    index = 0
+    try:
+        while True:
+            item = segments.get()
+            if item is None:
+                break
+            sentence, future = item
+            result = future.result()
+            if index == 0:
+                stats['time_to_first_audio'] = time.time() - start_time
+            yield index, sentence, result
+            index += 1
+    finally:
+        # Early close (client disconnect) drops sentences not yet synthesising; running calls finish on their own
+        stopped.set()
+        tts_pool.shutdown(wait=False, cancel_futures=True)
+    producer.join()
+    
+    stats['segments'] = index
+    stats['total_time'] = time.time() - start_time
+    stats['ai_response'] = ' '.join(sentences)
+
+def build_pipeline_segment(index, sentence, result, start_time):
+    """One NDJSON line of a pipelined conversation response"""
+    segment = {
+        'type': 'segment',
+        'index': index,
+        'text': sentence,
+        'success': result['success'],
+        'time_since_request': round(time.time() - start_time, 3)
+    }
+    if result['success']:
+        segment.update({
+            'audio_base64': encode_audio_base64(result),
+            'content_type': result.get('content_type', 'audio/wav'),
+            'duration': round(result.get('duration', 0), 2),
+            'generation_time': round(result.get('generation_time', 0), 2),
+            'fallback_used': result.get('fallback_used')
+        })
+    else:
+        segment['error'] = result.get('error')
+    return segment
+
+def build_pipeline_summary(voice, precision, stats):
+    """Final NDJSON line of a pipelined conversation response"""
+    return {
+        'type': 'done',
+        'success': True,
+        'ai_response': stats.get('ai_response', ''),
+        'voice_used': voice,
+        'precision_used': precision,
+        'mode': 'pipelined',
+        'performance': {
+            'segments': stats.get('segments', 0),
+            'time_to_first_token': round(stats.get('time_to_first_token', 0), 2),
+            'time_to_first_sentence': round(stats.get('time_to_first_sentence', 0), 2),
+            'time_to_first_audio': round(stats.get('time_to_first_audio', 0), 2),
+            'chatgpt_time': round(stats.get('chatgpt_time', 0), 2),
+            'total_time': round(stats.get('total_time', 0), 2)
+        }
+    }
+
+DEFAULT_TEMPERATURE_PRESETS = MappingProxyType({
+    'calm': 0.3, 'natural': 0.7, 'expressive': 1.0, 'dramatic': 1.3
+})
+ORPHEUS_REPETITION_PENALTY = 1.1  # Stable generation
+
+def freeze_config_value(value):
+    """Read-only copy of a config value: dicts become mapping proxies, lists and sets tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze_config_value(item) for key, item in value.items()})
+    if isinstance(value, (list, set)):
+        return tuple(freeze_config_value(item) for item in value)
+    return value
+
+class VoiceProfile:
+    """
+    One voice config resolved once at startup: a read-only config mapping,
+    its temperature presets, the fixed part of the Orpheus payload and the
+    compiled text enhancement plan. Requests share these instead of copying
+    VOICE_CONFIGS entries.
+    """
+    
+    __slots__ = ('voice_id', 'config', 'precision', 'max_tokens', 'temperature_presets',
+                 'payload_template', 'enhancement_plan', 'precision_variants')
+    
+    def __init__(self, voice_id, config):
+        frozen = freeze_config_value(config)
+        set_slot = super().__setattr__
+        set_slot('voice_id', voice_id)
+        set_slot('config', frozen)
+        set_slot('precision', frozen.get('precision', 'fp8'))
+        set_slot('max_tokens', frozen.get('max_tokens', 2200))
+        set_slot('temperature_presets', frozen.get('temperature_presets', DEFAULT_TEMPERATURE_PRESETS))
+        set_slot('payload_template', MappingProxyType({
+            'voice': frozen['orpheus_voice'],
+            'repetition_penalty': ORPHEUS_REPETITION_PENALTY
+        }))
+        set_slot('enhancement_plan', TextEnhancementPlan(frozen))
+        set_slot('precision_variants', MappingProxyType({}))
+    
+    def __setattr__(self, name, value):
+        raise AttributeError(f"VoiceProfile '{self.voice_id}' is immutable")
+    
+    def __repr__(self):
+        return f"VoiceProfile({self.voice_id!r}, precision={self.precision!r})"
+    
+    def variant(self, precision):
+        """This voice at another precision - the profile itself when it already matches"""
+        return self.precision_variants.get(precision, self)
+    
+    def build_payload(self, prompt, max_tokens, temperature):
+        return {**self.payload_template, 'prompt': prompt, 'max_tokens': max_tokens, 'temperature': temperature}
+
+def build_voice_profiles():
+    """
+    Resolve VOICE_CONFIGS once: a profile per Orpheus voice (FP8 and FP16
+    variants attached) and the /generate routing table mapping each requested
+    voice id to the (voice, profile) it resolves to, FP8/FP16 switching included.
+    """
+    profiles = {}
+    for voice_id, config in VOICE_CONFIGS.items():
+        if config.get('type') != 'orpheus':
+            continue  # Stray archetype modifier entries carry no voice
+        profile = VoiceProfile(voice_id, config)
+        variants = {profile.precision: profile}
+        for precision in ('fp8', 'fp16'):
+            if precision not in variants:
+                variants[precision] = VoiceProfile(voice_id, dict(config, precision=precision))
+        object.__setattr__(profile, 'precision_variants', MappingProxyType(variants))
+        for variant in variants.values():
+            object.__setattr__(variant, 'precision_variants', profile.precision_variants)
+        profiles[voice_id] = profile
+    
+    routes = {}
+    for voice, profile in profiles.items():
+        if voice.endswith('_fp16') and voice.replace('_fp16', '') in profiles:
+            # Requesting the FP16 id plays the base voice at FP16
+            base_voice = voice.replace('_fp16', '')
+            routes[voice] = (base_voice, profiles[base_voice].variant('fp16'))
+        elif voice.startswith('archetype_') and voice + '_fp16' not in profiles:
+            # Regular archetype voice - ensure FP8 for speed
+            routes[voice] = (voice, profile.variant('fp8'))
+        else:
+            routes[voice] = (voice, profile)
+    
+    # The tester asks for '<archetype>_fp16' even where no separate FP16 config exists
+    for voice, profile in profiles.items():
+        if voice.startswith('archetype_') and voice + '_fp16' not in routes:
+            routes[voice + '_fp16'] = (voice, profile.variant('fp16'))
+    
+    return profiles, routes
+
+VOICE_PROFILES, GENERATE_VOICE_ROUTES = build_voice_profiles()
+_voice_profiles_by_config = {
+    id(variant.config): variant
+    for profile in VOICE_PROFILES.values() for variant in set(profile.precision_variants.values())
+}
+
+def get_voice_profile(voice, default='orpheus_leah'):
+    """Profile for a configured voice id, falling back to the default voice"""
+    return VOICE_PROFILES.get(voice) or VOICE_PROFILES[default]
+
+def voice_profile_for_config(voice_config):
+    """The profile a shared voice config belongs to, or None for ad-hoc config dicts"""
+    profile = _voice_profiles_by_config.get(id(voice_config))
+    return profile if profile is not None and profile.config is voice_config else None
+
+def resolve_generate_voice(voice):
+    """Resolve a /generate voice id to (voice, voice_config) including FP8/FP16 switching"""
+    route = GENERATE_VOICE_ROUTES.get(voice) or GENERATE_VOICE_ROUTES['orpheus_leah']  # Default to optimized Orpheus voice
+    return route[0], route[1].config
+
+def encode_audio_base64(result):
+    """Base64-encode a result's in-memory audio for JSON responses"""
+    return base64.b64encode(result['audio_data']).decode('ascii')
+
+def negotiate_audio_response_format(data, accept_header):
+    """
+    Pick how audio goes back to the client: 'json' (base64, the default),
+    'binary' (raw audio body, metrics in X- headers) or 'multipart'
+    (JSON metadata part + audio part). The body's response_format field wins over Accept.
+    Binary is only chosen for an explicit codec - a format field or a concrete
+    audio type in Accept - so wildcards like audio/* keep the JSON default.
+    """
+    requested = str(data.get('response_format', '')).lower()
+    if requested in AUDIO_RESPONSE_FORMATS:
+        return requested
+    
+    if 'multipart/mixed' in accept_media_types(accept_header):
+        return 'multipart'
+    if str(data.get('format', '')).lower() in AUDIO_FORMAT_ALIASES or accepted_audio_codec(accept_header):
+        return 'binary'
+    return 'json'
+
+AUDIO_CODECS = {
+    # codec: (content type, ffmpeg output arguments)
+    'opus': ('audio/ogg; codecs=opus', ['-c:a', 'libopus', '-b:a', AUDIO_OPUS_BITRATE, '-application', 'voip', '-f', 'ogg']),
+    'flac': ('audio/flac', ['-c:a', 'flac', '-compression_level', '5', '-f', 'flac']),
+    'mp3': ('audio/mpeg', ['-c:a', 'libmp3lame', '-b:a', AUDIO_MP3_BITRATE, '-f', 'mp3'])
+}
+AUDIO_FORMAT_ALIASES = {'opus': 'opus', 'ogg': 'opus', 'flac': 'flac', 'mp3': 'mp3', 'mpeg': 'mp3', 'wav': 'wav'}
+# Opus goes out in an Ogg container, so audio/webm is not offered
+AUDIO_ACCEPT_CODECS = (('audio/ogg', 'opus'), ('audio/opus', 'opus'), ('audio/flac', 'flac'), ('audio/mpeg', 'mp3'),
+                       ('audio/mp3', 'mp3'), ('audio/wav', 'wav'), ('audio/x-wav', 'wav'), ('audio/wave', 'wav'))
+
+def accept_media_types(accept_header):
+    """Media types listed in an Accept header, parameters and q-values dropped"""
+    return {part.split(';', 1)[0].strip() for part in (accept_header or '').lower().split(',')}
+
+def accepted_audio_codec(accept_header):
+    """Codec for the first concrete audio type in AUDIO_ACCEPT_CODECS that Accept lists, or None"""
+    media_types = accept_media_types(accept_header)
+    for media_type, codec in AUDIO_ACCEPT_CODECS:
+        if media_type in media_types:
+            return codec
+    return None
+
+def negotiate_audio_codec(data, accept_header):
+    """Pick the audio encoding: the body's format field wins, then the Accept header, else WAV"""
+    requested = AUDIO_FORMAT_ALIASES.get(str(data.get('format', '')).lower())
+    if requested:
+        return requested
+    return accepted_audio_codec(accept_header) or 'wav'
+
+class AudioEncoder:
+    """
+    Encodes synthesized WAV into Opus/Ogg, FLAC or MP3 with ffmpeg on a
+    dedicated worker pool, so compression never runs on the event loop and at
+    most AUDIO_ENCODE_WORKERS encoders run at once. Anything that cannot be
+    encoded (no ffmpeg, already compressed, encoder error) goes out unchanged.
+    """
+    
+    def __init__(self, workers=AUDIO_ENCODE_WORKERS, ffmpeg_path=FFMPEG_PATH):
+        self.ffmpeg = shutil.which(ffmpeg_path)
+        self.workers = workers
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='audio-encode')
+        self._warned = False
+    
+    def needs_encoding(self, result, codec):
+        return codec in AUDIO_CODECS and result.get('success') and result.get('content_type', 'audio/wav') == 'audio/wav'
+    
+    def encode_result(self, result, codec):
+        """Return a copy of result with its audio encoded as codec (runs on the pool)"""
+        if self.ffmpeg is None:
+            if not self._warned:
+                self._warned = True
+                print(f"⚠️ ffmpeg not found ({FFMPEG_PATH}) - compressed audio formats fall back to WAV")
+            metrics.inc('audio_encode_total', codec=codec, outcome='unavailable')
+            return result
+        
+        content_type, output_args = AUDIO_CODECS[codec]
+        wav_data = result['audio_data']
+        encode_start = time.time()
+        try:
+            completed = subprocess.run(
+                [self.ffmpeg, '-hide_banner', '-loglevel', 'error', '-f', 'wav', '-i', 'pipe:0', *output_args, 'pipe:1'],
+                input=wav_data, capture_output=True, timeout=AUDIO_ENCODE_TIMEOUT, check=True
+            )
+        except (subprocess.SubprocessError, OSError) as e:
+            print(f"⚠️ {codec} encode failed, sending WAV: {e}")
+            metrics.inc('audio_encode_total', codec=codec, outcome='failed')
+            return result
+        
+        encoded = completed.stdout
+        encode_time = time.time() - encode_start
+        metrics.observe('audio_encode_seconds', encode_time, codec=codec)
+        metrics.inc('audio_encode_total', codec=codec, outcome='encoded')
+        metrics.inc('audio_encode_bytes_saved_total', max(0, len(wav_data) - len(encoded)), codec=codec)
+        
+        encoded_result = dict(result)
+        encoded_result.update({
+            'audio_data': encoded,
+            'content_type': content_type,
+            'audio_format': codec,
+            'encode_time': encode_time
+        })
+        return encoded_result
+    
+    def encode(self, result, codec):
+        """Encode on the pool and wait for it - the request thread only blocks on its own result"""
+        if not self.needs_encoding(result, codec):
+            return result
+        return self.pool.submit(self.encode_result, result, codec).result()
+    
+    async def encode_async(self, result, codec):
+        if not self.needs_encoding(result, codec):
+            return result
+        return await asyncio.get_running_loop().run_in_executor(self.pool, self.encode_result, result, codec)
+    
+    def decode_pcm(self, audio_data):
+        """Decode compressed audio (e.g. a fallback MP3) to raw Orpheus-format PCM - None without ffmpeg or on error"""
+        if self.ffmpeg is None:
+            return None
+        try:
+            completed = subprocess.run(
+                [self.ffmpeg, '-hide_banner', '-loglevel', 'error', '-i', 'pipe:0',
+                 '-f', 's16le', '-acodec', 'pcm_s16le', '-ac', '1', '-ar', str(ORPHEUS_SAMPLE_RATE), 'pipe:1'],
+                input=audio_data, capture_output=True, timeout=AUDIO_ENCODE_TIMEOUT, check=True
+            )
+        except (subprocess.SubprocessError, OSError) as e:
+            print(f"⚠️ PCM decode failed: {e}")
+            return None
+        return completed.stdout
+    
+    def get_stats(self):
+        encodes, encode_seconds = metrics.histogram_totals('audio_encode_seconds')
+        return {
+            'ffmpeg_available': self.ffmpeg is not None,
+            'workers': self.workers,
+            'codecs': sorted(AUDIO_CODECS),
+            'encodes': encodes,
+            'avg_encode_time': round(encode_seconds / encodes, 4) if encodes else 0,
+            'bytes_saved': metrics.counter_total('audio_encode_bytes_saved_total')
+        }
+
+audio_encoder = AudioEncoder()
+
+def response_metadata_headers(response_data):
+    """Flatten scalar response fields into X- headers, e.g. generation_time -> X-Generation-Time"""
+    headers = {}
+    for section in (response_data, response_data.get('metrics', {}), response_data.get('emotional_analysis', {})):
+        for name, value in section.items():
+            if name in ('success', 'audio_base64', 'original_text') or value is None or isinstance(value, (dict, list)):
+                continue
+            header = 'X-' + '-'.join(part.upper() if part == 'ai' else part.capitalize() for part in name.split('_'))
+            # Header values must be latin-1 - percent-encode anything else (e.g. AI response text)
+            headers[header] = quote(str(value), safe=" !#$&'()*+,/:;=?@[]~")
+    return headers
+
+def encode_audio_http_body(response_data, result, response_format):
+    """Return (content_type, body, headers) for a binary or multipart audio response"""
+    audio_data = result['audio_data']
+    audio_content_type = result.get('content_type', 'audio/wav')
+    
+    if response_format == 'binary':
+        return audio_content_type, audio_data, response_metadata_headers(response_data)
+    
+    boundary = f'orpheus-{os.urandom(8).hex()}'
+    metadata = json.dumps(response_data, ensure_ascii=False).encode('utf-8')
+    body = b''.join([
+        f'--{boundary}\r\nContent-Type: application/json; charset=utf-8\r\n\r\n'.encode('ascii'),
+        metadata,
+        f'\r\n--{boundary}\r\nContent-Type: {audio_content_type}\r\nContent-Length: {len(audio_data)}\r\n\r\n'.encode('ascii'),
+        audio_data,
+        f'\r\n--{boundary}--\r\n'.encode('ascii')
+    ])
+    return f'multipart/mixed; boundary={boundary}', body, {}
+
+def build_generate_response(text, voice, voice_config, context, result, audio_base64):
+    """Build the /generate JSON body for a successful synthesis (audio_base64 is None for binary modes)"""
+    voice_type = voice_config['type']
+    word_count = len(text.split())
+    rtf = result['generation_time'] / result['duration'] if result['duration'] > 0 else 0
+    
+    response = {
+        'success': True,
+        'audio_base64': audio_base64,
+        'metrics': {
+            'generation_time': round(result['generation_time'], 2),
+            'audio_duration': round(result['duration'], 2),
+            'rtf': round(rtf, 3),
+            'sample_rate': ORPHEUS_SAMPLE_RATE if voice_type == 'orpheus' else 24000,
+            'word_count': word_count,
+            'voice': voice,
+            'voice_type': voice_type,
+            'context': context,
+            'method': f'{voice_type}_tts_optimized',
+            'streaming_used': result.get('streaming', False),
+            'cache_hit': result.get('cache_hit', False),
+            'coalesced': result.get('coalesced', False),
+            'prerendered': result.get('prerendered', False),
+            'emotion_mode': result.get('emotion_mode', 'natural'),
+            'temperature_used': result.get('temperature_used', 0.7),
+            'performance': result.get('performance', {}),
+            'emotion_enhanced': result.get('emotion_enhanced', False),
+            'precision': voice_config.get('precision', 'fp8'),
+            'audio_format': result.get('audio_format', 'wav')
         },
-        'private_investigator': {
-            'phrases': {'investigate', 'clues', 'mystery', 'case'},
-            'style': 'noir_sophistication',
-            'emphasis': 'confident_delivery'
-        }
+        'original_text': text
     }
+    if result.get('long_form'):
+        response['metrics']['long_form'] = True
+        response['metrics']['segments'] = result['segments']
+    if audio_base64 is None:
+        del response['audio_base64']
+    return response
+
+def build_conversation_response(mode, ai_response, voice, precision, audio_result, audio_base64, timings, emotional_analysis=None, emotion_mode=None, stage_timings=None):
+    """Build the JSON body for /conversation/respond and /conversation/respond_emotional"""
+    if not audio_result['success']:
+        return {
+            'success': False,
+            'error': audio_result.get('error', 'Audio generation failed'),
+            'ai_response': ai_response,
+            'voice_used': voice,
+            'mode': mode
+        }
     
-    # Apply extreme transformations for devils and angels
-    if archetype == 'angel':
-        # Make angelic speech more extreme with divine pauses and sacred emphasis
-        enhanced_text = enhanced_text.replace('.', '... blessed be... ')
-        enhanced_text = enhanced_text.replace('!', '... divine grace!')
-        enhanced_text = f"✧ {enhanced_text.strip()} ✧"
-        
-    elif archetype == 'devil':
-        # Make devilish speech more extreme with tempting pauses and seductive emphasis
-        enhanced_text = enhanced_text.replace('.', '... so tempting... ')
-        enhanced_text = enhanced_text.replace('!', '... wickedly delicious!')
-        enhanced_text = f"♦ {enhanced_text.strip()} ♦"
+    response_data = {
+        'success': True,
+        'ai_response': ai_response,
+        'audio_base64': audio_base64,
+        'voice_used': voice,
+        'precision_used': precision,
+        'mode': mode
+    }
+    if audio_base64 is None:
+        del response_data['audio_base64']
     
-    elif archetype == 'rocker' and gender == 'male':
-        # Make male rocker speech brutally aggressive and intense
-        enhanced_text = enhanced_text.upper()  # ALL CAPS for aggression
-        enhanced_text = enhanced_text.replace('.', '... BRUTAL RAGE... ')
-        enhanced_text = enhanced_text.replace('!', '!!! SAVAGE DESTROY!!!')
-        enhanced_text = f"🔥💀 {enhanced_text.strip()} 💀🔥"
+    if emotional_analysis is not None:
+        response_data['emotional_analysis'] = {
+            'detected_emotion': str(emotional_analysis['detected_emotion']),
+            'emotion_intensity': emotional_analysis['emotion_intensity'],
+            'response_style': str(emotional_analysis['response_style']),
+            'voice_tone': emotion_mode,
+            'conversation_approach': str(emotional_analysis['conversation_approach'])
+        }
     
-    return enhanced_text
+    response_data['metrics'] = {
+        'chatgpt_time': round(timings['chatgpt_time'], 2),
+        'audio_time': round(timings['audio_time'], 2),
+        'total_time': round(timings['total_time'], 2),
+        'audio_duration': round(audio_result.get('duration', 0), 2),
+        'words': len(ai_response.split()),
+        'voice': voice,
+        'precision': precision,
+        'audio_format': audio_result.get('audio_format', 'wav')
+    }
+    if stage_timings is not None:
+        response_data['metrics']['stages'] = {
+            stage: round(stage_timings.get(stage, 0), 3)
+            for stage in ('analysis', 'prompt_build', 'llm', 'tts', 'encode')
+        }
+    return response_data
 
-def apply_speaking_patterns(text, speaking_patterns, archetype):
-    """Apply speaking pattern modifications based on archetype"""
-    enhanced_text = text
+def build_voices_payload():
+    """Available voices with performance information"""
+    voices_with_perf = {}
+    for voice_id in VOICE_PROFILES:
+        config = VOICE_CONFIGS[voice_id]
+        voices_with_perf[voice_id] = config.copy()
+        voices_with_perf[voice_id]['performance_profile'] = {
+            'precision': config.get('precision', 'fp8'),
+            'max_tokens': config.get('max_tokens', 1800),
+            'streaming_compatible': True,  # POST /generate/stream
+            'target_latency': '1-3s' if config.get('precision') == 'fp8' else '2-4s'
+        }
     
-    # Pattern-specific modifications
-    if 'deliberate_pacing' in speaking_patterns:
-        # Add pauses for deliberate delivery
-        enhanced_text = enhanced_text.replace('.', '... ')
-        enhanced_text = enhanced_text.replace(',', ', ')
+    return {
+        'voices': voices_with_perf,
+        'count': len(voices_with_perf),
+        'capabilities': {
+            'real_time_generation': True,
+            'orpheus_ai_voices': True,
+            'streaming_audio': True,
+            'system_voices': False,
+            'emotion_support': True,
+            'performance_optimization': True,
+            'chatgpt_conversations': True,
+            'multiple_languages': False,
+            'voice_cloning': False
+        },
+        'performance_info': {
+            'target_tokens_per_sec': TARGET_TOKENS_PER_SEC,
+            'chunk_size': CHUNK_SIZE,
+            'max_concurrent_streams': MAX_CONCURRENT_STREAMS
+        }
+    }
+
+def json_body_with_etag(data):
+    """Serialize a response once: UTF-8 JSON bytes plus a strong ETag over them"""
+    body = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    return body, f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match check - a list of tags, weak tags or *"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag in tags or f'W/{etag}' in tags
+
+class StaticAsset:
+    """One template held in memory with its precompressed variants and ETags"""
     
-    if 'rapid_delivery' in speaking_patterns or 'fast_paced' in speaking_patterns:
-        # Remove some pauses for faster delivery
-        enhanced_text = enhanced_text.replace('...', '.')
-        enhanced_text = enhanced_text.replace(', ', ',')
+    __slots__ = ('name', 'content_type', 'mtime', 'variants')
     
-    if 'theatrical_delivery' in speaking_patterns:
-        # Add dramatic emphasis
-        enhanced_text = enhanced_text.replace('!', '!')
-        enhanced_text = enhanced_text.replace('?', '?')
+    def __init__(self, name, content_type, mtime, body):
+        self.name = name
+        self.content_type = content_type
+        self.mtime = mtime
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        # Strong ETags are per representation, so each encoding gets its own tag
+        self.variants = {'identity': (body, f'"{digest}"')}
+        compressed = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(compressed) < len(body):
+            self.variants['gzip'] = (compressed, f'"{digest}-gz"')
+        if brotli is not None:
+            compressed = brotli.compress(body, mode=brotli.MODE_TEXT)
+            if len(compressed) < len(body):
+                self.variants['br'] = (compressed, f'"{digest}-br"')
     
-    if 'drawling_delivery' in speaking_patterns:
-        # Cowboy-style drawl modifications
-        enhanced_text = enhanced_text.replace('ing', "in'")
-        
-    if 'hypnotic_rhythm' in speaking_patterns:
-        # Add hypnotic pauses
-        enhanced_text = enhanced_text.replace('.', '... ')
-        
-    return enhanced_text
+    def select(self, accept_encoding):
+        """Pick (encoding, body, etag) for an Accept-Encoding header - br, then gzip, then identity"""
+        accepted = set()
+        for item in (accept_encoding or '').split(','):
+            coding, _, params = item.partition(';')
+            params = params.replace(' ', '')
+            if params.startswith('q='):
+                try:
+                    if float(params[2:]) <= 0:
+                        continue  # Explicitly refused
+                except ValueError:
+                    continue
+            accepted.add(coding.strip().lower())
+        for encoding in ('br', 'gzip'):
+            if encoding in self.variants and (encoding in accepted or '*' in accepted):
+                return (encoding,) + self.variants[encoding]
+        return ('identity',) + self.variants['identity']
 
-def add_emotional_expression_tags(text, voice_config):
-    """Add emotional expression tags for dramatic archetypes"""
-    archetype = voice_config.get('archetype', '')
-    emotional_range = voice_config.get('emotional_range', [])
+class StaticAssetCache:
+    """
+    Templates loaded once from TEMPLATES_DIR and kept in memory. With reload
+    enabled (TEMPLATES_RELOAD) each lookup stats the file and re-reads it
+    when the mtime changed; otherwise the disk is only touched on first use.
+    """
     
-    # Add emotional tags based on archetype characteristics
-    if archetype in ['clown', 'sprite', 'mad_professor']:
-        # Playful archetypes get laughter
-        if any(word in text.lower() for word in ['funny', 'joke', 'amusing', 'silly']):
-            text = text + ' <laugh>'
+    CONTENT_TYPES = {'.html': 'text/html; charset=utf-8', '.js': 'application/javascript; charset=utf-8',
+                     '.css': 'text/css; charset=utf-8'}
     
-    if archetype in ['mystic', 'fortune_teller', 'wizard', 'witch']:
-        # Mystical archetypes get thoughtful pauses
-        if any(word in text.lower() for word in ['ancient', 'mystical', 'power', 'magic']):
-            text = '<sigh> ' + text
+    def __init__(self, directory, reload=False):
+        self.directory = directory
+        self.reload = reload
+        self._assets = {}
+        self._lock = threading.Lock()
     
-    if archetype in ['vampire', 'devil']:
-        # Dark archetypes get seductive breathing
-        if any(word in text.lower() for word in ['tempting', 'desire', 'want']):
-            text = text + ' <gasp>'
+    def _load(self, name, path, mtime):
+        with open(path, 'rb') as f:
+            body = f.read()
+        content_type = self.CONTENT_TYPES.get(os.path.splitext(name)[1], 'application/octet-stream')
+        return StaticAsset(name, content_type, mtime, body)
     
-    return text
-
-def add_vocal_characteristic_tags(text, vocal_characteristics):
-    """Add vocal characteristic tags for Orpheus processing"""
-    enhanced_text = text
+    def get(self, name):
+        """The cached asset for a template name; raises FileNotFoundError if it does not exist"""
+        asset = self._assets.get(name)
+        if asset is not None and not self.reload:
+            return asset
+        path = os.path.join(self.directory, name)
+        mtime = os.stat(path).st_mtime_ns
+        if asset is not None and asset.mtime == mtime:
+            return asset
+        with self._lock:
+            asset = self._assets.get(name)
+            if asset is None or asset.mtime != mtime:
+                asset = self._load(name, path, mtime)
+                self._assets[name] = asset
+                print(f"📄 Template loaded: {name} ({len(asset.variants['identity'][0])} bytes, "
+                      f"{', '.join(asset.variants)})")
+        return asset
     
-    # Map vocal characteristics to Orpheus tags
-    characteristic_tags = {
-        'raspy_edge': '<groan>',
-        'ethereal_softness': '<sigh>',
-        'commanding_presence': '',  # Use natural authority
-        'playful_energy': '<chuckle>',
-        'seductive_warmth': '<gasp>',
-        'theatrical_projection': '',  # Use natural projection
-        'hypnotic_quality': '<yawn>',
-        'mysterious_depth': '<sigh>'
+    def preload(self):
+        """Load every template up front so the first page view does no disk work"""
+        try:
+            names = sorted(os.listdir(self.directory))
+        except FileNotFoundError:
+            print(f"⚠️ Templates directory not found: {self.directory}")
+            return
+        for name in names:
+            if os.path.splitext(name)[1] in self.CONTENT_TYPES:
+                self.get(name)
+
+template_assets = StaticAssetCache(TEMPLATES_DIR, reload=TEMPLATES_RELOAD)
+
+# Voice configs only change with a restart, so /voices is serialized once
+VOICES_RESPONSE_BODY, VOICES_RESPONSE_ETAG = json_body_with_etag(build_voices_payload())
+
+def build_metrics_payload(server_stats):
+    """Performance metrics for /metrics"""
+    return {
+        'performance_metrics': performance_metrics_snapshot(),
+        'active_streams': metrics.gauge_total('orpheus_active_streams'),
+        'latency': metrics.snapshot(),
+        'max_concurrent_streams': orpheus_scheduler.limit,
+        'server': server_stats,
+        'connection_pools': upstream_sessions.get_stats(),
+        'audio_cache': audio_cache.get_stats(),
+        'audio_library': audio_library.get_stats(),
+        'tts_coalescing': orpheus_single_flight.get_stats(),
+        'upstream_scheduler': orpheus_scheduler.get_stats(),
+        'adaptive_concurrency': orpheus_concurrency.get_stats(),
+        'circuit_breaker': orpheus_circuit.get_stats(),
+        'hedging': tts_hedging.get_stats(),
+        'max_tokens_model': max_tokens_estimator.get_stats(),
+        'conversation_stats': conversation_sessions.get_stats(),
+        'emotional_profiles': len(emotional_engine.user_profiles),
+        'audio_encoding': audio_encoder.get_stats(),
+        'target_metrics': {
+            'tokens_per_second': TARGET_TOKENS_PER_SEC,
+            'max_generation_time': 3.0,
+            'stream_success_rate': 0.95
+        },
+        'timestamp': time.time()
     }
-    
-    # Apply relevant tags based on characteristics
-    for characteristic in vocal_characteristics:
-        if characteristic in characteristic_tags and characteristic_tags[characteristic]:
-            tag = characteristic_tags[characteristic]
-            # Add tag occasionally, not to every sentence
-            if len(enhanced_text.split('.')) > 1:
-                sentences = enhanced_text.split('.')
-                if len(sentences) > 1:
-                    sentences[1] = tag + ' ' + sentences[1]
-                    enhanced_text = '.'.join(sentences)
-    
-    return enhanced_text
 
 class OptimizedVoiceRequestHandler(BaseHTTPRequestHandler):
+    def handle_one_request(self):
+        """Handle one request and record its latency per route, method and status"""
+        request_start = time.time()
+        self.response_status = None
+        super().handle_one_request()
+        if self.response_status is not None:
+            metrics.observe(
+                'http_request_duration_seconds', time.time() - request_start,
+                route=metrics_route_label(urlparse(getattr(self, 'path', '')).path),
+                method=getattr(self, 'command', None) or 'unknown', status=self.response_status
+            )
+
+    def send_response(self, code, message=None):
+        self.response_status = code
+        super().send_response(code, message)
+
     def do_OPTIONS(self):
         """Handle CORS preflight requests"""
         self.send_response(200)
@@ -1932,8 +5145,12 @@ class OptimizedVoiceRequestHandler(BaseHTTPRequestHandler):
         """Handle POST requests"""
         if self.path == '/generate':
             self.handle_generate()
+        elif self.path == '/generate/stream':
+            self.handle_generate_stream()
         elif self.path == '/conversation/respond':
             self.handle_conversation_respond()
+        elif self.path == '/conversation/respond/stream':
+            self.handle_conversation_respond_stream()
         elif self.path == '/conversation/clear':
             self.handle_clear_conversation()
         elif self.path == '/conversation/respond_emotional':
@@ -1941,56 +5158,47 @@ class OptimizedVoiceRequestHandler(BaseHTTPRequestHandler):
         else:
             self.send_error(404, "Not Found")
 
-    def serve_voice_chat(self):
-        """Serve the enhanced voice chat interface with STT"""
+    def send_template(self, name, not_found_message):
+        """Serve an HTML interface from the template cache: precompressed body, ETag, 304 on revalidation"""
         try:
-            with open('templates/index_with_stt.html', 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            self.send_response(200)
-            self.send_header('Content-Type', 'text/html; charset=utf-8')
-            self.send_header('Cache-Control', 'no-cache')
-            self.end_headers()
-            self.wfile.write(content.encode('utf-8'))
-            
+            asset = template_assets.get(name)
         except FileNotFoundError:
-            self.send_error_response('Voice chat interface not found', 404)
+            self.send_error_response(not_found_message, 404)
+            return
         except Exception as e:
             self.send_error_response(f'Error serving interface: {e}', 500)
+            return
+        
+        encoding, body, etag = asset.select(self.headers.get('Accept-Encoding'))
+        if etag_matches(self.headers.get('If-None-Match'), etag):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            return
+        
+        self.send_response(200)
+        self.send_header('Content-Type', asset.content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if encoding != 'identity':
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('ETag', etag)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Cache-Control', 'no-cache')  # Revalidate every time - a 304 costs no body
+        self.end_headers()
+        self.wfile.write(body)
+
+    def serve_voice_chat(self):
+        """Serve the enhanced voice chat interface with STT"""
+        self.send_template('index_with_stt.html', 'Voice chat interface not found')
 
     def serve_archetype_gallery(self):
         """Serve the archetype voice gallery interface"""
-        try:
-            with open('templates/archetype_voices.html', 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            self.send_response(200)
-            self.send_header('Content-Type', 'text/html; charset=utf-8')
-            self.send_header('Cache-Control', 'no-cache')
-            self.end_headers()
-            self.wfile.write(content.encode('utf-8'))
-            
-        except FileNotFoundError:
-            self.send_error_response('Archetype gallery not found', 404)
-        except Exception as e:
-            self.send_error_response(f'Error serving archetype gallery: {e}', 500)
+        self.send_template('archetype_voices.html', 'Archetype gallery not found')
 
     def serve_archetype_tester(self):
         """Serve the comprehensive archetype voice tester interface"""
-        try:
-            with open('templates/archetype_voice_tester.html', 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            self.send_response(200)
-            self.send_header('Content-Type', 'text/html; charset=utf-8')
-            self.send_header('Cache-Control', 'no-cache')
-            self.end_headers()
-            self.wfile.write(content.encode('utf-8'))
-            
-        except FileNotFoundError:
-            self.send_error_response('Archetype voice tester not found', 404)
-        except Exception as e:
-            self.send_error_response(f'Error serving archetype tester: {e}', 500)
+        self.send_template('archetype_voice_tester.html', 'Archetype voice tester not found')
 
     def send_health_response(self):
         """Send health check response"""
@@ -2004,14 +5212,15 @@ class OptimizedVoiceRequestHandler(BaseHTTPRequestHandler):
                 'chatgpt_integration': True,
                 'loop_prevention': True,
                 'orpheus_tts': True,
-                'orpheus_streaming': False,  # Disabled for stability
+                'orpheus_streaming': True,  # POST /generate/stream
                 'system_tts': False,
-                'persistent_connections': False,  # Using requests for stability
+                'persistent_connections': True,  # Pooled keep-alive sessions per upstream host
                 'performance_optimization': True
             },
-            'performance': performance_metrics,
-            'active_streams': active_streams,
-            'max_concurrent_streams': MAX_CONCURRENT_STREAMS,
+            'performance': performance_metrics_snapshot(),
+            'active_streams': metrics.gauge_total('orpheus_active_streams'),
+            'max_concurrent_streams': orpheus_scheduler.limit,
+            'server': self.get_server_stats(),
             'available_voices': list(VOICE_CONFIGS.keys()),
             'api_status': {
                 'openai_configured': bool(OPENAI_API_KEY),
@@ -2024,58 +5233,32 @@ class OptimizedVoiceRequestHandler(BaseHTTPRequestHandler):
         self.send_json_response(response)
 
     def send_voices_response(self):
-        """Send available voices with performance information"""
-        voices_with_perf = {}
-        for voice_id, config in VOICE_CONFIGS.items():
-            voices_with_perf[voice_id] = config.copy()
-            if config['type'] == 'orpheus':
-                voices_with_perf[voice_id]['performance_profile'] = {
-                    'precision': config.get('precision', 'fp8'),
-                    'max_tokens': config.get('max_tokens', 1800),
-                    'streaming_compatible': False,  # Disabled for now
-                    'target_latency': '1-3s' if config.get('precision') == 'fp8' else '2-4s'
-                }
-        
-        response = {
-            'voices': voices_with_perf,
-            'count': len(VOICE_CONFIGS),
-            'capabilities': {
-                'real_time_generation': True,
-                'orpheus_ai_voices': True,
-                'streaming_audio': False,  # Disabled for stability
-                'system_voices': False,
-                'emotion_support': True,
-                'performance_optimization': True,
-                'chatgpt_conversations': True,
-                'multiple_languages': False,
-                'voice_cloning': False
-            },
-            'performance_info': {
-                'target_tokens_per_sec': TARGET_TOKENS_PER_SEC,
-                'chunk_size': CHUNK_SIZE,
-                'max_concurrent_streams': MAX_CONCURRENT_STREAMS
-            }
-        }
-        self.send_json_response(response)
+        """Send available voices with performance information (precomputed body, ETag revalidation)"""
+        if etag_matches(self.headers.get('If-None-Match'), VOICES_RESPONSE_ETAG):
+            self.send_response(304)
+            self.send_header('ETag', VOICES_RESPONSE_ETAG)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(VOICES_RESPONSE_BODY)))
+        self.send_header('ETag', VOICES_RESPONSE_ETAG)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(VOICES_RESPONSE_BODY)
 
     def send_metrics_response(self):
-        """Send performance metrics"""
-        response = {
-            'performance_metrics': performance_metrics,
-            'active_streams': active_streams,
-            'max_concurrent_streams': MAX_CONCURRENT_STREAMS,
-            'conversation_stats': {
-                'active_sessions': len(conversation_sessions),
-                'total_messages': sum(len(session) for session in conversation_sessions.values())
-            },
-            'target_metrics': {
-                'tokens_per_second': TARGET_TOKENS_PER_SEC,
-                'max_generation_time': 3.0,
-                'stream_success_rate': 0.95
-            },
-            'timestamp': time.time()
-        }
-        self.send_json_response(response)
+        """Send performance metrics as JSON, or Prometheus text for scrapers"""
+        if wants_prometheus_metrics(parse_qs(urlparse(self.path).query), self.headers.get('Accept')):
+            body = render_prometheus_metrics(self.get_server_stats()).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self.send_json_response(build_metrics_payload(self.get_server_stats()))
 
     def handle_generate(self):
         """Handle speech generation with optimized Orpheus and emotional controls"""
@@ -2093,76 +5276,144 @@ class OptimizedVoiceRequestHandler(BaseHTTPRequestHandler):
             if not text:
                 self.send_error_response('Text is required', 400)
                 return
-                
-            if not voice or voice not in VOICE_CONFIGS:
-                voice = 'orpheus_leah'  # Default to optimized Orpheus voice
             
-            voice_config = VOICE_CONFIGS[voice].copy()  # Make a copy to avoid modifying original
+            voice, voice_config = resolve_generate_voice(voice)
             voice_type = voice_config['type']
-            
-            # Handle dynamic precision switching for archetype voices
-            if voice.endswith('_fp16') and voice.replace('_fp16', '') in VOICE_CONFIGS:
-                # User specifically requested FP16 - update precision
-                base_voice = voice.replace('_fp16', '')
-                voice_config = VOICE_CONFIGS[base_voice].copy()
-                voice_config['precision'] = 'fp16'
-                voice = base_voice  # Use base voice name for API
-            elif '_fp16' not in voice and voice + '_fp16' not in VOICE_CONFIGS:
-                # Regular archetype voice - ensure FP8 for speed
-                if voice.startswith('archetype_'):
-                    voice_config['precision'] = 'fp8'
+            priority = request_priority(data)
+            deadline = request_deadline(data, priority)
             
             print(f"🎤 Generating {context} audio using ORPHEUS for voice '{voice}' ({voice_config.get('precision', 'fp8')}) with emotion '{emotion_mode}': {text[:50]}...")
             
-            # Generate audio using Orpheus TTS with emotion controls
-            result = generate_orpheus_tts_optimized(text, voice_config, emotion_mode=emotion_mode, add_emotion_tags=add_emotion_tags)
+            # Generate audio using Orpheus TTS with emotion controls - pre-rendered lines skip synthesis
+            result = audio_library.lookup(text, voice, voice_config, emotion_mode, add_emotion_tags)
+            if result is not None:
+                print(f"📚 Serving pre-rendered clip for '{voice}'")
+            elif wants_long_form(data, text):
+                result = generate_long_form_tts(text, voice_config, emotion_mode=emotion_mode, add_emotion_tags=add_emotion_tags,
+                                                priority=priority, deadline=deadline)
+            else:
+                result = generate_orpheus_tts_optimized(text, voice_config, emotion_mode=emotion_mode, add_emotion_tags=add_emotion_tags,
+                                                        priority=priority, deadline=deadline)
             
             if result['success']:
-                # Read audio file and encode as base64
-                with open(result['file_path'], 'rb') as f:
-                    audio_data = f.read()
-                    audio_base64 = base64.b64encode(audio_data).decode('utf-8')
-                
-                # Clean up temp file
-                os.unlink(result['file_path'])
-                
-                word_count = len(text.split())
-                rtf = result['generation_time'] / result['duration'] if result['duration'] > 0 else 0
-                
-                response = {
-                    'success': True,
-                    'audio_base64': audio_base64,
-                    'metrics': {
-                        'generation_time': round(result['generation_time'], 2),
-                        'audio_duration': round(result['duration'], 2),
-                        'rtf': round(rtf, 3),
-                        'sample_rate': ORPHEUS_SAMPLE_RATE if voice_type == 'orpheus' else 24000,
-                        'word_count': word_count,
-                        'voice': voice,
-                        'voice_type': voice_type,
-                        'context': context,
-                        'method': f'{voice_type}_tts_optimized',
-                        'streaming_used': result.get('streaming', False),
-                        'emotion_mode': result.get('emotion_mode', 'natural'),
-                        'temperature_used': result.get('temperature_used', 0.7),
-                        'performance': result.get('performance', {}),
-                        'emotion_enhanced': result.get('emotion_enhanced', False),
-                        'precision': voice_config.get('precision', 'fp8')
-                    },
-                    'original_text': text
-                }
+                result = audio_encoder.encode(result, negotiate_audio_codec(data, self.headers.get('Accept')))
+                response_format = negotiate_audio_response_format(data, self.headers.get('Accept'))
+                audio_base64 = encode_audio_base64(result) if response_format == 'json' else None
+                response = build_generate_response(text, voice, voice_config, context, result, audio_base64)
                 
                 precision = voice_config.get('precision', 'fp8')
                 perf_indicator = f"⚡ {precision.upper()} ({emotion_mode.upper()})"
                 print(f"✅ Generated {result['duration']:.1f}s audio in {result['generation_time']:.1f}s using {voice_type.upper()} {perf_indicator}")
-                self.send_json_response(response)
+                self.send_audio_response(response, result, response_format)
             else:
-                self.send_error_response(f'Audio generation failed: {result["error"]}', 500)
+                self.send_error_response(f'Audio generation failed: {result["error"]}', result.get('status_code', 500))
                 
         except Exception as e:
             print(f"❌ Generation error: {e}")
             self.send_error_response(str(e), 500)
 
+    def handle_generate_stream(self):
+        """Stream Orpheus audio to the client as chunked WAV while it is being generated"""
+        try:
+            content_length = int(self.headers.get('Content-Length', 0))
+            post_data = self.rfile.read(content_length)
+            data = json.loads(post_data.decode('utf-8'))
+            
+            text = data.get('text', '').strip()
+            voice = data.get('voice', '').strip()
+            emotion_mode = data.get('emotion_mode', 'natural')
+            add_emotion_tags = data.get('add_emotion_tags', True)
+            
+            if not text:
+                self.send_error_response('Text is required', 400)
+                return
+            
+            voice, voice_config = resolve_generate_voice(voice)
+            priority = request_priority(data)
+            deadline = request_deadline(data, priority)
+        except Exception as e:
+            print(f"❌ Streaming generation error: {e}")
+            self.send_error_response(str(e), 500)
+            return
+        
+        start_time = time.time()
+        stream_stats = {}
+        audio_stream = stream_orpheus_tts(text, voice_config, emotion_mode, add_emotion_tags, stream_stats, priority=priority, deadline=deadline)
+        metrics.add_gauge('orpheus_active_streams', 1)
+        try:
+            # Wait for the first chunk before committing to a 200 so upstream errors can still fall back
+            try:
+                first_chunk = next(audio_stream, b'')
+            except OrpheusCircuitOpenError:
+                print(f"🔌 Orpheus circuit {orpheus_circuit.state} - streaming skipped, using OpenAI TTS fallback")
+                self.send_fallback_audio(text, voice_config, emotion_mode)
+                return
+            except OrpheusStreamError as e:
+                if e.status_code != 503 and should_fallback_after_orpheus_error(e.status_code, e.error_text):
+                    self.send_fallback_audio(text, voice_config, emotion_mode)
+                else:
+                    self.send_error_response(f'Audio generation failed: {e}', 503 if e.status_code == 503 else 500)
+                return
+            except requests.exceptions.RequestException as e:
+                print(f"⏰ Orpheus stream failed: {e} - using OpenAI TTS fallback")
+                self.send_fallback_audio(text, voice_config, emotion_mode)
+                return
+            
+            # Chunked transfer encoding needs an HTTP/1.1 status line
+            self.protocol_version = 'HTTP/1.1'
+            self.close_connection = True
+            self.send_response(200)
+            self.send_header('Content-Type', 'audio/wav')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.send_header('Cache-Control', 'no-store')
+            self.send_header('Connection', 'close')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('X-Voice', voice)
+            self.send_header('X-Precision', voice_config.get('precision', 'fp8'))
+            self.send_header('X-Time-To-First-Audio', f"{stream_stats.get('time_to_first_audio', 0):.3f}")
+            self.send_header('X-Audio-Cache', 'HIT' if stream_stats.get('cache_hit') else 'MISS')
+            self.end_headers()
+            
+            self.write_chunk(create_streaming_wav_header() + first_chunk)
+            for chunk in audio_stream:
+                self.write_chunk(chunk)
+            self.wfile.write(b'0\r\n\r\n')
+            
+            bytes_streamed = stream_stats.get('bytes_streamed', 0)
+            duration = bytes_streamed / (ORPHEUS_SAMPLE_RATE * 2)
+            print(f"✅ Streamed {duration:.1f}s audio in {time.time() - start_time:.1f}s (first audio {stream_stats.get('time_to_first_audio', 0):.2f}s)")
+            
+        except (BrokenPipeError, ConnectionResetError):
+            print(f"🔌 Client disconnected during audio stream")
+        except Exception as e:
+            # Headers are already sent - all we can do is drop the connection
+            print(f"❌ Streaming generation error: {e}")
+        finally:
+            audio_stream.close()
+            metrics.add_gauge('orpheus_active_streams', -1)
+
+    def write_chunk(self, data):
+        """Write one HTTP/1.1 chunked transfer encoding frame"""
+        if data:
+            self.wfile.write(f'{len(data):X}\r\n'.encode('ascii') + data + b'\r\n')
+            self.wfile.flush()
+
+    def send_fallback_audio(self, text, voice_config, emotion_mode):
+        """Send the complete OpenAI fallback clip when Orpheus streaming is unavailable"""
+        result = generate_openai_tts_fallback(text, voice_config, emotion_mode)
+        if not result['success']:
+            self.send_error_response(f'Audio generation failed: {result["error"]}', 500)
+            return
+        
+        audio_data = result['audio_data']
+        self.send_response(200)
+        self.send_header('Content-Type', result['content_type'])
+        self.send_header('Content-Length', str(len(audio_data)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('X-Fallback-Used', 'openai_tts')
+        self.end_headers()
+        self.wfile.write(audio_data)
+
     def handle_conversation_respond(self):
         """Handle fast conversation generation (optimized for speed)"""
         try:
@@ -2179,7 +5430,7 @@ class OptimizedVoiceRequestHandler(BaseHTTPRequestHandler):
                 return
             
             # Get voice configuration
-            voice_config = VOICE_CONFIGS.get(voice, VOICE_CONFIGS['orpheus_leah'])
+            voice_config = get_voice_profile(voice).config
             precision = voice_config.get('precision', 'fp8')
             
             print(f"⚡ FAST conversation for: {user_input[:50]}...")
@@ -2198,58 +5449,88 @@ class OptimizedVoiceRequestHandler(BaseHTTPRequestHandler):
                 voice_config, 
                 use_streaming=False,
                 emotion_mode='natural',
-                add_emotion_tags=False  # Skip emotion processing for speed
+                add_emotion_tags=False,  # Skip emotion processing for speed
+                priority='conversation',
+                deadline=request_deadline(data, 'conversation', start_time)
             )
             audio_time = time.time() - audio_start_time
             total_time = time.time() - start_time
             
+            audio_result = audio_encoder.encode(audio_result, negotiate_audio_codec(data, self.headers.get('Accept')))
+            response_format = negotiate_audio_response_format(data, self.headers.get('Accept'))
+            audio_base64 = encode_audio_base64(audio_result) if audio_result['success'] and response_format == 'json' else None
+            response_data = build_conversation_response(
+                'fast', ai_response, voice, precision, audio_result, audio_base64,
+                {'chatgpt_time': chatgpt_time, 'audio_time': audio_time, 'total_time': total_time}
+            )
+            
             if audio_result['success']:
-                # Read and encode audio
-                with open(audio_result['file_path'], 'rb') as f:
-                    audio_data = f.read()
-                    audio_base64 = base64.b64encode(audio_data).decode('utf-8')
-                
-                # Clean up
-                os.unlink(audio_result['file_path'])
-                
-                response_data = {
-                    'success': True,
-                    'ai_response': ai_response,
-                    'audio_base64': audio_base64,
-                    'voice_used': voice,
-                    'precision_used': precision,
-                    'mode': 'fast',
-                    'metrics': {
-                        'chatgpt_time': round(chatgpt_time, 2),
-                        'audio_time': round(audio_time, 2),
-                        'total_time': round(total_time, 2),
-                        'audio_duration': round(audio_result.get('duration', 0), 2),
-                        'words': len(ai_response.split()),
-                        'voice': voice,
-                        'precision': precision
-                    }
-                }
-                
                 # Fast mode logging
                 print(f"🚀 FAST Response Generated:")
                 print(f"   Voice: {voice} ({precision.upper()})")
                 print(f"   Total: {total_time:.2f}s (ChatGPT: {chatgpt_time:.2f}s, Audio: {audio_time:.2f}s)")
-                
-            else:
-                response_data = {
-                    'success': False,
-                    'error': audio_result.get('error', 'Audio generation failed'),
-                    'ai_response': ai_response,
-                    'voice_used': voice,
-                    'mode': 'fast'
-                }
             
-            self.send_json_response(response_data)
+            self.send_audio_response(response_data, audio_result, response_format)
             
         except Exception as e:
             print(f"❌ Fast conversation error: {e}")
             self.send_error_response(f'Fast conversation error: {str(e)}', 500)
 
+    def handle_conversation_respond_stream(self):
+        """Sentence-pipelined fast conversation, streamed as NDJSON segments in playback order"""
+        try:
+            content_length = int(self.headers.get('Content-Length', 0))
+            post_data = self.rfile.read(content_length)
+            data = json.loads(post_data.decode('utf-8'))
+            
+            user_input = data.get('text', '').strip()
+            voice = data.get('voice', 'orpheus_leah')
+            session_id = data.get('session_id', 'default')
+            
+            if not user_input:
+                self.send_error_response('No text provided', 400)
+                return
+            
+            voice_config = get_voice_profile(voice).config
+            precision = voice_config.get('precision', 'fp8')
+            codec = negotiate_audio_codec(data, None)  # The body is NDJSON, so only the format field applies
+        except Exception as e:
+            print(f"❌ Pipelined conversation error: {e}")
+            self.send_error_response(f'Pipelined conversation error: {str(e)}', 500)
+            return
+        
+        print(f"⚡ PIPELINED conversation for: {user_input[:50]}...")
+        
+        start_time = time.time()
+        stats = {}
+        pipeline = generate_pipelined_conversation(user_input, session_id, voice_config, stats=stats)
+        try:
+            self.protocol_version = 'HTTP/1.1'
+            self.close_connection = True
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.send_header('Cache-Control', 'no-store')
+            self.send_header('Connection', 'close')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            
+            for index, sentence, result in pipeline:
+                result = audio_encoder.encode(result, codec)
+                segment = build_pipeline_segment(index, sentence, result, start_time)
+                self.write_chunk(json.dumps(segment).encode('utf-8') + b'\n')
+            self.write_chunk(json.dumps(build_pipeline_summary(voice, precision, stats)).encode('utf-8') + b'\n')
+            self.wfile.write(b'0\r\n\r\n')
+            
+            print(f"🚀 PIPELINED Response: {stats.get('segments', 0)} segments, first audio {stats.get('time_to_first_audio', 0):.2f}s, total {stats.get('total_time', 0):.2f}s")
+            
+        except (BrokenPipeError, ConnectionResetError):
+            print(f"🔌 Client disconnected during pipelined response")
+        except Exception as e:
+            print(f"❌ Pipelined conversation error: {e}")
+        finally:
+            pipeline.close()
+
     def handle_conversation_respond_emotional(self):
         """Handle emotional conversation generation (advanced features)"""
         try:
@@ -2266,7 +5547,7 @@ class OptimizedVoiceRequestHandler(BaseHTTPRequestHandler):
                 return
             
             # Get voice configuration
-            voice_config = VOICE_CONFIGS.get(voice, VOICE_CONFIGS['orpheus_tara_fp16'])
+            voice_config = get_voice_profile(voice, 'orpheus_tara_fp16').config
             precision = voice_config.get('precision', 'fp16')
             
             print(f"🧠 Generating emotionally aware response for: {user_input[:50]}...")
@@ -2274,62 +5555,44 @@ class OptimizedVoiceRequestHandler(BaseHTTPRequestHandler):
             
             start_time = time.time()
             
-            # Get emotional analysis
-            emotional_analysis = emotional_engine.generate_emotionally_aware_response(user_input, session_id)
+            # Analyse once - the chat and TTS stages reuse this context
+            request_context = analyze_emotional_request(user_input, session_id)
+            emotional_analysis = request_context.emotional_analysis
             
             # Generate emotionally aware ChatGPT response (no async needed - already sync)
-            ai_response = generate_emotionally_aware_chatgpt_response(user_input, session_id)
+            ai_response = generate_emotionally_aware_chatgpt_response(user_input, session_id, request_context)
             chatgpt_time = time.time() - start_time
             
             # Apply emotional adjustments to voice generation
-            emotion_mode = emotional_analysis.get('voice_tone', 'natural')
-            
-            # Generate with emotional processing
-            audio_start_time = time.time()
-            audio_result = generate_orpheus_tts_optimized(
-                ai_response, 
-                voice_config, 
-                use_streaming=False,
-                emotion_mode=emotion_mode,
-                add_emotion_tags=True
-            )
+            emotion_mode = request_context.emotion_mode
+            
+            # Generate with emotional processing
+            audio_start_time = time.time()
+            with request_context.stage('tts'):
+                audio_result = generate_orpheus_tts_optimized(
+                    ai_response, 
+                    voice_config, 
+                    use_streaming=False,
+                    emotion_mode=emotion_mode,
+                    add_emotion_tags=True,
+                    priority='conversation',
+                    deadline=request_deadline(data, 'conversation', start_time)
+                )
             audio_time = time.time() - audio_start_time
+            
+            response_format = negotiate_audio_response_format(data, self.headers.get('Accept'))
+            with request_context.stage('encode'):
+                audio_result = audio_encoder.encode(audio_result, negotiate_audio_codec(data, self.headers.get('Accept')))
+                audio_base64 = encode_audio_base64(audio_result) if audio_result['success'] and response_format == 'json' else None
             total_time = time.time() - start_time
+            response_data = build_conversation_response(
+                'emotional', ai_response, voice, precision, audio_result, audio_base64,
+                {'chatgpt_time': chatgpt_time, 'audio_time': audio_time, 'total_time': total_time},
+                emotional_analysis=emotional_analysis, emotion_mode=emotion_mode,
+                stage_timings=request_context.stage_timings
+            )
             
             if audio_result['success']:
-                # Read and encode audio
-                with open(audio_result['file_path'], 'rb') as f:
-                    audio_data = f.read()
-                    audio_base64 = base64.b64encode(audio_data).decode('utf-8')
-                
-                # Clean up
-                os.unlink(audio_result['file_path'])
-                
-                response_data = {
-                    'success': True,
-                    'ai_response': ai_response,
-                    'audio_base64': audio_base64,
-                    'voice_used': voice,
-                    'precision_used': precision,
-                    'mode': 'emotional',
-                    'emotional_analysis': {
-                        'detected_emotion': str(emotional_analysis['detected_emotion']),
-                        'emotion_intensity': emotional_analysis['emotion_intensity'],
-                        'response_style': str(emotional_analysis['response_style']),
-                        'voice_tone': emotion_mode,
-                        'conversation_approach': str(emotional_analysis['conversation_approach'])
-                    },
-                    'metrics': {
-                        'chatgpt_time': round(chatgpt_time, 2),
-                        'audio_time': round(audio_time, 2),
-                        'total_time': round(total_time, 2),
-                        'audio_duration': round(audio_result.get('duration', 0), 2),
-                        'words': len(ai_response.split()),
-                        'voice': voice,
-                        'precision': precision
-                    }
-                }
-                
                 # Emotional logging
                 print(f"🎭 Emotional Response Generated:")
                 print(f"   User emotion: {emotional_analysis['detected_emotion']} ({emotional_analysis['emotion_intensity']:.2f})")
@@ -2337,17 +5600,8 @@ class OptimizedVoiceRequestHandler(BaseHTTPRequestHandler):
                 print(f"   Voice: {voice} ({precision.upper()})")
                 print(f"   Voice tone: {emotion_mode}")
                 print(f"   Total time: {total_time:.2f}s (ChatGPT: {chatgpt_time:.2f}s, Audio: {audio_time:.2f}s)")
-                
-            else:
-                response_data = {
-                    'success': False,
-                    'error': audio_result.get('error', 'Audio generation failed'),
-                    'ai_response': ai_response,
-                    'voice_used': voice,
-                    'mode': 'emotional'
-                }
             
-            self.send_json_response(response_data)
+            self.send_audio_response(response_data, audio_result, response_format)
             
         except Exception as e:
             print(f"❌ Emotional conversation error: {e}")
@@ -2364,8 +5618,7 @@ class OptimizedVoiceRequestHandler(BaseHTTPRequestHandler):
             else:
                 session_id = 'default'
             
-            if session_id in conversation_sessions:
-                del conversation_sessions[session_id]
+            conversation_sessions.clear(session_id)
             
             response = {
                 'success': True,
@@ -2383,13 +5636,13 @@ class OptimizedVoiceRequestHandler(BaseHTTPRequestHandler):
             query_params = parse_qs(urlparse(self.path).query)
             session_id = query_params.get('session_id', ['default'])[0]
             
-            history = conversation_sessions.get(session_id, [])
+            history = conversation_sessions.get_history(session_id)
             
             response = {
                 'history': history,
                 'total_messages': len(history),
                 'session_id': session_id,
-                'active_sessions': list(conversation_sessions.keys()),
+                'active_sessions': conversation_sessions.session_ids(),
                 'message': f'Conversation history for session {session_id}'
             }
             self.send_json_response(response)
@@ -2398,18 +5651,32 @@ class OptimizedVoiceRequestHandler(BaseHTTPRequestHandler):
 
     def debug_interface(self):
         """Debug chat interface for testing STT + ChatGPT"""
-        try:
-            with open('templates/debug_chat.html', 'r', encoding='utf-8') as f:
-                html_content = f.read()
-            
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html; charset=utf-8')
-            self.send_header('Cache-Control', 'no-cache')
-            self.end_headers()
-            self.wfile.write(html_content.encode('utf-8'))
-            
-        except Exception as e:
-            self.send_error(500, f"Error loading debug interface: {str(e)}")
+        self.send_template('debug_chat.html', 'Debug interface not found')
+
+    def get_server_stats(self):
+        """Worker pool statistics for the server instance handling this request"""
+        if isinstance(self.server, BoundedThreadPoolHTTPServer):
+            return self.server.get_pool_stats()
+        return {'mode': 'single'}
+
+    def send_audio_response(self, response_data, result, response_format):
+        """Send a generation result as JSON+base64, raw audio or multipart, straight from memory"""
+        if response_format == 'json' or not response_data.get('success'):
+            self.send_json_response(response_data)
+            return
+        
+        content_type, body, headers = encode_audio_http_body(response_data, result, response_format)
+        
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if headers:
+            self.send_header('Access-Control-Expose-Headers', ', '.join(headers))
+        self.end_headers()
+        self.wfile.write(body)
 
     def send_json_response(self, data):
         """Send JSON response with proper headers"""
@@ -2448,6 +5715,809 @@ class OptimizedVoiceRequestHandler(BaseHTTPRequestHandler):
             return
         super().log_message(format, *args)
 
+class BoundedThreadPoolHTTPServer(HTTPServer):
+    """
+    HTTPServer that hands accepted connections to a fixed pool of worker threads.
+    A slow Orpheus call only ties up one worker, so /health and /voices stay responsive.
+    Connections arriving while the pending queue is full are answered with 503.
+    """
+
+    def __init__(self, server_address, handler_class, workers=SERVER_WORKERS, queue_size=SERVER_QUEUE_SIZE, bind_and_activate=True):
+        super().__init__(server_address, handler_class, bind_and_activate)
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.pending_requests = queue.Queue(maxsize=self.queue_size)
+        self.stats_lock = threading.Lock()
+        self.busy_workers = 0
+        self.handled_requests = 0
+        self.rejected_requests = 0
+        self.worker_threads = []
+        for index in range(self.workers):
+            worker = Thread(target=self._worker_loop, name=f'voice-worker-{index}', daemon=True)
+            worker.start()
+            self.worker_threads.append(worker)
+
+    def process_request(self, request, client_address):
+        """Queue the connection for a worker instead of handling it inline"""
+        try:
+            self.pending_requests.put_nowait((request, client_address))
+        except queue.Full:
+            with self.stats_lock:
+                self.rejected_requests += 1
+            self._reject_request(request)
+
+    def _worker_loop(self):
+        while True:
+            item = self.pending_requests.get()
+            if item is None:
+                break
+            request, client_address = item
+            with self.stats_lock:
+                self.busy_workers += 1
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+                with self.stats_lock:
+                    self.busy_workers -= 1
+                    self.handled_requests += 1
+
+    def _reject_request(self, request):
+        """Answer with 503 straight from the accept loop without tying up a worker"""
+        body = json.dumps({
+            'success': False,
+            'error': 'Server busy - request queue is full',
+            'timestamp': time.time(),
+            'status_code': 503
+        }).encode('utf-8')
+        head = (
+            'HTTP/1.0 503 Service Unavailable\r\n'
+            'Content-Type: application/json; charset=utf-8\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            'Retry-After: 1\r\n'
+            'Access-Control-Allow-Origin: *\r\n'
+            'Connection: close\r\n\r\n'
+        ).encode('latin-1')
+        try:
+            # Never wait on the client here - this runs on the accept loop. Drain whatever
+            # request bytes have already arrived so closing the socket does not reset the reply
+            request.setblocking(False)
+            try:
+                request.recv(65536)
+            except BlockingIOError:
+                pass
+            # A fresh connection's send buffer is empty, so the short reply goes out in one call
+            request.sendall(head + body)
+        except OSError:
+            pass
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        for _ in self.worker_threads:
+            try:
+                self.pending_requests.put_nowait(None)
+            except queue.Full:
+                break
+
+    def get_pool_stats(self):
+        """Snapshot of worker pool utilisation for /health and /metrics"""
+        with self.stats_lock:
+            return {
+                'mode': 'threadpool',
+                'pid': os.getpid(),
+                'workers': self.workers,
+                'busy_workers': self.busy_workers,
+                'queued_requests': self.pending_requests.qsize(),
+                'queue_size': self.queue_size,
+                'handled_requests': self.handled_requests,
+                'rejected_requests': self.rejected_requests
+            }
+
+def reinitialize_after_fork():
+    """Per-process state a forked worker must not share with its supervisor"""
+    if isinstance(conversation_sessions, SQLiteSessionStore):
+        conversation_sessions.reopen()
+
+class PreforkSupervisor:
+    """
+    Pre-fork serving (SERVER_MODE=prefork): the supervisor binds one listening
+    socket, then forks SERVER_PROCESSES workers that inherit it and each run a
+    BoundedThreadPoolHTTPServer on it. Everything loaded at import - voice
+    profiles, compiled enhancement plans, templates, the audio library index -
+    is shared copy-on-write, and CPU work in handlers runs on every core
+    instead of behind one GIL. Crashed workers are restarted.
+    
+    Caches, metrics and in-memory sessions are per process; use
+    SESSION_STORE_BACKEND=sqlite to share conversation history.
+    """
+    
+    CRASH_LOOP_SECONDS = 1.0  # Workers dying faster than this are restarted after a pause
+    SHUTDOWN_TIMEOUT = 10.0
+    
+    def __init__(self, listen_socket, processes=SERVER_PROCESSES, handler_class=None,
+                 workers=SERVER_WORKERS, queue_size=SERVER_QUEUE_SIZE):
+        self.listen_socket = listen_socket
+        self.processes = max(1, processes)
+        self.handler_class = handler_class or OptimizedVoiceRequestHandler
+        self.workers = workers
+        self.queue_size = queue_size
+        self.children = {}  # pid -> (slot, start time)
+        self.restarts = 0
+    
+    def _spawn(self, slot):
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                self._run_worker(slot)
+            except BaseException as e:
+                print(f"❌ Worker {slot} (pid {os.getpid()}) failed: {e}")
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        self.children[pid] = (slot, time.time())
+    
+    def _run_worker(self, slot):
+        signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C reaches the whole group - the supervisor stops us
+        reinitialize_after_fork()
+        
+        httpd = BoundedThreadPoolHTTPServer(
+            self.listen_socket.getsockname(), self.handler_class,
+            workers=self.workers, queue_size=self.queue_size, bind_and_activate=False
+        )
+        httpd.socket.close()
+        httpd.socket = self.listen_socket
+        # shutdown() waits for serve_forever, so it cannot run on this (the serving) thread
+        signal.signal(signal.SIGTERM, lambda signum, frame: Thread(target=httpd.shutdown, daemon=True).start())
+        print(f"👷 Worker {slot} ready (pid {os.getpid()}, {httpd.workers} threads)")
+        try:
+            httpd.serve_forever()
+        finally:
+            max_tokens_estimator.flush()
+    
+    def _raise_interrupt(self, signum, frame):
+        raise KeyboardInterrupt
+    
+    def run(self):
+        """Fork the workers and restart any that exit until interrupted"""
+        signal.signal(signal.SIGTERM, self._raise_interrupt)
+        for slot in range(self.processes):
+            self._spawn(slot)
+        
+        try:
+            while True:
+                pid, status = os.wait()
+                if pid not in self.children:
+                    continue
+                slot, started = self.children.pop(pid)
+                if os.WIFSIGNALED(status):
+                    reason = f"signal {os.WTERMSIG(status)}"
+                else:
+                    reason = f"exit code {os.WEXITSTATUS(status)}"
+                print(f"💥 Worker {slot} (pid {pid}) died with {reason} - restarting")
+                if time.time() - started < self.CRASH_LOOP_SECONDS:
+                    time.sleep(self.CRASH_LOOP_SECONDS)
+                self.restarts += 1
+                self._spawn(slot)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+    
+    def stop(self):
+        """SIGTERM every worker, then SIGKILL whatever is left after SHUTDOWN_TIMEOUT"""
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.children.pop(pid, None)
+        
+        deadline = time.time() + self.SHUTDOWN_TIMEOUT
+        while self.children and time.time() < deadline:
+            for pid in list(self.children):
+                try:
+                    done, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    done = pid
+                if done:
+                    self.children.pop(pid, None)
+            time.sleep(0.05)
+        
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        self.children.clear()
+
+def run_prefork_server(server_address, processes=SERVER_PROCESSES):
+    """Bind once and serve from SERVER_PROCESSES forked workers"""
+    listen_socket = socket.create_server(server_address, backlog=max(128, SERVER_QUEUE_SIZE))
+    print(f"🧵 Server mode: prefork, {processes} processes x {SERVER_WORKERS} worker threads, "
+          f"{MAX_CONCURRENT_STREAMS} Orpheus streams per process")
+    if SESSION_STORE_BACKEND != 'sqlite':
+        print(f"⚠️ In-memory sessions are per process - set SESSION_STORE_BACKEND=sqlite to share conversations")
+    print(f"✅ Orpheus server ready!")
+    try:
+        PreforkSupervisor(listen_socket, processes).run()
+    finally:
+        listen_socket.close()
+    print("\n🛑 Server stopped")
+
+# ========================================
+# ASYNCIO SERVING ENGINE (SERVER_MODE=asyncio)
+# ========================================
+
+async def generate_openai_tts_fallback_async(http_session, text, voice_config, emotion_mode='natural'):
+    """Async generate_openai_tts_fallback over the shared aiohttp session - cancelling it aborts the request"""
+    try:
+        start_time = time.time()
+        print(f"🔄 Using OpenAI TTS fallback (async) for: {text[:50]}...")
+        openai_voice = openai_fallback_voice(voice_config)
+        
+        if not OPENAI_API_KEY:
+            return openai_tts_fallback_error('OpenAI API key not configured')
+        
+        async with http_session.post(
+            OPENAI_SPEECH_URL,
+            headers=openai_chat_headers(),
+            json={'model': 'tts-1', 'voice': openai_voice, 'input': text},
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                print(f"❌ OpenAI TTS fallback failed: {response.status} - {error_text}")
+                return openai_tts_fallback_error(f'OpenAI TTS fallback error: {response.status} - {error_text}')
+            audio_data = await response.read()
+        
+        return build_openai_tts_fallback_result(audio_data, text, openai_voice, start_time, emotion_mode)
+        
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"❌ OpenAI TTS fallback failed: {type(e).__name__} {e}")
+        return openai_tts_fallback_error(f'OpenAI TTS fallback error: {type(e).__name__} {e}')
+
+async def circuit_open_fallback_async(http_session, text, voice_config, emotion_mode):
+    print(f"🔌 Orpheus circuit {orpheus_circuit.state} - using OpenAI TTS fallback without calling Baseten")
+    return await generate_openai_tts_fallback_async(http_session, text, voice_config, emotion_mode)
+
+async def fallback_failed_segments_async(http_session, segments, segment_results, voice_config, emotion_mode):
+    """Async fallback_failed_segments - the failed segments' fallbacks run concurrently"""
+    async def settle(segment, result):
+        if result['success'] or result.get('fallback_used'):
+            return result
+        return await generate_openai_tts_fallback_async(http_session, segment, voice_config, emotion_mode)
+    return await asyncio.gather(*[settle(segment, result) for segment, result in zip(segments, segment_results)])
+
+async def synthesize_orpheus_uncached_async(http_session, stream_slots, text, voice_config, request_info, cache_key, start_time, emotion_mode, add_emotion_tags,
+                                            priority='generate', deadline=None):
+    """Upstream half of generate_orpheus_tts_async: Baseten call, cache fill and fallbacks"""
+    try:
+        circuit_ticket = orpheus_circuit.allow_request()
+        if circuit_ticket is None:
+            return await circuit_open_fallback_async(http_session, text, voice_config, emotion_mode)
+        
+        print(f"🚀 Calling Optimized Orpheus API (async) - Voice: {voice_config['orpheus_voice']}, Precision: {request_info['precision']}, Tokens: {request_info['optimized_max_tokens']}, Emotion: {emotion_mode}")
+        if await stream_slots.acquire_async(priority, deadline) != 'granted':
+            return orpheus_capacity_error(priority)
+        
+        granted_at = time.time()
+        raw_audio_data = b''
+        try:
+            async with http_session.post(
+                ORPHEUS_ENDPOINT,
+                headers=request_info['headers'],
+                json=request_info['payload'],
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+            ) as response:
+                if response.status == 200:
+                    raw_audio_data = await response.read()
+                else:
+                    error_text = await response.text()
+                status_code = response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            record_orpheus_outcome(circuit_ticket, None, type(e).__name__)
+            orpheus_concurrency.record(granted_at, None)
+            raise
+        finally:
+            # Cancellation also lands here - it releases the slot but is not an upstream sample
+            stream_slots.release()
+        orpheus_concurrency.record(granted_at, status_code, len(raw_audio_data))
+        record_orpheus_outcome(circuit_ticket, status_code, error_text if status_code != 200 else '')
+        
+        if status_code == 200:
+            await asyncio.to_thread(audio_cache.put, cache_key, voice_config['orpheus_voice'], raw_audio_data)
+            return build_orpheus_success_result(raw_audio_data, start_time, request_info, emotion_mode, add_emotion_tags)
+        
+        if should_fallback_after_orpheus_error(status_code, error_text):
+            return await generate_openai_tts_fallback_async(http_session, text, voice_config, emotion_mode)
+        
+        return {
+            'success': False,
+            'error': f'Orpheus API error: {status_code} - {error_text}',
+            'fallback_used': None
+        }
+        
+    except asyncio.TimeoutError:
+        print(f"⏰ Orpheus API timeout - using OpenAI TTS fallback")
+        return await generate_openai_tts_fallback_async(http_session, text, voice_config, emotion_mode)
+    except Exception as e:
+        print(f"💥 Orpheus TTS error: {str(e)} - using OpenAI TTS fallback")
+        return await generate_openai_tts_fallback_async(http_session, text, voice_config, emotion_mode)
+
+async def synthesize_orpheus_hedged_async(http_session, stream_slots, text, voice_config, request_info, cache_key, start_time, emotion_mode,
+                                          add_emotion_tags, priority='generate', deadline=None):
+    """Async synthesize_orpheus_hedged - the losing call is cancelled, which aborts its Baseten request or queue slot"""
+    args = (http_session, stream_slots, text, voice_config, request_info, cache_key, start_time, emotion_mode, add_emotion_tags, priority, deadline)
+    delay = tts_hedging.delay_for(request_info, priority)
+    if delay is None:
+        return await synthesize_orpheus_uncached_async(*args)
+    
+    primary = asyncio.ensure_future(synthesize_orpheus_uncached_async(*args))
+    pending = {primary}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        if done or not tts_hedging.try_hedge():
+            return await primary
+        
+        print(f"🪁 Orpheus call past p90 ({delay:.1f}s) - hedging to {tts_hedging.target} - Voice: {voice_config['orpheus_voice']}")
+        if tts_hedging.target == 'fallback':
+            hedge = asyncio.ensure_future(generate_openai_tts_fallback_async(http_session, text, voice_config, emotion_mode))
+        else:
+            hedge = asyncio.ensure_future(synthesize_orpheus_uncached_async(*args))
+        pending = {primary, hedge}
+        
+        winner = None
+        while pending and (winner is None or not winner[1]['success']):
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                winner = pick_hedge_winner(winner, ('hedge' if task is hedge else 'primary', task.result()))
+        tts_hedging.record(winner[0] == 'hedge')
+        return winner[1]
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def generate_orpheus_tts_async(http_session, stream_slots, text, voice_config, emotion_mode='natural', add_emotion_tags=True,
+                                     priority='generate', deadline=None):
+    """Non-blocking Orpheus call over the shared aiohttp session - same result shape as generate_orpheus_tts_optimized"""
+    try:
+        start_time = time.time()
+        metrics.add_gauge('orpheus_active_streams', 1)
+        
+        request_info = prepare_orpheus_request(text, voice_config, emotion_mode, add_emotion_tags)
+        
+        cache_key = audio_cache_key(request_info)
+        # The disk tier reads files - keep it off the event loop
+        cached_audio = await asyncio.to_thread(audio_cache.get, cache_key)
+        if cached_audio is not None:
+            return build_orpheus_success_result(cached_audio, start_time, request_info, emotion_mode, add_emotion_tags, cache_hit=True)
+        
+        result, coalesced = await orpheus_single_flight.run_async(
+            cache_key, synthesize_orpheus_hedged_async,
+            http_session, stream_slots, text, voice_config, request_info, cache_key, start_time, emotion_mode, add_emotion_tags,
+            priority, deadline
+        )
+        return coalesced_tts_result(result, start_time) if coalesced else result
+        
+    except Exception as e:
+        print(f"💥 Orpheus TTS error: {str(e)} - using OpenAI TTS fallback")
+        return await generate_openai_tts_fallback_async(http_session, text, voice_config, emotion_mode)
+    finally:
+        metrics.add_gauge('orpheus_active_streams', -1)
+
+async def generate_long_form_tts_async(http_session, stream_slots, text, voice_config, emotion_mode='natural', add_emotion_tags=True,
+                                       priority='generate', deadline=None):
+    """Async counterpart of generate_long_form_tts - segments are gathered under the engine's stream scheduler"""
+    start_time = time.time()
+    segments = prepare_long_form_segments(text, voice_config, add_emotion_tags)
+    if len(segments) <= 1:
+        return await generate_orpheus_tts_async(http_session, stream_slots, text, voice_config, emotion_mode=emotion_mode, add_emotion_tags=add_emotion_tags,
+                                                priority=priority, deadline=deadline)
+    
+    print(f"📜 Long-form synthesis (async): {len(segments)} segments, {len(text)} chars - Voice: {voice_config['orpheus_voice']}")
+    segment_results = await asyncio.gather(*[
+        generate_orpheus_tts_async(http_session, stream_slots, segment, voice_config, emotion_mode=emotion_mode, add_emotion_tags=False,
+                                   priority=priority, deadline=deadline)
+        for segment in segments
+    ])
+    
+    segment_results = await fallback_failed_segments_async(http_session, segments, segment_results, voice_config, emotion_mode)
+    result = await asyncio.to_thread(stitch_long_form_result, segments, segment_results, start_time, emotion_mode)
+    if result is None:
+        return await generate_openai_tts_fallback_async(http_session, text, voice_config, emotion_mode)
+    return result
+
+async def generate_fast_chatgpt_response_async(http_session, user_input: str, session_id: str = "default") -> str:
+    """Async counterpart of generate_fast_chatgpt_response"""
+    if not OPENAI_API_KEY:
+        return "I'm here to help! What can I do for you?"
+    
+    try:
+        # Session history may live in SQLite - read and write it from a worker thread
+        payload = await asyncio.to_thread(build_fast_chat_payload, user_input, session_id)
+        async with http_session.post(
+            OPENAI_CHAT_URL,
+            headers=openai_chat_headers(),
+            json=payload,
+            timeout=aiohttp.ClientTimeout(total=6)  # 6 second total timeout
+        ) as response:
+            if response.status == 200:
+                data = await response.json()
+                ai_response = data['choices'][0]['message']['content'].strip()
+                await asyncio.to_thread(record_fast_chat_exchange, session_id, user_input, ai_response)
+                return ai_response
+            
+            print(f"❌ ChatGPT API Error: {response.status} - {await response.text()}")
+            return "I'm here to help! What would you like to know?"
+        
+    except asyncio.TimeoutError:
+        return "I'm thinking as fast as I can! Could you try again?"
+    except Exception as e:
+        print(f"⚡ Fast ChatGPT error: {e}")
+        return "I'm here to help! What can I do for you?"
+
+async def generate_emotionally_aware_chatgpt_response_async(http_session, user_input: str, session_id: str, request_context: Optional[EmotionalRequestContext] = None) -> str:
+    """Async counterpart of generate_emotionally_aware_chatgpt_response"""
+    if not OPENAI_API_KEY:
+        return "I understand your feelings. I'm here to help you with whatever you need."
+    
+    try:
+        if request_context is None:
+            request_context = await asyncio.to_thread(analyze_emotional_request, user_input, session_id)
+        emotional_analysis = request_context.emotional_analysis
+        
+        with request_context.stage('prompt_build'):
+            payload = build_emotional_chat_payload(user_input, emotional_analysis)
+        
+        with request_context.stage('llm'):
+            async with http_session.post(
+                OPENAI_CHAT_URL,
+                headers=openai_chat_headers(),
+                json=payload,
+                timeout=aiohttp.ClientTimeout(total=15)
+            ) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    ai_response = data['choices'][0]['message']['content'].strip()
+                else:
+                    ai_response = None
+                    print(f"❌ ChatGPT API Error: {response.status} - {await response.text()}")
+        
+        if ai_response is None:
+            return f"I understand you're feeling {emotional_analysis['detected_emotion']}. I'm here to help you with whatever you need."
+        await asyncio.to_thread(record_emotional_chat_exchange, session_id, user_input, ai_response, emotional_analysis)
+        return ai_response
+        
+    except Exception as e:
+        print(f"Error generating emotionally aware response: {e}")
+        return "I understand your feelings. I'm here to help you with whatever you need."
+
+class AsyncVoiceServer:
+    """
+    aiohttp serving engine for the API routes.
+    One shared ClientSession carries all Baseten and OpenAI traffic, so a single
+    process can hold hundreds of conversations that are waiting on remote inference.
+    """
+    
+    def __init__(self):
+        self.http_session = None
+        self.stream_slots = None
+        # Pipelined conversations block a thread per step - kept apart from the default executor that to_thread uses
+        self.pipeline_executor = ThreadPoolExecutor(max_workers=max(1, ASYNC_PIPELINE_WORKERS), thread_name_prefix='async-pipeline')
+        self.in_flight_requests = 0
+        self.handled_requests = 0
+    
+    def create_app(self):
+        app = web.Application(middlewares=[self.cors_middleware])
+        app.on_startup.append(self.on_startup)
+        app.on_cleanup.append(self.on_cleanup)
+        app.router.add_get('/health', self.handle_health)
+        app.router.add_get('/voices', self.handle_voices)
+        app.router.add_get('/metrics', self.handle_metrics)
+        app.router.add_post('/generate', self.handle_generate)
+        app.router.add_post('/conversation/respond', self.handle_conversation_respond)
+        app.router.add_post('/conversation/respond/stream', self.handle_conversation_respond_stream)
+        app.router.add_post('/conversation/respond_emotional', self.handle_conversation_respond_emotional)
+        return app
+    
+    async def on_startup(self, app):
+        connector = aiohttp.TCPConnector(limit=ASYNC_CONNECTION_LIMIT, keepalive_timeout=30)
+        self.http_session = aiohttp.ClientSession(connector=connector)
+        # Shared with the threaded paths (pipelines, library lookups) so one cap covers both
+        self.stream_slots = orpheus_scheduler
+    
+    async def on_cleanup(self, app):
+        if self.http_session is not None:
+            await self.http_session.close()
+        self.pipeline_executor.shutdown(wait=False, cancel_futures=True)
+    
+    @web.middleware
+    async def cors_middleware(self, request, handler):
+        if request.method == 'OPTIONS':
+            response = web.Response(status=200)
+            response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+            response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+        else:
+            self.in_flight_requests += 1
+            request_start = time.time()
+            status = 500
+            try:
+                response = await handler(request)
+                status = response.status
+            except web.HTTPException as e:
+                status = e.status
+                raise
+            finally:
+                self.in_flight_requests -= 1
+                self.handled_requests += 1
+                metrics.observe(
+                    'http_request_duration_seconds', time.time() - request_start,
+                    route=metrics_route_label(request.path), method=request.method, status=status
+                )
+        response.headers['Access-Control-Allow-Origin'] = '*'
+        return response
+    
+    def get_server_stats(self):
+        return {
+            'mode': 'asyncio',
+            'in_flight_requests': self.in_flight_requests,
+            'handled_requests': self.handled_requests,
+            'connection_limit': ASYNC_CONNECTION_LIMIT
+        }
+    
+    def json_response(self, data, status=200):
+        return web.Response(
+            text=json.dumps(data, ensure_ascii=False, indent=2),
+            status=status,
+            content_type='application/json',
+            charset='utf-8'
+        )
+    
+    def audio_response(self, response_data, result, response_format):
+        if response_format == 'json' or not response_data.get('success'):
+            return self.json_response(response_data)
+        
+        content_type, body, headers = encode_audio_http_body(response_data, result, response_format)
+        response = web.Response(body=body, headers=headers)
+        response.headers['Content-Type'] = content_type
+        if headers:
+            response.headers['Access-Control-Expose-Headers'] = ', '.join(headers)
+        return response
+    
+    def error_response(self, message, status_code=500):
+        return self.json_response({
+            'success': False,
+            'error': message,
+            'timestamp': time.time(),
+            'status_code': status_code
+        }, status=status_code)
+    
+    async def handle_health(self, request):
+        total_conversations = await asyncio.get_running_loop().run_in_executor(None, len, conversation_sessions)
+        return self.json_response({
+            'status': 'healthy',
+            'performance': performance_metrics_snapshot(),
+            'active_streams': metrics.gauge_total('orpheus_active_streams'),
+            'max_concurrent_streams': orpheus_scheduler.limit,
+            'server': self.get_server_stats(),
+            'api_status': {
+                'openai_configured': bool(OPENAI_API_KEY),
+                'orpheus_configured': bool(BASETEN_API_KEY),
+                'total_conversations': total_conversations
+            },
+            'timestamp': time.time(),
+            'message': 'Optimized voice server with ChatGPT + Orpheus TTS (asyncio engine)'
+        })
+    
+    async def handle_voices(self, request):
+        headers = {'ETag': VOICES_RESPONSE_ETAG, 'Cache-Control': 'no-cache'}
+        if etag_matches(request.headers.get('If-None-Match'), VOICES_RESPONSE_ETAG):
+            return web.Response(status=304, headers=headers)
+        return web.Response(body=VOICES_RESPONSE_BODY, headers=headers,
+                            content_type='application/json', charset='utf-8')
+    
+    async def handle_metrics(self, request):
+        # Both payloads include the session store's stats, which may query SQLite
+        loop = asyncio.get_running_loop()
+        if wants_prometheus_metrics(parse_qs(request.query_string), request.headers.get('Accept')):
+            body = await loop.run_in_executor(None, render_prometheus_metrics, self.get_server_stats())
+            response = web.Response(text=body)
+            response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+            return response
+        return self.json_response(await loop.run_in_executor(None, build_metrics_payload, self.get_server_stats()))
+    
+    async def handle_generate(self, request):
+        try:
+            data = await request.json()
+            
+            text = data.get('text', '').strip()
+            voice = data.get('voice', '').strip()
+            context = data.get('context', 'manual')
+            emotion_mode = data.get('emotion_mode', 'natural')
+            add_emotion_tags = data.get('add_emotion_tags', True)
+            
+            if not text:
+                return self.error_response('Text is required', 400)
+            
+            voice, voice_config = resolve_generate_voice(voice)
+            priority = request_priority(data)
+            deadline = request_deadline(data, priority)
+            print(f"🎤 Generating {context} audio using ORPHEUS for voice '{voice}' ({voice_config.get('precision', 'fp8')}) with emotion '{emotion_mode}': {text[:50]}...")
+            
+            result = None
+            if audio_library.enabled:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    None, audio_library.lookup, text, voice, voice_config, emotion_mode, add_emotion_tags
+                )
+            if result is None:
+                synthesize = generate_long_form_tts_async if wants_long_form(data, text) else generate_orpheus_tts_async
+                result = await synthesize(
+                    self.http_session, self.stream_slots, text, voice_config,
+                    emotion_mode=emotion_mode, add_emotion_tags=add_emotion_tags,
+                    priority=priority, deadline=deadline
+                )
+            
+            if not result['success']:
+                return self.error_response(f'Audio generation failed: {result["error"]}', result.get('status_code', 500))
+            
+            result = await audio_encoder.encode_async(result, negotiate_audio_codec(data, request.headers.get('Accept')))
+            response_format = negotiate_audio_response_format(data, request.headers.get('Accept'))
+            audio_base64 = encode_audio_base64(result) if response_format == 'json' else None
+            return self.audio_response(build_generate_response(text, voice, voice_config, context, result, audio_base64), result, response_format)
+            
+        except Exception as e:
+            print(f"❌ Generation error: {e}")
+            return self.error_response(str(e), 500)
+    
+    async def handle_conversation_respond(self, request):
+        try:
+            data = await request.json()
+            
+            user_input = data.get('text', '').strip()
+            voice = data.get('voice', 'orpheus_leah')
+            session_id = data.get('session_id', 'default')
+            
+            if not user_input:
+                return self.error_response('No text provided', 400)
+            
+            voice_config = get_voice_profile(voice).config
+            precision = voice_config.get('precision', 'fp8')
+            
+            start_time = time.time()
+            ai_response = await generate_fast_chatgpt_response_async(self.http_session, user_input, session_id)
+            chatgpt_time = time.time() - start_time
+            
+            audio_start_time = time.time()
+            audio_result = await generate_orpheus_tts_async(
+                self.http_session, self.stream_slots, ai_response, voice_config,
+                emotion_mode='natural', add_emotion_tags=False,
+                priority='conversation', deadline=request_deadline(data, 'conversation', start_time)
+            )
+            audio_time = time.time() - audio_start_time
+            total_time = time.time() - start_time
+            
+            audio_result = await audio_encoder.encode_async(audio_result, negotiate_audio_codec(data, request.headers.get('Accept')))
+            response_format = negotiate_audio_response_format(data, request.headers.get('Accept'))
+            audio_base64 = encode_audio_base64(audio_result) if audio_result['success'] and response_format == 'json' else None
+            return self.audio_response(build_conversation_response(
+                'fast', ai_response, voice, precision, audio_result, audio_base64,
+                {'chatgpt_time': chatgpt_time, 'audio_time': audio_time, 'total_time': total_time}
+            ), audio_result, response_format)
+            
+        except Exception as e:
+            print(f"❌ Fast conversation error: {e}")
+            return self.error_response(f'Fast conversation error: {str(e)}', 500)
+    
+    async def handle_conversation_respond_stream(self, request):
+        try:
+            data = await request.json()
+            
+            user_input = data.get('text', '').strip()
+            voice = data.get('voice', 'orpheus_leah')
+            session_id = data.get('session_id', 'default')
+            
+            if not user_input:
+                return self.error_response('No text provided', 400)
+            
+            voice_config = get_voice_profile(voice).config
+            precision = voice_config.get('precision', 'fp8')
+            codec = negotiate_audio_codec(data, None)  # The body is NDJSON, so only the format field applies
+        except Exception as e:
+            print(f"❌ Pipelined conversation error: {e}")
+            return self.error_response(f'Pipelined conversation error: {str(e)}', 500)
+        
+        response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson', 'Cache-Control': 'no-store'})
+        response.headers['Access-Control-Allow-Origin'] = '*'
+        await response.prepare(request)
+        
+        # The pipeline drives its own TTS thread pool - step it from the engine's pipeline executor
+        start_time = time.time()
+        stats = {}
+        pipeline = generate_pipelined_conversation(user_input, session_id, voice_config, stats=stats)
+        step = None
+        try:
+            while True:
+                step = self.pipeline_executor.submit(next, pipeline, None)
+                item = await asyncio.wrap_future(step)
+                if item is None:
+                    break
+                index, sentence, result = item
+                result = await audio_encoder.encode_async(result, codec)
+                segment = build_pipeline_segment(index, sentence, result, start_time)
+                await response.write(json.dumps(segment).encode('utf-8') + b'\n')
+            await response.write(json.dumps(build_pipeline_summary(voice, precision, stats)).encode('utf-8') + b'\n')
+            await response.write_eof()
+        except (ConnectionResetError, asyncio.CancelledError):
+            print(f"🔌 Client disconnected during pipelined response")
+            raise
+        finally:
+            # A step still running in its thread cannot be interrupted - close the pipeline once it returns
+            if step is None:
+                self.pipeline_executor.submit(pipeline.close)
+            else:
+                step.add_done_callback(lambda _: self.pipeline_executor.submit(pipeline.close))
+        return response
+    
+    async def handle_conversation_respond_emotional(self, request):
+        try:
+            data = await request.json()
+            
+            user_input = data.get('text', '').strip()
+            voice = data.get('voice', 'orpheus_tara_fp16')
+            session_id = data.get('session_id', 'default')
+            
+            if not user_input:
+                return self.error_response('No text provided', 400)
+            
+            voice_config = get_voice_profile(voice, 'orpheus_tara_fp16').config
+            precision = voice_config.get('precision', 'fp16')
+            
+            start_time = time.time()
+            request_context = await asyncio.get_running_loop().run_in_executor(None, analyze_emotional_request, user_input, session_id)
+            emotional_analysis = request_context.emotional_analysis
+            ai_response = await generate_emotionally_aware_chatgpt_response_async(self.http_session, user_input, session_id, request_context)
+            chatgpt_time = time.time() - start_time
+            
+            emotion_mode = request_context.emotion_mode
+            
+            audio_start_time = time.time()
+            with request_context.stage('tts'):
+                audio_result = await generate_orpheus_tts_async(
+                    self.http_session, self.stream_slots, ai_response, voice_config,
+                    emotion_mode=emotion_mode, add_emotion_tags=True,
+                    priority='conversation', deadline=request_deadline(data, 'conversation', start_time)
+                )
+            audio_time = time.time() - audio_start_time
+            
+            response_format = negotiate_audio_response_format(data, request.headers.get('Accept'))
+            with request_context.stage('encode'):
+                audio_result = await audio_encoder.encode_async(audio_result, negotiate_audio_codec(data, request.headers.get('Accept')))
+                audio_base64 = encode_audio_base64(audio_result) if audio_result['success'] and response_format == 'json' else None
+            total_time = time.time() - start_time
+            return self.audio_response(build_conversation_response(
+                'emotional', ai_response, voice, precision, audio_result, audio_base64,
+                {'chatgpt_time': chatgpt_time, 'audio_time': audio_time, 'total_time': total_time},
+                emotional_analysis=emotional_analysis, emotion_mode=emotion_mode,
+                stage_timings=request_context.stage_timings
+            ), audio_result, response_format)
+            
+        except Exception as e:
+            print(f"❌ Emotional conversation error: {e}")
+            return self.error_response(f'Emotional conversation error: {str(e)}', 500)
+
+def run_async_server(port):
+    """Run the API routes on the asyncio engine"""
+    print(f"🧵 Server mode: asyncio (aiohttp), {MAX_CONCURRENT_STREAMS} Orpheus streams, {ASYNC_CONNECTION_LIMIT} upstream connections")
+    print(f"✅ Orpheus server ready!")
+    web.run_app(AsyncVoiceServer().create_app(), port=port, print=None)
+    max_tokens_estimator.flush()
+    print("\n🛑 Server stopped")
+
 def run_optimized_server():
     """Run the optimized voice server"""
     port = int(os.environ.get('PORT', 5556))  # Use different port to avoid conflicts
@@ -2466,10 +6536,39 @@ def run_optimized_server():
     print(f"🔧 Performance: Dynamic FP8/FP16 precision switching")
     print(f"🧠 AI: ChatGPT-4 with Real-time Emotional Intelligence")
     print(f"🎤 Features: Speech-to-Text, Archetype Testing, Voice Comparison")
+    if orpheus_concurrency.enabled:
+        print(f"🎚️ Adaptive Orpheus concurrency: starts at {MAX_CONCURRENT_STREAMS}, "
+              f"moves between {orpheus_concurrency.min_limit} and {orpheus_concurrency.max_limit}")
+    if tts_hedging.enabled:
+        print(f"🪁 Hedged TTS: second request to {tts_hedging.target} past each voice's p90, at most {tts_hedging.max_percent:g}% of requests")
+    if orpheus_circuit.enabled:
+        print(f"🔌 Orpheus circuit breaker: opens after {orpheus_circuit.failure_threshold} failures, "
+              f"trial request every {orpheus_circuit.open_seconds:.0f}s while open")
     print("=" * 100)
     
+    max_tokens_estimator.load()
+    
+    if SERVER_MODE == 'asyncio':
+        run_async_server(port)
+        return
+    
+    template_assets.preload()
+    if TEMPLATES_RELOAD:
+        print(f"📄 Template reload on change enabled (TEMPLATES_RELOAD)")
+    
+    if SERVER_MODE == 'prefork':
+        if hasattr(os, 'fork'):
+            run_prefork_server(server_address)
+            return
+        print(f"⚠️ SERVER_MODE=prefork needs os.fork() - using the thread pool")
+    
     try:
-        httpd = HTTPServer(server_address, OptimizedVoiceRequestHandler)
+        if SERVER_MODE == 'single':
+            httpd = HTTPServer(server_address, OptimizedVoiceRequestHandler)
+            print(f"🧵 Server mode: single-threaded")
+        else:
+            httpd = BoundedThreadPoolHTTPServer(server_address, OptimizedVoiceRequestHandler)
+            print(f"🧵 Server mode: {httpd.workers} worker threads, queue of {httpd.queue_size}, {MAX_CONCURRENT_STREAMS} Orpheus streams")
         print(f"✅ Orpheus server ready!")
         print(f"🎭 Visit http://localhost:{port}/archetype-tester to test all 44 archetype voices!")
         print(f"🎯 Test both FP8 (speed) and FP16 (quality) modes for each character!")
@@ -2478,6 +6577,8 @@ def run_optimized_server():
         print("\n🛑 Server stopped by user")
     except Exception as e:
         print(f"❌ Server error: {e}")
+    finally:
+        max_tokens_estimator.flush()
 
 if __name__ == '__main__':
     run_optimized_server() 
\ No newline at end of file
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+📚 Orpheus Audio Library Pre-Render
+==================================
+
+Synthesises a manifest of (voice, text, emotion_mode) sample lines into the
+pre-rendered audio library (AUDIO_LIBRARY_DIR). The server answers matching
+/generate requests straight from the library instead of calling Baseten.
+
+Without --manifest the sample lines are taken from the archetype tester
+(both example lines, FP8 and FP16) and the archetype gallery (default line,
+dramatic mode). Lines whose voice config or enhancement output changed since
+they were rendered are stale and get rendered again.
+
+Manifest format (JSON list):
+    [{"voice": "archetype_clown_male", "text": "Ta-da!", "emotion_mode": "natural", "add_emotion_tags": true}]
+
+Usage:
+    python prerender_audio_library.py
+    python prerender_audio_library.py --check
+    python prerender_audio_library.py --manifest samples.json --workers 4 --force
+"""
+
+import argparse
+import contextlib
+import html
+import io
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import enhanced_voice_server_optimized as server
+
+TESTER_ARCHETYPE_PATTERN = re.compile(
+    r"'([a-z_]+)': \{\s*description: '[^']*',\s*traits: \[[^\]]*\],\s*examples: (\[.*?\])\s*\}", re.S
+)
+GALLERY_VOICE_PATTERN = re.compile(r"'(archetype_[a-z_]+)': \{\s*name:")
+GALLERY_TEXT_PATTERN = re.compile(r'id="testText"[^>]*value="([^"]*)"', re.S)
+
+
+def read_template(name):
+    with open(os.path.join(server.TEMPLATES_DIR, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def default_manifest():
+    """Sample lines the archetype tester and gallery send by default"""
+    samples = []
+
+    for archetype, examples in TESTER_ARCHETYPE_PATTERN.findall(read_template('archetype_voice_tester.html')):
+        examples = json.loads(examples)
+        for gender, text in (('male', examples[0]), ('female', examples[1] if len(examples) > 1 else examples[0])):
+            voice = f'archetype_{archetype}_{gender}'
+            for voice_id in (voice, f'{voice}_fp16'):
+                samples.append({'voice': voice_id, 'text': text, 'emotion_mode': 'natural', 'add_emotion_tags': True})
+
+    gallery = read_template('archetype_voices.html')
+    text_match = GALLERY_TEXT_PATTERN.search(gallery)
+    if text_match:
+        text = html.unescape(text_match.group(1))
+        for voice in GALLERY_VOICE_PATTERN.findall(gallery):
+            samples.append({'voice': voice, 'text': text, 'emotion_mode': 'dramatic', 'add_emotion_tags': True})
+
+    return samples
+
+
+def resolve_samples(samples):
+    """Resolve manifest voices like /generate does and drop duplicates and unknown voices"""
+    resolved = {}
+    for sample in samples:
+        if sample.get('voice') not in server.GENERATE_VOICE_ROUTES:
+            print(f"⚠️ Skipping unknown voice: {sample.get('voice')}")
+            continue
+        voice, voice_config = server.resolve_generate_voice(sample['voice'])
+        text = sample['text'].strip()
+        emotion_mode = sample.get('emotion_mode', 'natural')
+        add_emotion_tags = sample.get('add_emotion_tags', True)
+        key = server.AudioLibrary.lookup_key(voice, voice_config.get('precision', 'fp8'), emotion_mode, add_emotion_tags, text)
+        resolved[key] = (text, voice, voice_config, emotion_mode, add_emotion_tags)
+    return list(resolved.values())
+
+
+def render_sample(library, sample):
+    """Synthesise one line and store it; returns (sample, error or None)"""
+    text, voice, voice_config, emotion_mode, add_emotion_tags = sample
+    # Batch class: a pre-render run against a live deployment yields to interactive traffic
+    result = server.generate_orpheus_tts_optimized(text, voice_config, emotion_mode=emotion_mode, add_emotion_tags=add_emotion_tags,
+                                                   priority='batch')
+    if not result['success']:
+        return sample, result.get('error', 'synthesis failed')
+    if result.get('fallback_used') or result.get('content_type') != 'audio/wav':
+        return sample, 'Orpheus unavailable - fallback audio is not stored'
+    library.store(text, voice, voice_config, emotion_mode, add_emotion_tags, result)
+    return sample, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-render archetype sample lines into the audio library")
+    parser.add_argument('--manifest', help='JSON list of {voice, text, emotion_mode, add_emotion_tags} (default: template samples)')
+    parser.add_argument('--library-dir', default=server.AUDIO_LIBRARY_DIR, help='Library directory')
+    parser.add_argument('--workers', type=int, default=4, help='Lines synthesised at once')
+    parser.add_argument('--force', action='store_true', help='Re-render fresh lines too')
+    parser.add_argument('--check', action='store_true', help='Only report fresh/stale/missing lines (exit 1 if any need rendering)')
+    args = parser.parse_args()
+
+    if args.manifest:
+        with open(args.manifest, 'r', encoding='utf-8') as f:
+            samples = json.load(f)
+    else:
+        samples = default_manifest()
+    samples = resolve_samples(samples)
+    library = server.AudioLibrary(args.library_dir)
+
+    print("\n" + "=" * 60)
+    print("📚 ORPHEUS AUDIO LIBRARY PRE-RENDER")
+    print("=" * 60)
+    print(f"   Library: {args.library_dir}")
+    print(f"   Manifest lines: {len(samples)}")
+
+    statuses = [(sample, library.entry_status(*sample)) for sample in samples]
+    counts = {status: sum(1 for _, entry_status in statuses if entry_status == status) for status in ('fresh', 'stale', 'missing')}
+    print(f"   Fresh: {counts['fresh']}  Stale: {counts['stale']}  Missing: {counts['missing']}")
+    print("-" * 60)
+
+    if args.check:
+        for sample, status in statuses:
+            if status != 'fresh':
+                print(f"   {status:<8} {sample[1]} ({sample[2].get('precision', 'fp8')}, {sample[3]}): {sample[0][:50]}")
+        sys.exit(0 if counts['fresh'] == len(samples) else 1)
+
+    pending = [sample for sample, status in statuses if args.force or status != 'fresh']
+    if not pending:
+        print("✅ Library is up to date")
+        return
+
+    server.max_tokens_estimator.load()
+    start_time = time.time()
+    failures = 0
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+            for done, (sample, error) in enumerate(pool.map(lambda sample: render_sample(library, sample), pending), 1):
+                if error:
+                    failures += 1
+                    print(f"❌ [{done}/{len(pending)}] {sample[1]}: {error}")
+                else:
+                    print(f"✅ [{done}/{len(pending)}] {sample[1]} ({sample[2].get('precision', 'fp8')}, {sample[3]}): {sample[0][:40]}")
+    finally:
+        library.save_index()
+        server.max_tokens_estimator.flush()
+
+    print("-" * 60)
+    print(f"📚 Rendered {len(pending) - failures}/{len(pending)} lines in {time.time() - start_time:.1f}s")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
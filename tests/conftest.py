@@ -0,0 +1,25 @@
+"""
+Shared setup for the unit tests: the server module is imported with its disk
+tiers switched off so tests never touch the repo's data directories.
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+sys.path.insert(0, SRC_DIR)
+
+TEST_DATA_DIR = tempfile.mkdtemp(prefix='orpheus-tests-')
+os.environ.setdefault('AUDIO_CACHE_ENABLED', 'false')
+os.environ.setdefault('AUDIO_CACHE_DIR', os.path.join(TEST_DATA_DIR, 'generated_audio'))
+os.environ.setdefault('AUDIO_LIBRARY_ENABLED', 'false')
+os.environ.setdefault('AUDIO_LIBRARY_DIR', os.path.join(TEST_DATA_DIR, 'audio_library'))
+os.environ.setdefault('MAX_TOKENS_MODEL_PATH', os.path.join(TEST_DATA_DIR, 'max_tokens_model.json'))
+os.environ.setdefault('SESSION_STORE_BACKEND', 'memory')
+
+# The module prints its startup banner on import
+with contextlib.redirect_stdout(io.StringIO()):
+    import enhanced_voice_server_optimized  # noqa: F401
@@ -0,0 +1,61 @@
+"""The asyncio engine's OpenAI fallback goes through the shared aiohttp session."""
+
+import asyncio
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+import enhanced_voice_server_optimized as server
+
+
+def run_against_speech_server(monkeypatch, handler, coroutine_factory):
+    async def main():
+        app = web.Application()
+        app.router.add_post('/v1/audio/speech', handler)
+        speech_server = TestServer(app)
+        await speech_server.start_server()
+        monkeypatch.setattr(server, 'OPENAI_SPEECH_URL', str(speech_server.make_url('/v1/audio/speech')))
+        try:
+            async with aiohttp.ClientSession() as http_session:
+                return await coroutine_factory(http_session)
+        finally:
+            await speech_server.close()
+    return asyncio.run(main())
+
+
+def test_circuit_open_fallback_uses_the_http_session(monkeypatch):
+    requests_seen = []
+
+    async def speech(request):
+        requests_seen.append(await request.json())
+        return web.Response(body=b'mp3-bytes', content_type='audio/mpeg')
+
+    def sync_client_used(*args, **kwargs):
+        raise AssertionError('the sync OpenAI client must not be used by the asyncio engine')
+
+    monkeypatch.setattr(server, 'OPENAI_API_KEY', 'test-key')
+    monkeypatch.setattr(server, 'generate_openai_tts_fallback', sync_client_used)
+    voice_config = server.VOICE_CONFIGS['orpheus_leah']
+    result = run_against_speech_server(monkeypatch, speech, lambda http_session: server.circuit_open_fallback_async(
+        http_session, 'Hello there.', voice_config, 'natural'
+    ))
+
+    assert result['success']
+    assert result['audio_data'] == b'mp3-bytes'
+    assert result['fallback_used'] == 'openai_tts'
+    assert requests_seen == [{'model': 'tts-1', 'voice': 'nova', 'input': 'Hello there.'}]
+
+
+def test_fallback_error_status_is_reported(monkeypatch):
+    async def speech(request):
+        return web.Response(status=429, text='slow down')
+
+    monkeypatch.setattr(server, 'OPENAI_API_KEY', 'test-key')
+    voice_config = server.VOICE_CONFIGS['orpheus_leah']
+    result = run_against_speech_server(monkeypatch, speech, lambda http_session: server.generate_openai_tts_fallback_async(
+        http_session, 'Hello there.', voice_config
+    ))
+
+    assert not result['success']
+    assert '429' in result['error']
@@ -0,0 +1,56 @@
+import os
+
+import enhanced_voice_server_optimized as server
+
+
+def test_memory_tier_evicts_least_recently_used_by_bytes(tmp_path):
+    cache = server.AudioCache(str(tmp_path), memory_budget_bytes=100, disk_budget_bytes=0)
+    cache.put('a', 'leah', b'a' * 40)
+    cache.put('b', 'leah', b'b' * 40)
+    assert cache.get('a') == b'a' * 40  # 'a' is now the most recent
+    cache.put('c', 'leah', b'c' * 40)
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    stats = cache.get_stats()
+    assert stats['memory_bytes'] == 80
+    assert stats['memory_evictions'] == 1
+
+
+def test_clips_over_the_memory_budget_are_not_kept_in_memory(tmp_path):
+    cache = server.AudioCache(str(tmp_path), memory_budget_bytes=10, disk_budget_bytes=0)
+    cache.put('big', 'leah', b'x' * 11)
+
+    assert cache.get('big') is None
+    assert cache.get_stats()['memory_bytes'] == 0
+
+
+def test_disk_tier_evicts_oldest_files_and_promotes_hits(tmp_path):
+    cache = server.AudioCache(str(tmp_path), memory_budget_bytes=0, disk_budget_bytes=100)
+    for key in ('a', 'b', 'c'):
+        cache.put(key, 'leah', key.encode() * 40)
+
+    stats = cache.get_stats()
+    assert stats['disk_evictions'] == 1
+    assert stats['disk_bytes'] == 80
+    assert sorted(os.listdir(tmp_path / 'leah')) == ['b.pcm', 'c.pcm']
+    assert cache.get('a') is None
+    assert cache.get('b') == b'b' * 40
+    assert cache.get_stats()['disk_hits'] == 1
+
+
+def test_disk_index_survives_a_restart(tmp_path):
+    server.AudioCache(str(tmp_path), memory_budget_bytes=100, disk_budget_bytes=100).put('a', 'leah', b'pcm')
+
+    reopened = server.AudioCache(str(tmp_path), memory_budget_bytes=100, disk_budget_bytes=100)
+
+    assert reopened.get('a') == b'pcm'
+    assert reopened.get_stats()['disk_entries'] == 1
+
+
+def test_disabled_cache_stores_nothing(tmp_path):
+    cache = server.AudioCache(str(tmp_path), memory_budget_bytes=100, disk_budget_bytes=100, enabled=False)
+    cache.put('a', 'leah', b'pcm')
+
+    assert cache.get('a') is None
+    assert not os.listdir(tmp_path)
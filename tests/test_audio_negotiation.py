@@ -0,0 +1,29 @@
+import enhanced_voice_server_optimized as server
+
+
+def test_wildcard_audio_accept_keeps_json():
+    assert server.negotiate_audio_response_format({}, 'audio/*') == 'json'
+    assert server.negotiate_audio_response_format({}, 'audio/*, application/json;q=0.9') == 'json'
+    assert server.negotiate_audio_codec({}, 'audio/*') == 'wav'
+
+
+def test_concrete_audio_type_selects_binary_and_codec():
+    assert server.negotiate_audio_response_format({}, 'audio/ogg;q=0.9, */*;q=0.1') == 'binary'
+    assert server.negotiate_audio_codec({}, 'audio/ogg;q=0.9, */*;q=0.1') == 'opus'
+    assert server.negotiate_audio_response_format({}, 'audio/wav') == 'binary'
+    assert server.negotiate_audio_codec({}, 'audio/wav') == 'wav'
+
+
+def test_webm_is_not_answered_with_ogg():
+    assert server.negotiate_audio_codec({}, 'audio/webm') == 'wav'
+    assert server.negotiate_audio_response_format({}, 'audio/webm') == 'json'
+
+
+def test_format_field_selects_binary_unless_response_format_says_otherwise():
+    assert server.negotiate_audio_response_format({'format': 'mp3'}, None) == 'binary'
+    assert server.negotiate_audio_response_format({'format': 'mp3', 'response_format': 'json'}, 'audio/mpeg') == 'json'
+    assert server.negotiate_audio_codec({'format': 'flac'}, 'audio/mpeg') == 'flac'
+
+
+def test_multipart_accept():
+    assert server.negotiate_audio_response_format({}, 'multipart/mixed; boundary=x') == 'multipart'
@@ -0,0 +1,30 @@
+import io
+import json
+
+import requests
+
+import enhanced_voice_server_optimized as server
+
+
+class FakeUpstream:
+    def __init__(self, body):
+        self.body = body
+
+    def post(self, url, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response.headers['Content-Type'] = 'text/event-stream'  # No charset, like OpenAI
+        response.raw = io.BytesIO(self.body)
+        return response
+
+
+def sse(*tokens):
+    events = [f'data: {json.dumps({"choices": [{"delta": {"content": token}}]}, ensure_ascii=False)}\n\n' for token in tokens]
+    return ''.join(events + ['data: [DONE]\n\n']).encode('utf-8')
+
+
+def test_streamed_tokens_are_decoded_as_utf8(monkeypatch):
+    tokens = ['Ça va', ' très bien', ' 😊', ' — merci']
+    monkeypatch.setattr(server, 'upstream_sessions', FakeUpstream(sse(*tokens)))
+
+    assert list(server.stream_chat_completion_tokens({'messages': []})) == tokens
@@ -0,0 +1,108 @@
+import enhanced_voice_server_optimized as server
+
+
+def make_breaker(failure_threshold=2, open_seconds=60):
+    return server.CircuitBreaker('test', failure_threshold=failure_threshold, open_seconds=open_seconds, enabled=True)
+
+
+def open_breaker(breaker):
+    ticket = breaker.allow_request()
+    breaker.record_failure(ticket, 'deployment inactive', trip=True)
+    assert breaker.state == 'open'
+
+
+def to_half_open(breaker):
+    breaker.open_seconds = 0
+    trial = breaker.allow_request()
+    assert breaker.state == 'half_open'
+    assert trial is not None and trial[1] is True
+    return trial
+
+
+def test_consecutive_failures_open_the_circuit():
+    breaker = make_breaker(failure_threshold=3)
+    for _ in range(2):
+        breaker.record_failure(breaker.allow_request(), 'HTTP 502')
+    assert breaker.state == 'closed'
+    breaker.record_failure(breaker.allow_request(), 'HTTP 502')
+    assert breaker.state == 'open'
+
+
+def test_success_resets_the_failure_count():
+    breaker = make_breaker(failure_threshold=2)
+    breaker.record_failure(breaker.allow_request(), 'ReadTimeout')
+    breaker.record_success(breaker.allow_request())
+    breaker.record_failure(breaker.allow_request(), 'ReadTimeout')
+    assert breaker.state == 'closed'
+
+
+def test_open_circuit_rejects_until_the_trial_is_due():
+    breaker = make_breaker()
+    open_breaker(breaker)
+    assert breaker.allow_request() is None
+    trial = to_half_open(breaker)
+    # Only one trial at a time
+    assert breaker.allow_request() is None
+    breaker.record_success(trial)
+    assert breaker.state == 'closed'
+    assert breaker.allow_request() is not None
+
+
+def test_failed_trial_reopens():
+    breaker = make_breaker()
+    open_breaker(breaker)
+    trial = to_half_open(breaker)
+    breaker.record_failure(trial, 'HTTP 503')
+    assert breaker.state == 'open'
+    assert [entry['to'] for entry in breaker.history] == ['open', 'half_open', 'open']
+
+
+def test_stale_success_does_not_close_an_open_circuit():
+    breaker = make_breaker()
+    stale = breaker.allow_request()
+    open_breaker(breaker)
+    breaker.record_success(stale)
+    assert breaker.state == 'open'
+
+
+def test_stale_success_does_not_close_a_half_open_circuit():
+    breaker = make_breaker()
+    stale = breaker.allow_request()
+    open_breaker(breaker)
+    to_half_open(breaker)
+    breaker.record_success(stale)
+    assert breaker.state == 'half_open'
+
+
+def test_stale_failure_does_not_fail_the_trial():
+    breaker = make_breaker()
+    stale = breaker.allow_request()
+    open_breaker(breaker)
+    trial = to_half_open(breaker)
+    breaker.record_failure(stale, 'ReadTimeout')
+    assert breaker.state == 'half_open'
+    breaker.record_success(trial)
+    assert breaker.state == 'closed'
+
+
+def test_failures_from_before_recovery_do_not_count():
+    breaker = make_breaker(failure_threshold=1)
+    stale = breaker.allow_request()
+    open_breaker(breaker)
+    breaker.record_success(to_half_open(breaker))
+    breaker.record_failure(stale, 'ReadTimeout')
+    assert breaker.state == 'closed'
+
+
+def test_deployment_errors_trip_immediately():
+    breaker = server.orpheus_circuit
+    enabled, breaker.enabled = breaker.enabled, True
+    try:
+        server.record_orpheus_outcome(breaker.allow_request(), 404, '{"error": "model_id not found"}')
+        assert breaker.state == 'open'
+        breaker.record_success(to_half_open(breaker))
+        server.record_orpheus_outcome(breaker.allow_request(), 400, 'bad request')
+        assert breaker.state == 'closed'
+    finally:
+        breaker.enabled = enabled
+        breaker.open_seconds = server.CIRCUIT_OPEN_SECONDS
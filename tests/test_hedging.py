@@ -0,0 +1,74 @@
+import io
+import threading
+import time
+
+import requests
+
+import enhanced_voice_server_optimized as server
+
+HEDGE_AUDIO = b'\x01\x00' * 2400
+
+
+class StalledBody(io.RawIOBase):
+    """Response body that never arrives - read() blocks until the response is closed"""
+
+    def __init__(self):
+        self.released = threading.Event()
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        self.released.wait(5)
+        return b''
+
+    def close(self):
+        self.released.set()
+        super().close()
+
+
+class RacingUpstream:
+    """The first call (the primary) stalls in its body; the second (the hedge) answers at once"""
+
+    def __init__(self):
+        self.calls = []
+
+    def post(self, url, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        if self.calls:
+            response.raw = io.BytesIO(HEDGE_AUDIO)
+        else:
+            response.raw = StalledBody()
+        self.calls.append((response.raw, kwargs))
+        return response
+
+
+def test_losing_orpheus_call_is_closed_and_releases_its_slot(monkeypatch):
+    upstream = RacingUpstream()
+    scheduler = server.UpstreamScheduler(limit=2)
+    samples = []
+    policy = server.HedgePolicy(enabled=True, target='orpheus', max_percent=100)
+    monkeypatch.setattr(policy, 'delay_for', lambda request_info, priority: 0.05)
+    monkeypatch.setattr(policy, 'try_hedge', lambda: True)
+    monkeypatch.setattr(server, 'tts_hedging', policy)
+    monkeypatch.setattr(server, 'upstream_sessions', upstream)
+    monkeypatch.setattr(server, 'orpheus_scheduler', scheduler)
+    monkeypatch.setattr(server.orpheus_concurrency, 'record', lambda *sample: samples.append(sample))
+
+    voice_config = server.VOICE_CONFIGS['orpheus_leah']
+    request_info = server.prepare_orpheus_request('Hello there.', voice_config)
+    result = server.synthesize_orpheus_hedged('Hello there.', voice_config, request_info, 'hedge-test', time.time(),
+                                              False, 'natural', True)
+
+    assert result['success']
+    assert policy.get_stats()['won'] == 1
+    primary_body, primary_kwargs = upstream.calls[0]
+    assert primary_kwargs['stream'] is True
+    assert primary_body.released.wait(1)
+    deadline = time.time() + 1
+    while scheduler.active and time.time() < deadline:
+        time.sleep(0.01)
+    assert scheduler.active == 0
+    # Only the hedge reached the AIMD controller - the cancelled call is not an upstream sample
+    assert [sample[1:] for sample in samples] == [(200, len(HEDGE_AUDIO))]
@@ -0,0 +1,62 @@
+import enhanced_voice_server_optimized as server
+
+TABLE = {
+    'angry': ['angry', 'mad'],
+    'sad': ['sad', 'down'],
+    'joyful': ['love', 'happy'],
+    'frustrated': ['fed up', 'stuck'],
+    'empathetic': ['care'],
+}
+INFLECTIONS = {
+    'angry': ['angrily', 'angrier'],
+    'mad': ['maddening'],
+    'sad': ['saddened'],
+    'love': ['loving'],
+    'happy': ['happily', 'happiness'],
+    'care': ['caring'],
+}
+
+
+def labels(text):
+    return set(server.KeywordMatcher(TABLE, INFLECTIONS).match(text))
+
+
+def test_keywords_only_match_at_word_boundaries():
+    assert labels('I made a sandwich and downloaded a file') == set()
+    assert labels('I want a career change, carefully') == set()
+    assert labels('I am MAD!') == {'angry'}
+
+
+def test_phrases_match_across_tokens():
+    assert labels("I'm fed up with this") == {'frustrated'}
+    assert labels('I was fed, then went up') == set()
+
+
+def test_listed_inflections_match():
+    assert labels('she answered angrily') == {'angry'}
+    assert labels('I was saddened by it') == {'sad'}
+    assert labels('loving every minute, happily') == {'joyful'}
+    assert labels('this is maddening') == {'angry'}
+    assert labels('a caring friend') == {'empathetic'}
+
+
+def test_suffixes_are_not_generated():
+    assert labels('madder and sadder lovers') == set()
+    assert server.KeywordMatcher(TABLE).match('angrily') == {}
+
+
+def test_match_reports_the_listed_keyword():
+    assert server.KeywordMatcher(TABLE, INFLECTIONS).match('angrier and angrier') == {'angry': {0: 'angry'}}
+
+
+def test_engine_inflections_avoid_unrelated_words():
+    match = server.emotional_engine.keyword_matcher.match
+    assert server.EmotionalState.EMPATHETIC not in match('I want a career change')
+    assert server.EmotionalState.CALM not in match('the calmer weather')
+    assert server.EmotionalState.SAD not in match('a downer of a movie')
+    assert set(match('He shouted at me angrily')) == {server.EmotionalState.ANGRY}
+
+
+def test_engine_picks_up_inflected_emotion():
+    context = server.emotional_engine.analyze_user_emotion('He shouted at me angrily and I am furious')
+    assert context.primary_emotion == server.EmotionalState.ANGRY
@@ -0,0 +1,111 @@
+import contextlib
+import io
+from array import array
+
+import enhanced_voice_server_optimized as server
+
+VOICE_CONFIG = server.get_voice_profile('orpheus_leah').config
+SEGMENTS = ['First part of the story.', 'Second part of the story.', 'Third part of the story.']
+
+
+def orpheus_result(pcm):
+    return {'success': True, 'audio_data': server.create_orpheus_wav(pcm), 'content_type': 'audio/wav',
+            'duration': len(pcm) / (server.ORPHEUS_SAMPLE_RATE * 2), 'generation_time': 0.1, 'fallback_used': None}
+
+
+def fallback_result(segment):
+    return {'success': True, 'audio_data': b'mp3:' + segment.encode(), 'content_type': 'audio/mpeg',
+            'duration': 1.0, 'generation_time': 0.1, 'fallback_used': 'openai_tts'}
+
+
+def failed_result():
+    return {'success': False, 'error': 'Orpheus capacity exhausted', 'status_code': 503, 'fallback_used': None}
+
+
+def test_long_form_is_opt_in_by_default():
+    assert server.LONG_FORM_AUTO_CHARS == 0
+    assert not server.wants_long_form({}, 'word ' * 1000)
+    assert server.wants_long_form({'long_form': True}, 'short')
+
+
+def test_only_failed_segments_fall_back(monkeypatch):
+    fallback_calls = []
+
+    def fake_fallback(text, voice_config, emotion_mode='natural'):
+        fallback_calls.append(text)
+        return fallback_result(text)
+
+    monkeypatch.setattr(server, 'generate_openai_tts_fallback', fake_fallback)
+    results = [orpheus_result(b'\x01\x00' * 100), failed_result(), orpheus_result(b'\x02\x00' * 100)]
+    completed = server.fallback_failed_segments(SEGMENTS, results, VOICE_CONFIG, 'natural')
+
+    assert fallback_calls == [SEGMENTS[1]]
+    assert completed[0] is results[0] and completed[2] is results[2]
+    assert completed[1]['fallback_used'] == 'openai_tts'
+
+
+def test_stitch_decodes_fallback_segments_and_keeps_orpheus_audio(monkeypatch):
+    monkeypatch.setattr(server.audio_encoder, 'decode_pcm', lambda audio_data: b'\x03\x00' * 100)
+    results = [orpheus_result(b'\x01\x00' * 100), fallback_result(SEGMENTS[1]), orpheus_result(b'\x02\x00' * 100)]
+    stitched = server.stitch_long_form_result(SEGMENTS, results, 0.0, 'natural')
+
+    assert stitched['success'] and stitched['content_type'] == 'audio/wav'
+    assert stitched['fallback_used'] == 'openai_tts'
+    assert [segment['fallback_used'] for segment in stitched['segments']] == [None, 'openai_tts', None]
+    assert stitched['raw_audio_size'] > 0
+
+
+def test_stitch_gives_up_when_fallback_audio_cannot_be_decoded(monkeypatch):
+    monkeypatch.setattr(server.audio_encoder, 'decode_pcm', lambda audio_data: None)
+    results = [orpheus_result(b'\x01\x00' * 100), fallback_result(SEGMENTS[1])]
+    assert server.stitch_long_form_result(SEGMENTS[:2], results, 0.0, 'natural') is None
+
+
+def test_generate_long_form_falls_back_per_segment(monkeypatch):
+    def fake_orpheus(segment, voice_config, **kwargs):
+        return failed_result() if segment.startswith('Second') else orpheus_result(b'\x01\x00' * 100)
+
+    monkeypatch.setattr(server, 'prepare_long_form_segments', lambda text, voice_config, add_emotion_tags: SEGMENTS)
+    monkeypatch.setattr(server, 'generate_orpheus_tts_optimized', fake_orpheus)
+    monkeypatch.setattr(server, 'generate_openai_tts_fallback', lambda text, voice_config, emotion_mode='natural': fallback_result(text))
+    monkeypatch.setattr(server.audio_encoder, 'decode_pcm', lambda audio_data: b'\x03\x00' * 100)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = server.generate_long_form_tts(' '.join(SEGMENTS), VOICE_CONFIG)
+    assert result['long_form']
+    assert [segment['fallback_used'] for segment in result['segments']] == [None, 'openai_tts', None]
+
+
+def test_split_prefers_sentence_then_clause_then_word_boundaries():
+    text = 'One two three. Four five six! Seven, eight, nine ten eleven twelve.'
+    assert server.split_long_text(text, max_chars=30) == ['One two three. Four five six!', 'Seven, eight,', 'nine ten eleven twelve.']
+
+    segments = server.split_long_text('word ' * 40, max_chars=30)
+    assert all(len(segment) <= 30 for segment in segments)
+    assert ' '.join(segments).split() == ['word'] * 40
+
+
+def test_split_keeps_short_text_whole():
+    assert server.split_long_text('Just one sentence.', max_chars=300) == ['Just one sentence.']
+    assert server.split_long_text('  ', max_chars=300) == []
+
+
+def test_crossfade_overlaps_each_seam():
+    overlap = int(server.ORPHEUS_SAMPLE_RATE * 10 / 1000)
+    first = array('h', [1000] * (overlap * 3)).tobytes()
+    second = array('h', [-1000] * (overlap * 3)).tobytes()
+
+    joined = array('h', server.crossfade_pcm([first, second], crossfade_ms=10))
+
+    assert len(joined) == overlap * 5
+    assert joined[0] == 1000 and joined[-1] == -1000
+    seam = joined[overlap * 2:overlap * 3]
+    assert all(a >= b for a, b in zip(seam, seam[1:]))  # Fades monotonically from the first clip to the second
+    assert 1000 > seam[0] and seam[-1] > -1000
+
+
+def test_crossfade_handles_short_and_odd_length_segments():
+    assert server.crossfade_pcm([]) == b''
+    assert server.crossfade_pcm([b'\x01\x00\x02']) == b'\x01\x00'  # Trailing half-sample dropped
+    short = array('h', [100, 100]).tobytes()
+    assert len(server.crossfade_pcm([short, short], crossfade_ms=10)) == 4
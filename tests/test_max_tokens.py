@@ -0,0 +1,36 @@
+"""MaxTokensEstimator: learned estimates reach upstream without moving cache keys."""
+
+import os
+
+import enhanced_voice_server_optimized as server
+
+
+def test_estimator_does_not_read_its_file_until_loaded(tmp_path):
+    path = tmp_path / 'models' / 'max_tokens_model.json'
+    estimator = server.MaxTokensEstimator(str(path), min_samples=1)
+    estimator.record('tara:base', 100, 5.0, 2200, None)
+    estimator.flush()
+    assert os.path.exists(path)
+
+    fresh = server.MaxTokensEstimator(str(path), min_samples=1)
+    assert fresh.estimate('tara:base', 100, 700, 2200) == (700, None)
+    fresh.load()
+    tokens, predicted = fresh.estimate('tara:base', 100, 700, 2200)
+    assert predicted == 5.0
+    assert tokens % server.MaxTokensEstimator.TOKEN_QUANTUM == 0
+
+
+def test_cache_key_is_stable_while_the_estimator_learns(tmp_path, monkeypatch):
+    estimator = server.MaxTokensEstimator(str(tmp_path / 'model.json'), min_samples=1)
+    monkeypatch.setattr(server, 'max_tokens_estimator', estimator)
+    voice_config = server.VOICE_CONFIGS['orpheus_leah']
+    text = 'The quick brown fox jumps over the lazy dog.'
+
+    before = server.prepare_orpheus_request(text, voice_config)
+    key = server.MaxTokensEstimator.key_for(voice_config)
+    for duration in (2.0, 3.0, 4.0):
+        estimator.record(key, before['spoken_chars'], duration, 2200, None)
+    after = server.prepare_orpheus_request(text, voice_config)
+
+    assert after['payload']['max_tokens'] != before['payload']['max_tokens']
+    assert server.audio_cache_key(after) == server.audio_cache_key(before)
@@ -0,0 +1,63 @@
+import pytest
+
+import enhanced_voice_server_optimized as server
+
+
+def test_percentiles_over_the_recent_window():
+    registry = server.MetricsRegistry()
+    for value in range(101):
+        registry.observe('latency_seconds', value / 100, voice='leah')
+
+    assert registry.percentile('latency_seconds', 0.5, voice='leah') == 0.5
+    assert registry.percentile('latency_seconds', 0.9, voice='leah') == 0.9
+    assert registry.percentile('latency_seconds', 0.9, voice='dan') is None
+    assert registry.percentile('latency_seconds', 0.9, min_samples=102, voice='leah') is None
+
+    histogram = registry.snapshot()['histograms']['latency_seconds'][0]
+    assert histogram['labels'] == {'voice': 'leah'}
+    assert histogram['count'] == 101
+    assert (histogram['p50'], histogram['p95'], histogram['p99']) == (0.5, 0.95, 0.99)
+
+
+def test_totals_span_label_sets():
+    registry = server.MetricsRegistry()
+    registry.inc('requests_total', voice='leah')
+    registry.inc('requests_total', 2, voice='dan')
+    registry.add_gauge('active', 1, route='/generate')
+    registry.add_gauge('active', -1, route='/generate')
+    registry.observe('latency_seconds', 0.2, voice='leah')
+    registry.observe('latency_seconds', 0.4, voice='dan')
+
+    assert registry.counter_total('requests_total') == 3
+    assert registry.gauge_total('active') == 0
+    assert registry.histogram_totals('latency_seconds') == (2, pytest.approx(0.6))
+
+
+def test_prometheus_exposition():
+    registry = server.MetricsRegistry()
+    registry.describe('requests_total', 'counter', 'Requests served')
+    registry.inc('requests_total', voice='le"ah')
+    registry.set_gauge('queue_depth', 4)
+    registry.observe('latency_seconds', 0.03, route='/generate')
+    registry.observe('latency_seconds', 7.0, route='/generate')
+
+    lines = registry.render_prometheus().splitlines()
+
+    assert '# HELP requests_total Requests served' in lines
+    assert '# TYPE requests_total counter' in lines
+    assert 'requests_total{voice="le\\"ah"} 1' in lines
+    assert '# TYPE queue_depth gauge' in lines
+    assert 'queue_depth 4' in lines
+    assert '# TYPE latency_seconds histogram' in lines
+    assert 'latency_seconds_bucket{route="/generate",le="0.025"} 0' in lines
+    assert 'latency_seconds_bucket{route="/generate",le="0.05"} 1' in lines
+    assert 'latency_seconds_bucket{route="/generate",le="10.0"} 2' in lines
+    assert 'latency_seconds_bucket{route="/generate",le="+Inf"} 2' in lines
+    assert 'latency_seconds_count{route="/generate"} 2' in lines
+
+
+def test_prometheus_is_negotiated_by_query_or_accept():
+    assert server.wants_prometheus_metrics({'format': ['prometheus']}, None)
+    assert server.wants_prometheus_metrics({}, 'text/plain;version=0.0.4')
+    assert server.wants_prometheus_metrics({}, 'application/openmetrics-text')
+    assert not server.wants_prometheus_metrics({}, 'application/json')
@@ -0,0 +1,50 @@
+import io
+import time
+
+import requests
+
+import enhanced_voice_server_optimized as server
+
+STREAM_AUDIO = b'\x01\x00' * (server.CHUNK_SIZE * 2)  # Four chunks
+
+
+class FakeStreamUpstream:
+    def post(self, url, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = io.BytesIO(STREAM_AUDIO)
+        return response
+
+
+def start_stream(monkeypatch):
+    """stream_orpheus_tts against a fake predict_stream; returns the stream, its scheduler and the AIMD samples it reports"""
+    scheduler = server.UpstreamScheduler(limit=2)
+    samples = []
+    monkeypatch.setattr(server, 'upstream_sessions', FakeStreamUpstream())
+    monkeypatch.setattr(server, 'orpheus_scheduler', scheduler)
+    monkeypatch.setattr(server.orpheus_concurrency, 'record', lambda *sample: samples.append(sample))
+    stream = server.stream_orpheus_tts('Hello there.', server.VOICE_CONFIGS['orpheus_leah'], use_cache=False)
+    return stream, scheduler, samples
+
+
+def test_completed_stream_reports_upstream_time_without_consumer_time(monkeypatch):
+    stream, scheduler, samples = start_stream(monkeypatch)
+    received = b''
+    for chunk in stream:
+        received += chunk
+        time.sleep(0.1)  # A slow client
+
+    assert received == STREAM_AUDIO
+    assert scheduler.active == 0
+    [(granted_at, status_code, audio_bytes, upstream_seconds)] = samples
+    assert (status_code, audio_bytes) == (200, len(STREAM_AUDIO))
+    assert upstream_seconds < 0.1
+
+
+def test_abandoned_stream_is_not_an_aimd_sample(monkeypatch):
+    stream, scheduler, samples = start_stream(monkeypatch)
+    next(stream)
+    stream.close()
+
+    assert scheduler.active == 0
+    assert samples == []
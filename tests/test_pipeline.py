@@ -0,0 +1,110 @@
+import asyncio
+import json
+import threading
+import time
+
+from aiohttp.test_utils import TestClient, TestServer
+
+import enhanced_voice_server_optimized as server
+
+VOICE_CONFIG = server.get_voice_profile('orpheus_leah').config
+
+
+def fake_chat(sentences, closed, delay=0.01):
+    def stream(user_input, session_id, stats):
+        try:
+            for sentence in sentences:
+                time.sleep(delay)
+                yield sentence + ' '
+        finally:
+            closed.set()
+    return stream
+
+
+def test_pipeline_yields_segments_in_order(monkeypatch):
+    closed = threading.Event()
+    sentences = [f'This is sentence number {n} of the reply.' for n in range(4)]
+    monkeypatch.setattr(server, 'generate_fast_chatgpt_response_stream', fake_chat(sentences, closed))
+    monkeypatch.setattr(server, 'generate_orpheus_tts_optimized', lambda text, *args, **kwargs: {'success': True, 'text': text})
+
+    stats = {}
+    segments = list(server.generate_pipelined_conversation('hi', 'test', VOICE_CONFIG, parallelism=2, stats=stats))
+
+    assert [sentence for _, sentence, _ in segments] == sentences
+    assert [result['text'] for _, _, result in segments] == sentences
+    assert stats['segments'] == 4
+    assert closed.is_set()
+
+
+def test_closing_early_cancels_queued_sentences_and_the_chat_stream(monkeypatch):
+    closed = threading.Event()
+    synthesized = []
+    sentences = [f'This is sentence number {n} of the reply.' for n in range(20)]
+    monkeypatch.setattr(server, 'generate_fast_chatgpt_response_stream', fake_chat(sentences, closed, delay=0.005))
+
+    def slow_tts(text, *args, **kwargs):
+        synthesized.append(text)
+        time.sleep(0.2)
+        return {'success': True}
+    monkeypatch.setattr(server, 'generate_orpheus_tts_optimized', slow_tts)
+
+    pipeline = server.generate_pipelined_conversation('hi', 'test', VOICE_CONFIG, parallelism=1)
+    next(pipeline)
+    time.sleep(0.05)  # Let the producer queue more sentences behind the single TTS worker
+    started = time.time()
+    pipeline.close()
+
+    assert time.time() - started < 0.15  # Does not wait for the queued Orpheus calls
+    assert closed.wait(1)
+    time.sleep(0.3)
+    assert len(synthesized) <= 3
+
+
+def test_chat_error_after_close_does_not_crash_the_producer(monkeypatch, capsys):
+    closed = threading.Event()
+    errors = []
+    monkeypatch.setattr(threading, 'excepthook', lambda args: errors.append(args.exc_value))
+
+    def failing_chat(user_input, session_id, stats):
+        try:
+            yield 'This first sentence is long enough to send. '
+            time.sleep(0.05)
+            raise ConnectionError('chat stream broke')
+        finally:
+            closed.set()
+    monkeypatch.setattr(server, 'generate_fast_chatgpt_response_stream', failing_chat)
+    monkeypatch.setattr(server, 'generate_orpheus_tts_optimized', lambda *args, **kwargs: {'success': True})
+
+    pipeline = server.generate_pipelined_conversation('hi', 'test', VOICE_CONFIG)
+    next(pipeline)
+    pipeline.close()
+
+    assert closed.wait(1)
+    time.sleep(0.05)
+    assert errors == []
+    assert 'Pipelined ChatGPT error' not in capsys.readouterr().out
+
+
+def test_asyncio_engine_steps_pipelines_on_its_own_executor(monkeypatch):
+    step_threads = []
+    closed = threading.Event()
+
+    def fake_pipeline(user_input, session_id, voice_config, stats=None):
+        try:
+            for index in range(2):
+                step_threads.append(threading.current_thread().name)
+                yield index, f'Sentence {index}.', {'success': True, 'audio_data': b'RIFF', 'content_type': 'audio/wav'}
+        finally:
+            closed.set()
+    monkeypatch.setattr(server, 'generate_pipelined_conversation', fake_pipeline)
+
+    async def main():
+        async with TestClient(TestServer(server.AsyncVoiceServer().create_app())) as client:
+            response = await client.post('/conversation/respond/stream', json={'text': 'hi'})
+            return [json.loads(line) for line in (await response.text()).splitlines()]
+
+    lines = asyncio.run(main())
+
+    assert [line['type'] for line in lines] == ['segment', 'segment', 'done']
+    assert step_threads and all(name.startswith('async-pipeline') for name in step_threads)
+    assert closed.wait(1)
@@ -0,0 +1,167 @@
+import asyncio
+import threading
+import time
+
+import enhanced_voice_server_optimized as server
+
+ONE_SECOND_OF_AUDIO = server.ORPHEUS_SAMPLE_RATE * 2
+
+
+async def queue_requests(scheduler, requests):
+    """Queue (name, priority, deadline) behind a full scheduler; returns the grant order as slots are released one by one"""
+    order = []
+
+    async def wait(name, priority, deadline):
+        order.append((name, await scheduler.acquire_async(priority, deadline)))
+
+    tasks = []
+    for request in requests:
+        tasks.append(asyncio.ensure_future(wait(*request)))
+        await asyncio.sleep(0)
+    return order, tasks
+
+
+def test_freed_slots_go_to_the_highest_class_then_oldest():
+    async def main():
+        scheduler = server.UpstreamScheduler(limit=1)
+        assert scheduler.acquire('generate') == 'granted'
+        order, tasks = await queue_requests(scheduler, [
+            ('batch', 'batch', None),
+            ('generate-1', 'generate', None),
+            ('conversation', 'conversation', None),
+            ('generate-2', 'generate', None),
+        ])
+        assert scheduler.demand() == 5
+        for _ in tasks:
+            scheduler.release()
+            await asyncio.sleep(0.01)
+        await asyncio.gather(*tasks)
+        return order
+
+    assert [name for name, _ in asyncio.run(main())] == ['conversation', 'generate-1', 'generate-2', 'batch']
+
+
+def test_requests_past_their_deadline_are_dropped_not_dispatched():
+    async def main():
+        scheduler = server.UpstreamScheduler(limit=1)
+        assert scheduler.acquire('generate') == 'granted'
+        order, tasks = await queue_requests(scheduler, [
+            ('late', 'conversation', time.time() + 0.05),
+            ('patient', 'generate', None),
+        ])
+        await asyncio.sleep(0.1)
+        scheduler.release()
+        await asyncio.gather(*tasks)
+        return order, scheduler.active
+
+    order, active = asyncio.run(main())
+    assert order == [('late', 'expired'), ('patient', 'granted')]
+    assert active == 1
+
+
+def test_blocking_acquire_expires_at_its_deadline():
+    scheduler = server.UpstreamScheduler(limit=1)
+    with scheduler.slot('generate') as outcome:
+        assert outcome == 'granted'
+        started = time.time()
+        assert scheduler.acquire('generate', deadline=time.time() + 0.05) == 'expired'
+        assert 0.04 < time.time() - started < 1
+    assert scheduler.active == 0
+
+
+def test_raising_the_limit_dispatches_queued_requests():
+    async def main():
+        scheduler = server.UpstreamScheduler(limit=1)
+        assert scheduler.acquire('generate') == 'granted'
+        order, tasks = await queue_requests(scheduler, [('queued', 'generate', None)])
+        scheduler.set_limit(2)
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(main()) == [('queued', 'granted')]
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def main():
+        scheduler = server.UpstreamScheduler(limit=1)
+        assert scheduler.acquire('generate') == 'granted'
+        order, tasks = await queue_requests(scheduler, [('hedge', 'generate', None)])
+        scheduler.release()  # Grants the queued waiter...
+        tasks[0].cancel()  # ...which is cancelled before it runs
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return scheduler.active
+
+    assert asyncio.run(main()) == 0
+
+
+def make_controller(limit=4, **kwargs):
+    scheduler = server.UpstreamScheduler(limit=limit)
+    options = dict(min_limit=1, max_limit=8, tolerance=1.5, backoff_ratio=0.5, enabled=True)
+    options.update(kwargs)
+    return scheduler, server.AdaptiveConcurrencyLimit(scheduler, **options)
+
+
+def record_window(controller, seconds_per_audio_second, samples):
+    for _ in range(samples):
+        controller.record(time.time() - seconds_per_audio_second, 200, ONE_SECOND_OF_AUDIO)
+
+
+def test_aimd_grows_by_one_while_saturated_and_fast():
+    scheduler, controller = make_controller()
+    scheduler.active = scheduler.limit  # Every slot in use
+    record_window(controller, 1.0, 5)
+
+    assert scheduler.limit == 5
+
+
+def test_aimd_holds_when_slots_are_idle():
+    scheduler, controller = make_controller()
+    record_window(controller, 1.0, 5)
+
+    assert scheduler.limit == 4
+
+
+def test_aimd_backs_off_multiplicatively_when_latency_rises():
+    scheduler, controller = make_controller(limit=6)
+    record_window(controller, 1.0, 6)
+    record_window(controller, 5.0, 6)
+
+    assert scheduler.limit == 3
+
+
+def test_aimd_backs_off_once_per_overload_burst():
+    scheduler, controller = make_controller(limit=8)
+    started_before_burst = time.time() - 1
+    controller.record(started_before_burst, 503)
+    controller.record(started_before_burst, None)
+
+    assert scheduler.limit == 4
+    assert [entry['limit'] for entry in controller.history] == [8, 4]
+
+
+def test_aimd_ignores_client_errors_and_respects_bounds():
+    scheduler, controller = make_controller(limit=2, min_limit=2)
+    controller.record(time.time() - 1, 400)
+    controller.record(time.time() - 1, 200, 0)
+    controller.record(time.time() - 1, 429)
+
+    assert scheduler.limit == 2
+    assert [entry['reason'] for entry in controller.history] == ['initial']
+
+
+def test_cancelled_wait_leaves_the_queue_without_taking_a_slot():
+    scheduler = server.UpstreamScheduler(limit=1)
+    assert scheduler.acquire('generate') == 'granted'
+    cancellation = server.CallCancellation()
+    outcome = []
+    waiter = threading.Thread(target=lambda: outcome.append(scheduler.acquire('generate', time.time() + 5, cancellation)))
+    waiter.start()
+    time.sleep(0.05)
+    started = time.time()
+    cancellation.cancel()
+    waiter.join(1)
+
+    assert outcome == ['expired']
+    assert time.time() - started < 0.5
+    scheduler.release()
+    assert scheduler.active == 0
@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+import enhanced_voice_server_optimized as server
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, 'time', clock)
+    return clock
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def make_store(request, tmp_path):
+    def make(**kwargs):
+        if request.param == 'memory':
+            return server.SessionStore(**kwargs)
+        return server.SQLiteSessionStore(str(tmp_path / 'sessions.db'), **kwargs)
+    return make
+
+
+def test_idle_sessions_expire_after_the_ttl(make_store, clock):
+    store = make_store(ttl_seconds=60)
+    store.append('old', {'user': 'hi'})
+    clock.now += 30
+    store.append('fresh', {'user': 'hello'})
+    clock.now += 31
+
+    assert store.get_history('old') == []
+    assert store.get_history('fresh') == [{'user': 'hello'}]
+    assert store.session_ids() == ['fresh']
+    assert store.get_stats()['expired'] == 1
+
+
+def test_reading_a_session_keeps_it_alive(make_store, clock):
+    store = make_store(ttl_seconds=60)
+    store.append('a', {'user': 'hi'})
+    clock.now += 50
+    assert store.get_history('a') == [{'user': 'hi'}]
+    clock.now += 50
+
+    assert len(store) == 1
+
+
+def test_least_recently_used_session_is_evicted(make_store, clock):
+    store = make_store(max_sessions=2)
+    for session_id in ('a', 'b'):
+        store.append(session_id, {'user': session_id})
+        clock.now += 1
+    store.get_history('a')
+    clock.now += 1
+    store.append('c', {'user': 'c'})
+
+    assert sorted(store.session_ids()) == ['a', 'c']
+    assert store.get_stats()['evicted'] == 1
+
+
+def test_history_is_trimmed_to_max_messages(make_store, clock):
+    store = make_store(max_messages=3)
+    for index in range(5):
+        store.append('a', {'n': index})
+    store.append('a', {'n': 5}, max_messages=2)
+
+    assert store.get_history('a') == [{'n': 4}, {'n': 5}]
+
+
+def test_memory_budget_evicts_oldest_sessions(clock):
+    store = server.SessionStore(memory_budget_bytes=200)
+    for session_id in ('a', 'b', 'c'):
+        store.append(session_id, {'user': 'x' * 80})
+        clock.now += 1
+
+    assert store.session_ids() == ['b', 'c']
+    assert store.get_stats()['memory_bytes'] <= 200
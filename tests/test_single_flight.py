@@ -0,0 +1,82 @@
+import asyncio
+import threading
+import time
+
+import enhanced_voice_server_optimized as server
+
+
+def test_concurrent_threads_share_one_call():
+    flight = server.SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def slow_call(value):
+        calls.append(value)
+        started.set()
+        time.sleep(0.1)
+        return value * 2
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.run('key', slow_call, 21)))
+    leader.start()
+    started.wait()
+    follower_result = flight.run('key', slow_call, 21)
+    leader.join()
+
+    assert calls == [21]
+    assert results == [(42, False)]
+    assert follower_result == (42, True)
+
+
+def test_async_followers_share_one_call():
+    flight = server.SingleFlight()
+    calls = []
+
+    async def slow_call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 'audio'
+
+    async def main():
+        return await asyncio.gather(*(flight.run_async('key', slow_call) for _ in range(3)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert sorted(results, key=lambda result: result[1]) == [('audio', False), ('audio', True), ('audio', True)]
+    assert flight.get_stats()['in_flight'] == 0
+
+
+def test_async_leader_cancellation_does_not_cancel_followers():
+    flight = server.SingleFlight()
+
+    async def slow_call():
+        await asyncio.sleep(0.1)
+        return 'audio'
+
+    async def main():
+        leader = asyncio.ensure_future(flight.run_async('key', slow_call))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.run_async('key', slow_call))
+        await asyncio.sleep(0.01)
+        leader.cancel()  # The leader's client disconnected
+        follower_result = await follower
+        return leader.cancelled(), follower_result
+
+    leader_cancelled, follower_result = asyncio.run(main())
+    assert leader_cancelled
+    assert follower_result == ('audio', True)
+
+
+def test_async_errors_reach_every_caller():
+    flight = server.SingleFlight()
+
+    async def failing_call():
+        await asyncio.sleep(0.01)
+        raise RuntimeError('upstream down')
+
+    async def main():
+        return await asyncio.gather(*(flight.run_async('key', failing_call) for _ in range(2)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.get_stats()['in_flight'] == 0
@@ -0,0 +1,90 @@
+import contextlib
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+import enhanced_voice_server_optimized as server
+
+
+class BlockingHandler(BaseHTTPRequestHandler):
+    release = threading.Event()
+    started = threading.Event()
+
+    def do_GET(self):
+        BlockingHandler.started.set()
+        BlockingHandler.release.wait(5)
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+def send_request(port):
+    connection = socket.create_connection(('127.0.0.1', port), timeout=5)
+    connection.sendall(b'GET / HTTP/1.0\r\nHost: test\r\n\r\n')
+    return connection
+
+
+def read_response(connection):
+    chunks = []
+    while True:
+        chunk = connection.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    connection.close()
+    return b''.join(chunks)
+
+
+@contextlib.contextmanager
+def saturated_server():
+    """One worker busy, one connection queued - the next connection finds the queue full"""
+    BlockingHandler.release.clear()
+    BlockingHandler.started.clear()
+    httpd = server.BoundedThreadPoolHTTPServer(('127.0.0.1', 0), BlockingHandler, workers=1, queue_size=1)
+    port = httpd.server_address[1]
+    serve = threading.Thread(target=httpd.serve_forever, daemon=True)
+    serve.start()
+    try:
+        busy = send_request(port)
+        assert BlockingHandler.started.wait(5)  # The only worker is now busy
+        queued = send_request(port)
+        deadline = time.time() + 5
+        while httpd.pending_requests.qsize() < 1 and time.time() < deadline:
+            time.sleep(0.01)
+        yield httpd, port, busy, queued
+    finally:
+        BlockingHandler.release.set()
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_full_queue_is_answered_with_503_without_a_worker():
+    with saturated_server() as (httpd, port, busy, queued):
+        rejected = read_response(send_request(port))
+
+        head, body = rejected.split(b'\r\n\r\n', 1)
+        assert head.startswith(b'HTTP/1.0 503')
+        assert b'Retry-After: 1' in head
+        assert json.loads(body)['status_code'] == 503
+        assert httpd.rejected_requests == 1
+
+        BlockingHandler.release.set()
+        assert read_response(busy).endswith(b'ok')
+        assert read_response(queued).endswith(b'ok')
+
+
+def test_silent_connections_do_not_stall_the_accept_loop():
+    with saturated_server() as (httpd, port, busy, queued):
+        started = time.time()
+        silent = [socket.create_connection(('127.0.0.1', port), timeout=5) for _ in range(4)]
+        replies = [read_response(connection) for connection in silent]
+
+        assert all(reply.startswith(b'HTTP/1.0 503') for reply in replies)
+        assert time.time() - started < 0.5
+        assert httpd.rejected_requests == 4